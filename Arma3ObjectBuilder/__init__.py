@@ -269,6 +269,17 @@ class A3OB_AT_preferences(bpy.types.AddonPreferences):
         description = "Path to JSON file containing data for custom preset list items (common named properties and proxies)",
         subtype = 'FILE_PATH'
     )
+    cache_dir: bpy.props.StringProperty(
+        name = "P3D Cache",
+        description = "Directory to cache the parsed P3D files in, to speed up repeated imports of the same files (leave empty to disable caching)",
+        subtype = 'DIR_PATH'
+    )
+    cache_size: bpy.props.IntProperty(
+        name = "Cache Size",
+        description = "Maximum total size of the P3D cache in MB, the least recently used entries are removed above this",
+        default = 1024,
+        min = 1
+    )
     # Defaults
     flag_vertex: bpy.props.IntProperty(name="Vertex Flag", default=0x02000000)
     flag_face: bpy.props.IntProperty(name="Face Flag")
@@ -318,6 +329,10 @@ class A3OB_AT_preferences(bpy.types.AddonPreferences):
             row_a3_tools.operator("a3ob.prefs_find_a3_tools", text="", icon='VIEWZOOM')
             box.prop(self, "project_root", icon='DISK_DRIVE')
             box.prop(self, "custom_data", icon='PRESET')
+            box.prop(self, "cache_dir", icon='FILE_CACHE')
+            row_cache_size = box.row()
+            row_cache_size.prop(self, "cache_size")
+            row_cache_size.enabled = self.cache_dir != ""
         
         elif self.tabs == 'DEFAULTS':
             row_vertex = box.row(align=True)
@@ -3,6 +3,8 @@ if "binary_handler" in locals():
     
     if "binary_handler" in locals():
         reload(binary_handler)
+    if "cache_p3d" in locals():
+        reload(cache_p3d)
     if "config" in locals():
         reload(config)
     if "compression" in locals():
@@ -41,13 +43,20 @@ if "binary_handler" in locals():
         reload(import_tbcsv)
     if "import_paa" in locals():
         reload(import_paa)
+    if "profiler" in locals():
+        reload(profiler)
+    if "serialize_p3d" in locals():
+        reload(serialize_p3d)
 
 
 from . import binary_handler
+from . import cache_p3d
 from . import config
 from . import compression
 from . import data_asc
 from . import data_p3d
+from . import profiler
+from . import serialize_p3d
 from . import data_rtm
 from . import data_tbcsv
 from . import data_paa
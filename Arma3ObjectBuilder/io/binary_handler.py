@@ -7,6 +7,8 @@ import struct
 import functools
 import itertools
 
+import numpy as np
+
 
 def read_byte(file):
     return struct.unpack('B', file.read(1))[0]
@@ -102,6 +104,196 @@ def read_lascii(file):
     
     return value.decode('utf8', errors="replace")
     
+# Reader to decode the same data types from an in-memory buffer (bytes, bytearray or
+# memory mapped file) with an integer cursor, instead of reading every value from a file
+# object separately. Fixed size values are decoded with precompiled structures, and
+# strings are located with a single search for their terminator.
+# The class also implements the basic file object interface (read, seek, tell, peek),
+# so it can be passed to functions that expect a readable binary file.
+class BinaryReader():
+    struct_byte = struct.Struct('B')
+    struct_short = struct.Struct('<h')
+    struct_ushort = struct.Struct('<H')
+    struct_long = struct.Struct('<i')
+    struct_ulong = struct.Struct('<I')
+    struct_half = struct.Struct('<e')
+    struct_float = struct.Struct('<f')
+    struct_double = struct.Struct('<d')
+
+    def __init__(self, data, offset = 0):
+        self.data = data
+        self.pos = offset
+        self.size = len(data)
+    
+    # Top level read functions accept both readers and file objects. In case of a file,
+    # the rest of the file is read into memory at once.
+    @classmethod
+    def wrap(cls, file):
+        if isinstance(file, cls):
+            return file
+        
+        return cls(file.read())
+    
+    # File object interface
+
+    def read(self, count = -1):
+        start = self.pos
+        if count < 0:
+            self.pos = self.size
+        else:
+            self.pos = min(start + count, self.size)
+
+        return bytes(self.data[start:self.pos])
+    
+    def peek(self, count = 1):
+        return bytes(self.data[self.pos:self.pos + max(count, 1)])
+    
+    def seek(self, offset, whence = 0):
+        if whence == 1:
+            offset += self.pos
+        elif whence == 2:
+            offset += self.size
+        
+        self.pos = offset
+        return self.pos
+    
+    def tell(self):
+        return self.pos
+    
+    def skip(self, count):
+        self.pos += count
+    
+    def eof(self):
+        return self.pos >= self.size
+    
+    # Data types
+
+    def unpack(self, struct_obj):
+        values = struct_obj.unpack_from(self.data, self.pos)
+        self.pos += struct_obj.size
+        return values
+    
+    def unpack_single(self, struct_obj):
+        value = struct_obj.unpack_from(self.data, self.pos)[0]
+        self.pos += struct_obj.size
+        return value
+    
+    def unpack_format(self, fmt):
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return values
+    
+    # Read a block of fixed size records into a NumPy array. The returned array
+    # is a read-only view of the buffer, it has to be copied if it is to be kept.
+    def read_array(self, dtype, count):
+        dtype = np.dtype(dtype)
+        output = np.frombuffer(self.data, dtype=dtype, count=count, offset=self.pos)
+        self.pos += dtype.itemsize * count
+        return output
+
+    def read_byte(self):
+        return self.unpack_single(self.struct_byte)
+    
+    def read_bytes(self, count = 1):
+        return self.unpack_format('<%dB' % count)
+    
+    def read_bool(self):
+        return self.read_byte() != 0
+    
+    def read_short(self):
+        return self.unpack_single(self.struct_short)
+    
+    def read_shorts(self, count = 1):
+        return self.unpack_format('<%dh' % count)
+    
+    def read_ushort(self):
+        return self.unpack_single(self.struct_ushort)
+    
+    def read_ushorts(self, count = 1):
+        return self.unpack_format('<%dH' % count)
+    
+    def read_long(self):
+        return self.unpack_single(self.struct_long)
+    
+    def read_longs(self, count = 1):
+        return self.unpack_format('<%di' % count)
+    
+    def read_ulong(self):
+        return self.unpack_single(self.struct_ulong)
+    
+    def read_ulongs(self, count = 1):
+        return self.unpack_format('<%dI' % count)
+    
+    def read_compressed_uint(self):
+        output = self.read_byte()
+        extra = output
+        
+        byte_idx = 1
+        while extra & 0x80:
+            extra = self.read_byte()
+            output += (extra - 1) << (byte_idx * 7)
+            byte_idx += 1
+        
+        return output
+    
+    def read_half(self):
+        return self.unpack_single(self.struct_half)
+    
+    def read_halfs(self, count = 1):
+        return self.unpack_format('<%de' % count)
+    
+    def read_float(self):
+        return self.unpack_single(self.struct_float)
+    
+    def read_floats(self, count = 1):
+        return self.unpack_format('<%df' % count)
+    
+    def read_double(self):
+        return self.unpack_single(self.struct_double)
+    
+    def read_doubles(self, count = 1):
+        return self.unpack_format('<%dd' % count)
+    
+    def read_char(self, count = 1):
+        return self.read(count).decode('ascii')
+    
+    def find_terminator(self):
+        end = self.data.find(b"\x00", self.pos)
+        if end < 0:
+            raise EOFError("ASCIIZ string ran into unexpected EOF")
+        
+        return end
+    
+    def read_asciiz(self):
+        end = self.find_terminator()
+        value = bytes(self.data[self.pos:end])
+        self.pos = end + 1
+
+        return value.decode('utf8', errors="replace")
+    
+    def skip_asciiz(self):
+        self.pos = self.find_terminator() + 1
+    
+    def read_asciiz_field(self, field_len):
+        field = self.read(field_len)
+        if len(field) < field_len:
+            raise EOFError("ASCIIZ field ran into unexpected EOF")
+        
+        parts = field.split(b"\x00")
+        if len(parts) < 2:
+            raise ValueError("ASCIIZ field length overflow")
+        
+        return parts[0].decode('utf8', errors="replace")
+    
+    def read_lascii(self):
+        length = self.read_byte()
+        value = self.read(length)
+        if len(value) != length:
+            raise EOFError("LASCII string ran into unexpected EOF")
+        
+        return value.decode('utf8', errors="replace")
+
+
 def write_byte(file, *args):
     file.write(struct.pack('%dB' % len(args), *args))
     
@@ -0,0 +1,365 @@
+# Disk cache of parsed P3D files. The MLODs are stored in a compact form: the array data
+# is written into an uncompressed .npz archive, together with a small JSON header that holds
+# everything else (LOD headers, texture-material pairs, TAGG names and values).
+# The entries are keyed on the absolute path, size and modification time of the source file,
+# so a changed file is never read from the cache. When the total size of the cache exceeds
+# the limit, the least recently used entries are evicted.
+# Serialized LODs are also cached for the incremental P3D export (see P3D_LOD_Cache).
+# The module does not depend on bpy.
+
+
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from . import data_p3d as p3d
+
+
+class P3D_Cache():
+    version = 1
+
+    lod_arrays = (
+        "verts",
+        "verts_flags",
+        "normals",
+        "face_sides",
+        "face_verts",
+        "face_normals",
+        "face_uvs",
+        "face_flags",
+        "face_materials"
+    )
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return "%d hits, %d misses" % (self.hits, self.misses)
+
+    @classmethod
+    def get_key(cls, filepath):
+        filepath = os.path.normcase(os.path.abspath(filepath))
+        stat = os.stat(filepath)
+        ident = "%s|%d|%d" % (filepath, stat.st_size, stat.st_mtime_ns)
+
+        return hashlib.sha1(ident.encode('utf8')).hexdigest()
+
+    def get_path(self, filepath):
+        return os.path.join(self.directory, "%s.npz" % self.get_key(filepath))
+
+    # The cache is best-effort, any failure (missing or unreadable entry, read-only directory
+    # etc.) is treated as a miss.
+    def get(self, filepath):
+        try:
+            path = self.get_path(filepath)
+            with np.load(path, allow_pickle=False) as archive:
+                mlod = self.unpack(archive)
+            
+            os.utime(path) # keep track of the last use for the LRU eviction
+        except Exception:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        mlod.source = filepath
+
+        return mlod
+
+    # The write is skipped if the entry cannot be stored (full disk, read-only or invalid
+    # directory etc.). Returns whether the entry was written.
+    def put(self, filepath, mlod):
+        path_temp = None
+        try:
+            path = self.get_path(filepath)
+            path_temp = path + ".temp.npz"
+            os.makedirs(self.directory, exist_ok=True)
+            np.savez(path_temp, **self.pack(mlod))
+            os.replace(path_temp, path)
+        except OSError:
+            if path_temp and os.path.exists(path_temp):
+                try:
+                    os.remove(path_temp)
+                except OSError:
+                    pass
+            
+            return False
+
+        try:
+            self.evict()
+        except OSError:
+            pass
+
+        return True
+
+    def clear(self):
+        for path, size, mtime in self.get_entries():
+            os.remove(path)
+
+    def get_entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+
+        entries = []
+        for item in os.scandir(self.directory):
+            if item.is_file() and item.name.endswith(".npz") and not item.name.endswith(".temp.npz"):
+                stat = item.stat()
+                entries.append((item.path, stat.st_size, stat.st_mtime))
+
+        return entries
+
+    def evict(self):
+        entries = sorted(self.get_entries(), key=lambda item: item[2])
+        total = sum([size for path, size, mtime in entries])
+
+        for path, size, mtime in entries:
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    # Conversion between the MLOD objects and the flat dictionary of arrays stored in the archive.
+
+    @classmethod
+    def pack_tagg(cls, tagg, prefix, arrays):
+        data = tagg.data
+        data_type = type(data).__name__
+        header = {"name": tagg.name, "type": data_type}
+
+        if data_type == "P3D_TAGG_DataSharpEdges":
+            arrays[prefix + "edges"] = np.array(data.edges, dtype=np.uint32).reshape((-1, 2))
+        elif data_type == "P3D_TAGG_DataProperty":
+            header["key"] = data.key
+            header["value"] = data.value
+        elif data_type == "P3D_TAGG_DataMass":
+            arrays[prefix + "masses"] = np.array(data.masses, dtype=np.float32)
+        elif data_type == "P3D_TAGG_DataUVSet":
+            header["id"] = data.id
+            arrays[prefix + "uvs"] = np.array(data.uvs, dtype=np.float64).reshape((-1, 2))
+        elif data_type == "P3D_TAGG_DataSelection":
+            arrays[prefix + "verts"] = data.data_verts
+            arrays[prefix + "faces"] = data.data_faces
+
+        return header
+
+    @classmethod
+    def unpack_tagg(cls, header, prefix, archive):
+        tagg = p3d.P3D_TAGG()
+        tagg.name = header["name"]
+        data_type = header["type"]
+
+        if data_type == "P3D_TAGG_DataSharpEdges":
+            tagg.data = p3d.P3D_TAGG_DataSharpEdges()
+            tagg.data.edges = [tuple(edge) for edge in archive[prefix + "edges"].tolist()]
+        elif data_type == "P3D_TAGG_DataProperty":
+            tagg.data = p3d.P3D_TAGG_DataProperty()
+            tagg.data.key = header["key"]
+            tagg.data.value = header["value"]
+        elif data_type == "P3D_TAGG_DataMass":
+            tagg.data = p3d.P3D_TAGG_DataMass()
+            tagg.data.masses = tuple(archive[prefix + "masses"].tolist())
+        elif data_type == "P3D_TAGG_DataUVSet":
+            tagg.data = p3d.P3D_TAGG_DataUVSet()
+            tagg.data.id = header["id"]
+            tagg.data.uvs = [tuple(uv) for uv in archive[prefix + "uvs"].tolist()]
+        elif data_type == "P3D_TAGG_DataSelection":
+            tagg.data = p3d.P3D_TAGG_DataSelection()
+            tagg.data.data_verts = archive[prefix + "verts"]
+            tagg.data.data_faces = archive[prefix + "faces"]
+
+        return tagg
+
+    @classmethod
+    def pack(cls, mlod):
+        arrays = {}
+        header = {
+            "version": cls.version,
+            "mlod_version": mlod.version,
+            "lods": []
+        }
+
+        for i, lod in enumerate(mlod.lods):
+            prefix = "%d_" % i
+            for name in cls.lod_arrays:
+                arrays[prefix + name] = getattr(lod, name)
+
+            header["lods"].append({
+                "version": list(lod.version),
+                "flags": lod.flags,
+                "resolution": lod.resolution.source if lod.resolution.source is not None else float(lod.resolution),
+                "materials": [list(pair) for pair in lod.materials],
+                "taggs": [cls.pack_tagg(tagg, "%s%d_" % (prefix, j), arrays) for j, tagg in enumerate(lod.taggs)]
+            })
+
+        arrays["header"] = np.array(json.dumps(header))
+
+        return arrays
+
+    @classmethod
+    def unpack(cls, archive):
+        header = json.loads(str(archive["header"]))
+        if header["version"] != cls.version:
+            raise ValueError("Unsupported cache entry version: %d" % header["version"])
+
+        mlod = p3d.P3D_MLOD()
+        mlod.version = header["mlod_version"]
+
+        for i, lod_header in enumerate(header["lods"]):
+            prefix = "%d_" % i
+            lod = p3d.P3D_LOD()
+            lod.version = tuple(lod_header["version"])
+            lod.flags = lod_header["flags"]
+            lod.resolution.set_from_float(lod_header["resolution"])
+            lod.materials = [tuple(pair) for pair in lod_header["materials"]]
+            lod.taggs = [cls.unpack_tagg(tagg, "%s%d_" % (prefix, j), archive) for j, tagg in enumerate(lod_header["taggs"])]
+            for name in cls.lod_arrays:
+                setattr(lod, name, archive[prefix + name])
+
+            mlod.lods.append(lod)
+
+        return mlod
+
+
+# Worker task of the parallel batch import. The parsed MLOD is returned in the packed form
+# of the cache (plain arrays and a JSON header), so no instances of the classes loaded in
+# the worker process are passed back to the add-on.
+# ({array name: array, ...}, parsing time)
+def read_file_task(filepath, first_lod_only = False, lod_types = None):
+    mlod, time_read = p3d.read_file_task(filepath, first_lod_only, lod_types)
+    
+    return P3D_Cache.pack(mlod), time_read
+
+
+# The cache objects are kept for the whole session, so the hit/miss statistics accumulate.
+caches = {}
+
+
+def get_cache(directory, max_size):
+    directory = os.path.abspath(directory)
+    cache = caches.get(directory)
+    if cache is None:
+        cache = P3D_Cache(directory, max_size)
+        caches[directory] = cache
+
+    cache.max_size = max_size
+
+    return cache
+
+
+# Cache of serialized LODs for the incremental export. The entries are keyed on the absolute path
+# of the exported file and the fingerprint of the LOD object (calculated in the export_p3d module),
+# and hold the serialized data of every LOD produced from the object (the LOD itself and its copies).
+# The object names are not part of the key, so renamed objects are still found, and objects with
+# the same name in different .blend files do not collide. The entries are stored in memory for the
+# session, and optionally in a directory as well (a subfolder per exported file), so they are
+# preserved between sessions. After every export, the entries of the file that were not used are
+# pruned, so only the latest state of the file is kept.
+class P3D_LOD_Cache():
+    def __init__(self, directory = None):
+        self.directory = directory
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        return "%d hits, %d misses" % (self.hits, self.misses)
+    
+    def get_folder(self, filepath):
+        return os.path.join(self.directory, hashlib.sha1(os.path.abspath(filepath).encode('utf8')).hexdigest())
+    
+    def get_path(self, filepath, fingerprint):
+        return os.path.join(self.get_folder(filepath), "%s.npz" % fingerprint)
+    
+    # [(resolution signature, LOD data), ...]
+    def get(self, filepath, fingerprint):
+        entries = self.entries.setdefault(os.path.abspath(filepath), {})
+        lods = entries.get(fingerprint)
+        if lods is None and self.directory:
+            try:
+                with np.load(self.get_path(filepath, fingerprint), allow_pickle=False) as archive:
+                    signatures = archive["signatures"].tolist()
+                    lods = [(signature, archive["lod_%d" % i].tobytes()) for i, signature in enumerate(signatures)]
+                
+                entries[fingerprint] = lods
+            except Exception:
+                lods = None
+        
+        if lods is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return lods
+    
+    # The entry is kept in memory even if writing it to disk fails.
+    def put(self, filepath, fingerprint, lods):
+        self.entries.setdefault(os.path.abspath(filepath), {})[fingerprint] = lods
+        if not self.directory:
+            return
+        
+        arrays = {
+            "signatures": np.array([signature for signature, data in lods], dtype=np.float64)
+        }
+        for i, (signature, data) in enumerate(lods):
+            arrays["lod_%d" % i] = np.frombuffer(data, dtype=np.uint8)
+        
+        path = self.get_path(filepath, fingerprint)
+        path_temp = path + ".temp.npz"
+        try:
+            os.makedirs(self.get_folder(filepath), exist_ok=True)
+            np.savez(path_temp, **arrays)
+            os.replace(path_temp, path)
+        except OSError:
+            if os.path.exists(path_temp):
+                os.remove(path_temp)
+            raise
+    
+    # Removes the entries of the file that are not in the given fingerprints. Stale files that
+    # cannot be removed from the disk are left for the next export to clean up.
+    def prune(self, filepath, fingerprints):
+        fingerprints = set(fingerprints)
+        entries = self.entries.setdefault(os.path.abspath(filepath), {})
+        for fingerprint in [item for item in entries if item not in fingerprints]:
+            del entries[fingerprint]
+        
+        if not self.directory:
+            return
+        
+        folder = self.get_folder(filepath)
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return
+        
+        for name in names:
+            if os.path.splitext(name)[0] in fingerprints:
+                continue
+            
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+lod_caches = {}
+
+
+def get_lod_cache(directory = None):
+    if directory:
+        directory = os.path.abspath(directory)
+    
+    cache = lod_caches.get(directory)
+    if cache is None:
+        cache = P3D_LOD_Cache(directory)
+        lod_caches[directory] = cache
+    
+    return cache
@@ -13,36 +13,36 @@ class RAP_Error(Exception):
 
 class Derapifier:
     @classmethod
-    def read_array(cls, file):
-        count = binary.read_compressed_uint(file)
+    def read_array(cls, reader):
+        count = reader.read_compressed_uint()
         members = []
         for i in range(count):
-            sign = binary.read_byte(file)
-            members.append(cls.read_value(file, sign))
+            sign = reader.read_byte()
+            members.append(cls.read_value(reader, sign))
 
         return data.CFGArray(members)
 
     @classmethod
-    def read_value(cls, file, sign):
+    def read_value(cls, reader, sign):
         if sign == 0:
-            return data.CFGLiteralString(binary.read_asciiz(file))
+            return data.CFGLiteralString(reader.read_asciiz())
         elif sign == 1:
-            return data.CFGLiteralFloat(binary.read_float(file))
+            return data.CFGLiteralFloat(reader.read_float())
         elif sign == 2:
-            return data.CFGLiteralLong(binary.read_ulong(file))
+            return data.CFGLiteralLong(reader.read_ulong())
         elif sign == 3:
-            return cls.read_array(file)
+            return cls.read_array(reader)
 
         raise RAP_Error("Unsupported value type")
 
     @classmethod
-    def read_class(cls, file, main=None):
-        name = binary.read_asciiz(file)
-        offset = binary.read_ulong(file)
-        current = file.tell()
-        file.seek(offset)
+    def read_class(cls, reader, main=None):
+        name = reader.read_asciiz()
+        offset = reader.read_ulong()
+        current = reader.tell()
+        reader.seek(offset)
 
-        parentname = binary.read_asciiz(file)
+        parentname = reader.read_asciiz()
         parent = None
         if parentname != "":
             parent = data.CFGClass.resolve_parent(main, parentname)
@@ -50,40 +50,40 @@ class Derapifier:
                 raise RAP_Error("Could not resolve parent")
 
         out = data.CFGClass(name, parent, main)
-        count = binary.read_compressed_uint(file)
-        cls.read_entries(file, count, out)
+        count = reader.read_compressed_uint()
+        cls.read_entries(reader, count, out)
 
-        file.seek(current)
+        reader.seek(current)
 
         return out
 
     @classmethod
-    def read_entries(cls, file, count, main=None):
+    def read_entries(cls, reader, count, main=None):
         classes = main.classes if main else []
         properties = main.properties if main else []
 
         for i in range(count):
-            entry_sign = binary.read_byte(file)
+            entry_sign = reader.read_byte()
             if entry_sign == 0:
-                classes.append(cls.read_class(file, main))
+                classes.append(cls.read_class(reader, main))
             elif entry_sign == 1:
-                sign = binary.read_byte(file)
-                name = binary.read_asciiz(file)
-                value = cls.read_value(file, sign)
+                sign = reader.read_byte()
+                name = reader.read_asciiz()
+                value = cls.read_value(reader, sign)
                 properties.append(data.CFGProperty(name, value))
             elif entry_sign == 2:
-                name = binary.read_asciiz(file)
-                value = cls.read_value(file, 3)
+                name = reader.read_asciiz()
+                value = cls.read_value(reader, 3)
                 properties.append(data.CFGProperty(name, value))
             elif entry_sign == 3:
-                classes.append(data.CFGClass(binary.read_asciiz(file), None, main, True))
+                classes.append(data.CFGClass(reader.read_asciiz(), None, main, True))
             elif entry_sign == 4:
                 # raise RAP_Error("Delete statements are not supported")
-                binary.read_asciiz(file)  # dump delete statements
+                reader.read_asciiz()  # dump delete statements
             elif entry_sign == 5:
-                name = binary.read_asciiz(file)
-                file.read(4)  # skip flag, always 1
-                value = cls.read_value(file, 3)
+                name = reader.read_asciiz()
+                reader.skip(4)  # skip flag, always 1
+                value = cls.read_value(reader, 3)
                 value.extends = True
                 properties.append(data.CFGProperty(name, value))
 
@@ -91,29 +91,30 @@ class Derapifier:
 
     @classmethod
     def read(cls, file):
-        signature = file.read(4)
+        reader = binary.BinaryReader.wrap(file)
+        signature = reader.read(4)
         if signature != b"\x00raP":
             raise RAP_Error("Invalid RAP signature: %s" % str(signature))
 
-        file.read(8)
-        enum_offset = binary.read_ulong(file)
+        reader.skip(8)
+        enum_offset = reader.read_ulong()
 
         # Body
         root = data.CFGClass("root")
-        file.read(1)  # skip empty parent
-        count_entries = binary.read_compressed_uint(file)
-        classes, properties = cls.read_entries(file, count_entries)
+        reader.skip(1)  # skip empty parent
+        count_entries = reader.read_compressed_uint()
+        classes, properties = cls.read_entries(reader, count_entries)
         root.classes = classes
         root.properties = properties
 
         # Enums
-        file.seek(enum_offset)
-        enum_count = binary.read_ulong(file)
+        reader.seek(enum_offset)
+        enum_count = reader.read_ulong()
         for i in range(enum_count):
-            binary.read_asciiz(file)  # dump name
-            file.read(4)  # dump value
+            reader.read_asciiz()  # dump name
+            reader.skip(4)  # dump value
 
-        if file.peek():
+        if not reader.eof():
             raise RAP_Error("Invalid EOF")
 
         return data.CFG(root)
@@ -5,12 +5,59 @@
 
 
 import struct
-import math
+import time
 import re
+import hashlib
+from io import BytesIO
+import mmap
+
+import numpy as np
 
 from . import binary_handler as binary
 
 
+# Collect the unique values of an array in the order of their first appearance,
+# and the index of the matching unique value for every item.
+def unique_ordered(values):
+    groups, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+
+    return groups[order].tolist(), ranks[inverse.ravel()]
+
+
+# Overlapping view of the byte records of fixed width starting at every offset of the buffer.
+# Records at arbitrary (unaligned) offsets can be gathered or scattered with a single
+# fancy indexing operation, without building a per-byte index array.
+def byte_windows(data, width, writeable = False):
+    return np.lib.stride_tricks.as_strided(data, (max(len(data) - width + 1, 0), width), (1, 1), writeable=writeable)
+
+
+# Edges are identified by a single 64-bit key made from the sorted vertex indices.
+def get_edge_keys(edges):
+    edges = np.sort(edges.astype(np.uint64), axis=1)
+    return (edges[:, 0] << np.uint64(32)) | edges[:, 1]
+
+
+# Mask of the mesh edges that are listed in the queried vertex index pairs.
+def match_edges(edges, pairs):
+    mask = np.zeros(len(edges), dtype=bool)
+    if len(edges) == 0 or len(pairs) == 0:
+        return mask
+
+    keys = get_edge_keys(edges)
+    order = np.argsort(keys)
+    keys_sorted = keys[order]
+
+    queries = get_edge_keys(pairs)
+    idx = np.minimum(np.searchsorted(keys_sorted, queries), len(keys_sorted) - 1)
+    found = keys_sorted[idx] == queries
+    mask[order[idx[found]]] = True
+
+    return mask
+
+
 class P3D_Error(Exception):
     def __str__(self):
         return "P3D - %s" % super().__str__()
@@ -20,8 +67,8 @@ class P3D_Error(Exception):
 # The class is needed because the data field of the TAGG object must not be none.
 class P3D_TAGG_DataEmpty():
     @classmethod
-    def read(cls, file, length):
-        file.seek(length, 1)
+    def read(cls, reader, length):
+        reader.skip(length)
         return cls()
     
     def length(self):
@@ -36,11 +83,11 @@ class P3D_TAGG_DataSharpEdges():
         self.edges = []
     
     @classmethod
-    def read(cls, file, length = 0):
+    def read(cls, reader, length = 0):
         output = cls()
         
         count_values = length // 4
-        data = binary.read_ulongs(file, count_values)
+        data = reader.read_ulongs(count_values)
 
         for i in range(0, count_values, 2):
             point_1 = data[i]
@@ -57,11 +104,8 @@ class P3D_TAGG_DataSharpEdges():
         return len(self.edges) * 8
     
     def write(self, file):
-        for edge in self.edges:
-            if edge[0] == edge[1]:
-                continue
-            
-            binary.write_ulong(file, *edge)
+        edges = np.array(self.edges, dtype="<u4").reshape((-1, 2))
+        file.write(edges[edges[:, 0] != edges[:, 1]].tobytes())
 
 
 class P3D_TAGG_DataProperty():
@@ -70,11 +114,11 @@ class P3D_TAGG_DataProperty():
         self.value = ""
     
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
         
-        output.key = binary.read_asciiz_field(file, 64)
-        output.value = binary.read_asciiz_field(file, 64)
+        output.key = reader.read_asciiz_field(64)
+        output.value = reader.read_asciiz_field(64)
         
         return output
     
@@ -91,9 +135,9 @@ class P3D_TAGG_DataMass():
         self.masses = ()
     
     @classmethod
-    def read(cls, file, count_verts):
+    def read(cls, reader, count_verts):
         output = cls()
-        output.masses = binary.read_floats(file, count_verts)
+        output.masses = reader.read_floats(count_verts)
         
         return output
     
@@ -101,7 +145,7 @@ class P3D_TAGG_DataMass():
         return len(self.masses) * 4
     
     def write(self, file):
-        binary.write_float(file, *self.masses)
+        file.write(np.asarray(self.masses, dtype="<f4").tobytes())
 
 
 class P3D_TAGG_DataUVSet():
@@ -110,11 +154,11 @@ class P3D_TAGG_DataUVSet():
         self.uvs = []
     
     @classmethod
-    def read(cls, file, length = 0):
+    def read(cls, reader, length = 0):
         output = cls()
-        output.id = binary.read_ulong(file)
+        output.id = reader.read_ulong()
         count_values = (length - 4) // 4
-        data = binary.read_floats(file, count_values)
+        data = reader.read_floats(count_values)
         output.uvs = [(data[i], 1 - data[i + 1]) for i in range(0, count_values, 2)]
 
         return output
@@ -123,24 +167,36 @@ class P3D_TAGG_DataUVSet():
         return len(self.uvs) * 8 + 4
     
     def write(self, file):
+        uvs = np.array(self.uvs, dtype=np.float64).reshape((-1, 2))
+        uvs[:, 1] = 1 - uvs[:, 1]
+
         binary.write_ulong(file, self.id)
-        for u, v in self.uvs:
-            binary.write_float(file, u, 1 - v)
+        file.write(uvs.astype("<f4").tobytes())
 
 
+# The selections are stored as the raw byte arrays (one byte per vertex/face) as they
+# are found in the file. The weights are only decoded when needed, and unchanged
+# data can be written back as is.
 class P3D_TAGG_DataSelection():
-    def __init__(self):
-        self.count_verts = 0
-        self.count_faces = 0
-        self.weight_verts = []
-        self.weight_faces = []
+    def __init__(self, count_verts = 0, count_faces = 0):
+        self.data_verts = np.zeros(count_verts, dtype=np.uint8)
+        self.data_faces = np.zeros(count_faces, dtype=np.uint8)
+    
+    # Decoded weight for every possible byte value.
+    # 0: not selected, 1: fully selected, 2-255: weights from 1 to 0
+    WEIGHTS = np.array([0, 1] + [(255 - value) / 254 for value in range(2, 256)], dtype=np.float64)
+    
+    @property
+    def count_verts(self):
+        return len(self.data_verts)
+    
+    @property
+    def count_faces(self):
+        return len(self.data_faces)
     
     @classmethod
     def decode_weight(cls, weight):
-        if weight in (0, 1):
-            return weight
-        
-        return (255 - weight) / 254
+        return float(cls.WEIGHTS[weight])
     
     @classmethod
     def encode_weight(cls, weight):
@@ -152,34 +208,59 @@ class P3D_TAGG_DataSelection():
         return value
     
     @classmethod
-    def read(cls, file, count_verts, count_faces):
+    def encode_weights(cls, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        values = np.round(255 - 254 * weights)
+        values[weights == 0] = 0
+        values[weights == 1] = 1
+
+        return values.astype(np.uint8)
+    
+    @classmethod
+    def read(cls, reader, count_verts, count_faces):
         output = cls()
-        
-        output.count_verts = count_verts
-        output.count_faces = count_faces
-        
-        data_verts = bytearray(file.read(count_verts))
-        output.weight_verts = [(i, cls.decode_weight(value)) for i, value in enumerate(data_verts) if value > 0]
-        file.seek(count_faces, 1) # skip face selection data
-        # data_faces = bytearray(file.read(count_faces))
-        # output.weight_faces = [(i, cls.decode_weight(value)) for i, value in enumerate(data_faces) if value > 0]
+        output.data_verts = reader.read_array(np.uint8, count_verts).copy()
+        output.data_faces = reader.read_array(np.uint8, count_faces).copy()
 
         return output
     
+    # Indices and decoded weights of the selected vertices.
+    def nonzero_verts(self):
+        indices = np.flatnonzero(self.data_verts)
+        return indices, self.WEIGHTS[self.data_verts[indices]]
+    
+    # Indices and decoded weights of the selected faces.
+    def nonzero_faces(self):
+        indices = np.flatnonzero(self.data_faces)
+        return indices, self.WEIGHTS[self.data_faces[indices]]
+    
+    # Selected vertex indices grouped by their decoded weight. There are at most 255 distinct
+    # weights, so the weights can be assigned in bulk, one call per group.
+    def grouped_verts(self):
+        indices = np.flatnonzero(self.data_verts)
+        if len(indices) == 0:
+            return []
+
+        values = self.data_verts[indices]
+        order = np.argsort(values, kind='stable')
+        indices = indices[order]
+        values = values[order]
+        starts = np.flatnonzero(np.diff(values)) + 1
+
+        weights = self.WEIGHTS[values[np.concatenate(([0], starts))]].tolist()
+        return list(zip(weights, np.split(indices, starts)))
+    
+    def set_weights_verts(self, indices, weights):
+        self.data_verts[np.asarray(indices, dtype=np.int64)] = self.encode_weights(weights)
+    
+    def set_weights_faces(self, indices, weights):
+        self.data_faces[np.asarray(indices, dtype=np.int64)] = self.encode_weights(weights)
+    
     def length(self):
         return self.count_verts + self.count_faces
     
-    def write(self, file):        
-        bytes_verts = bytearray(self.count_verts)
-        for idx, weight in self.weight_verts:
-            bytes_verts[idx] = self.encode_weight(weight)
-        
-        bytes_faces = bytearray(self.count_faces)
-        for idx, weight in self.weight_faces:
-            bytes_faces[idx] = self.encode_weight(weight)
-        
-        file.write(bytes_verts)
-        file.write(bytes_faces)
+    def write(self, file):
+        file.write(self.data_verts.tobytes() + self.data_faces.tobytes())
 
 
 class P3D_TAGG():
@@ -197,12 +278,12 @@ class P3D_TAGG():
     # Read
 
     @classmethod
-    def read(cls, file, count_verts, count_faces):
+    def read(cls, reader, count_verts, count_faces):
         output = cls()
         
-        output.active = binary.read_bool(file)
-        output.name = binary.read_asciiz(file)
-        length = binary.read_ulong(file)
+        output.active = reader.read_bool()
+        output.name = reader.read_asciiz()
+        length = reader.read_ulong()
         
         if output.name == "#EndOfFile#":
             if length != 0:
@@ -213,33 +294,41 @@ class P3D_TAGG():
             if length % 8 != 0:
                 raise P3D_Error("Invalid sharp edges length: %d" % length)
             
-            output.data = P3D_TAGG_DataSharpEdges.read(file, length)
+            output.data = P3D_TAGG_DataSharpEdges.read(reader, length)
         elif output.name == "#Property#":
             if length != 128:
                 raise P3D_Error("Invalid named property length: %d" % length)
             
-            output.data = P3D_TAGG_DataProperty.read(file)
+            output.data = P3D_TAGG_DataProperty.read(reader)
         elif output.name == "#Mass#":
-            output.data = P3D_TAGG_DataMass.read(file, count_verts)
+            output.data = P3D_TAGG_DataMass.read(reader, count_verts)
         elif output.name == "#UVSet#":
-            output.data = P3D_TAGG_DataUVSet.read(file, length)
+            output.data = P3D_TAGG_DataUVSet.read(reader, length)
         elif output.is_selection():
-            output.data = P3D_TAGG_DataSelection.read(file, count_verts, count_faces)
+            output.data = P3D_TAGG_DataSelection.read(reader, count_verts, count_faces)
         else:
-            file.seek(length, 1) # Skip unneeded TAGG data
+            reader.skip(length) # Skip unneeded TAGG data
             output.active = False
         
         return output
     
+    # Skip over the TAGG without decoding its data, only the name is returned.
+    @classmethod
+    def skip(cls, reader):
+        reader.skip(1)
+        name = reader.read_asciiz()
+        length = reader.read_ulong()
+        reader.skip(length)
+
+        return name
+    
     # Write
 
     def write(self, file):
         if not self.active:
             return 
-            
-        binary.write_bool(file, self.active)
-        binary.write_asciiz(file, self.name)
-        binary.write_ulong(file, self.data.length())
+        
+        file.write(b"\x01" + self.name.encode('ascii') + b"\x00" + struct.pack('<I', self.data.length()))
         self.data.write(file)
     
     # Operations
@@ -411,148 +500,223 @@ class P3D_LOD():
         self.flags = 0x00000000
         self.resolution = P3D_LOD_Resolution()
 
-        self.verts = []
-        self.normals = []
-        self.faces = []
+        self.verts = np.empty((0, 3), dtype=np.float32)
+        self.verts_flags = np.empty(0, dtype=np.uint32)
+        self.normals = np.empty((0, 3), dtype=np.float32)
+        self.face_sides = np.empty(0, dtype=np.uint32)
+        self.face_verts = np.empty(0, dtype=np.uint32)
+        self.face_normals = np.empty(0, dtype=np.uint32)
+        self.face_uvs = np.empty((0, 2), dtype=np.float32)
+        self.face_flags = np.empty(0, dtype=np.uint32)
+        self.face_materials = np.empty(0, dtype=np.uint32)
+        self.materials = []
         self.taggs = []
-    
-    struct_vert = struct.Struct('<fffI')
-    struct_normal = struct.Struct('<fff')
-    struct_face = struct.Struct('<IIff')
+
+    # The vertex and normal blocks are stored as contiguous arrays of fixed size records,
+    # so they can be read and written in bulk. The coordinates are stored in the
+    # left handed, Y-up coordinate system of the engine (X, Z, Y order in Blender terms).
+    dtype_vert = np.dtype([("x", "<f4"), ("z", "<f4"), ("y", "<f4"), ("flag", "<u4")])
+    dtype_normal = np.dtype([("x", "<f4"), ("z", "<f4"), ("y", "<f4")])
+
+    # The faces are stored as a fixed size block of 72 bytes (side count, 4 sides, flags),
+    # followed by the texture and material paths as ASCIIZ strings. Triangles have the
+    # 4th side zeroed out.
+    dtype_face_side = np.dtype([("vert", "<u4"), ("normal", "<u4"), ("u", "<f4"), ("v", "<f4")])
+    dtype_face = np.dtype([("sides", "<u4"), ("data", dtype_face_side, (4,)), ("flag", "<u4")])
+
+    struct_header = struct.Struct('<4s6I')
     
     def __eq__(self, other):
         return type(other) is type(self) and other.resolution == self.resolution
     
     # Reading
 
-    @classmethod
-    def read_vert(cls, file):
-        x, z, y, flag = cls.struct_vert.unpack(file.read(16))
-        return x, y, z, flag
-    
-    def read_verts(self, file, count_verts):
-        self.verts = [self.read_vert(file) for i in range(count_verts)]
+    def read_verts(self, reader, count_verts):
+        data = reader.read_array(self.dtype_vert, count_verts)
+        self.verts = np.column_stack((data["x"], data["y"], data["z"])).astype(np.float32)
+        self.verts_flags = data["flag"].astype(np.uint32)
 
-    @classmethod
-    def read_normal(cls, file):
-        x, z, y = cls.struct_normal.unpack(file.read(12))
-        return -x, -y, -z
-    
-    def read_normals(self, file, count_normals):
-        self.normals = [self.read_normal(file) for i in range(count_normals)]
+    def read_normals(self, reader, count_normals):
+        data = reader.read_array(self.dtype_normal, count_normals)
+        self.normals = -np.column_stack((data["x"], data["y"], data["z"])).astype(np.float32)
     
+    # The face section is decoded in a single pass. Only the string terminators have to be
+    # searched for face by face, everything else is gathered from the buffer in bulk.
+    # The texture-material pairs are interned into a table, and the faces only store
+    # an index into it. The UVs are kept as they are stored in the file (V axis flipped).
     @classmethod
-    def read_face(cls, file):
-        count_sides = binary.read_ulong(file)
-        vertices = []
-        normals = []
-        uvs = []
+    def scan_faces(cls, reader, count_faces):
+        data = reader.data
+        start = pos = reader.tell()
+        
+        offsets = []
+        face_materials = []
+        strings = {}
+        for i in range(count_faces):
+            end_texture = data.find(b"\x00", pos + 72)
+            end_material = data.find(b"\x00", end_texture + 1)
+            if end_texture < 0 or end_material < 0:
+                raise EOFError("ASCIIZ string ran into unexpected EOF")
+
+            offsets.append(pos - start)
+            # The bytes of the two strings together (with the separating terminator)
+            # uniquely identify the texture-material pair.
+            key = bytes(data[pos + 72:end_material])
+            idx = strings.get(key)
+            if idx is None:
+                idx = len(strings)
+                strings[key] = idx
+            
+            face_materials.append(idx)
+            pos = end_material + 1
+        
+        reader.seek(pos)
+        materials = [tuple(value.decode('utf8', errors="replace") for value in key.split(b"\x00")) for key in strings]
 
-        for i in range(count_sides):
-            vert, norm, u, v = cls.struct_face.unpack(file.read(16))
-            vertices.append(vert)
-            normals.append(norm)
-            uvs.append((u, 1 - v))
+        return offsets, face_materials, materials
 
-        if count_sides < 4:
-            file.seek(16, 1)
-        
-        flag = binary.read_ulong(file)
-        texture = binary.read_asciiz(file)
-        material = binary.read_asciiz(file)
+    def read_faces(self, reader, count_faces):
+        start = reader.tell()
+        offsets, face_materials, self.materials = self.scan_faces(reader, count_faces)
+
+        buffer = np.frombuffer(reader.data, dtype=np.uint8, count=reader.tell() - start, offset=start)
+        faces = byte_windows(buffer, 72)[np.array(offsets, dtype=np.int64)].view(self.dtype_face).reshape(-1)
+        del buffer
+
+        sides = faces["sides"]
+        if np.any(sides > 4):
+            raise P3D_Error("Invalid face side count")
 
-        return [vertices, normals, uvs, texture, material, flag]
+        mask = np.arange(4) < sides[:, np.newaxis]
+        loops = faces["data"][mask]
 
-    def read_faces(self, file, count_faces):
-        self.faces = [self.read_face(file) for i in range(count_faces)]
+        self.face_sides = sides.astype(np.uint32)
+        self.face_verts = loops["vert"].astype(np.uint32)
+        self.face_normals = loops["normal"].astype(np.uint32)
+        self.face_uvs = np.column_stack((loops["u"], loops["v"])).astype(np.float32)
+        self.face_flags = faces["flag"].astype(np.uint32)
+        self.face_materials = np.array(face_materials, dtype=np.uint32)
+    
+    # The face records have variable length due to the ASCIIZ texture and material paths,
+    # so they cannot be skipped by simple offset arithmetic, but the terminators can be
+    # found without decoding the strings.
+    @classmethod
+    def skip_faces(cls, reader, count_faces):
+        for i in range(count_faces):
+            reader.skip(72) # side count + 4 sides + flags
+            reader.skip_asciiz()
+            reader.skip_asciiz()
 
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
 
-        signature = file.read(4)
+        signature = reader.read(4)
         if signature != b"P3DM":
             raise P3D_Error("Unsupported LOD type: %s" % str(signature))
         
-        version = binary.read_ulongs(file, 2)
+        version = reader.read_ulongs(2)
         if version != (0x1c, 0x100):
             raise P3D_Error("Unsupported LOD version: %d.%d" % (version[0], version[1]))
 
         output = cls()
         output.version = version
         
-        count_verts, count_normals, count_faces, flags = binary.read_ulongs(file, 4)
+        count_verts, count_normals, count_faces, flags = reader.read_ulongs(4)
         output.flags = flags
 
-        output.read_verts(file, count_verts)
-        output.read_normals(file, count_normals)
+        output.read_verts(reader, count_verts)
+        output.read_normals(reader, count_normals)
         output.renormalize_normals()
-        output.read_faces(file, count_faces)
+        output.read_faces(reader, count_faces)
 
-        tagg_signature = binary.read_char(file, 4)
+        tagg_signature = reader.read_char(4)
         if tagg_signature != "TAGG":
             raise P3D_Error("Invalid TAGG section signature: %s" % tagg_signature)
         
         while True:
-            tagg = P3D_TAGG.read(file, count_verts, count_faces)
+            tagg = P3D_TAGG.read(reader, count_verts, count_faces)
             if tagg.name == "#EndOfFile#":
                 break
             
             if tagg.active:
                 output.taggs.append(tagg)
         
-        output.resolution.set_from_float(binary.read_float(file))
+        output.resolution.set_from_float(reader.read_float())
         
         return output
     
     # Writing
     
-    def write_vert(self, file, vert):
-        file.write(self.struct_vert.pack(vert[0], vert[2], vert[1], vert[3]))
+    def write_verts(self, buffer, offset):
+        data = np.frombuffer(buffer, dtype=self.dtype_vert, count=len(self.verts), offset=offset)
+        data["x"] = self.verts[:, 0]
+        data["y"] = self.verts[:, 1]
+        data["z"] = self.verts[:, 2]
+        data["flag"] = self.verts_flags
+
+        return offset + data.nbytes
     
-    def write_verts(self, file):
-        for vert in self.verts:
-            self.write_vert(file, vert)
+    def write_normals(self, buffer, offset):
+        data = np.frombuffer(buffer, dtype=self.dtype_normal, count=len(self.normals), offset=offset)
+        data["x"] = -self.normals[:, 0]
+        data["y"] = -self.normals[:, 1]
+        data["z"] = -self.normals[:, 2]
+
+        return offset + data.nbytes
     
-    def write_normal(self, file, normal):
-        file.write(self.struct_normal.pack(-normal[0], -normal[2], -normal[1]))
+    # Reverse of the bulk face decoding: the fixed size blocks are assembled in a single array,
+    # and the strings are only encoded once per unique texture-material pair.
+    def get_face_blocks(self):
+        faces = np.zeros(len(self.face_sides), dtype=self.dtype_face)
+        faces["sides"] = self.face_sides
+        faces["flag"] = self.face_flags
+
+        mask = np.arange(4) < self.face_sides[:, np.newaxis]
+        loops = np.zeros(len(self.face_verts), dtype=self.dtype_face_side)
+        loops["vert"] = self.face_verts
+        loops["normal"] = self.face_normals
+        loops["u"] = self.face_uvs[:, 0]
+        loops["v"] = self.face_uvs[:, 1]
+        faces["data"][mask] = loops
+
+        return faces
     
-    def write_normals(self, file):
-        for vector in self.normals:
-            self.write_normal(file, vector)
+    # An empty material table is treated as a single untextured pair, so the faces always
+    # have a string to reference.
+    def get_face_strings(self):
+        return [texture.encode('ascii') + b"\x00" + material.encode('ascii') + b"\x00" for texture, material in self.materials or [("", "")]]
     
-    def write_face(self, file, face):
-        count_sides = len(face[0])
-        binary.write_ulong(file, count_sides)
+    def get_face_lengths(self, strings):
+        if len(self.face_materials) != len(self.face_sides):
+            raise P3D_Error("Invalid face material count: %d (faces: %d)" % (len(self.face_materials), len(self.face_sides)))
 
-        for i in range(count_sides):
-            file.write(self.struct_face.pack(face[0][i], face[1][i], face[2][i][0], face[2][i][1]))
+        lengths = np.array([len(value) for value in strings], dtype=np.int64)
         
-        if count_sides < 4:
-            file.write(bytearray(16))
+        return lengths[self.face_materials] + 72
+
+    # The face blocks and strings are scattered to their final positions in the buffer.
+    # The strings are placed with one operation per unique texture-material pair.
+    def write_faces(self, buffer, offset, strings, face_lengths):
+        size = int(face_lengths.sum())
+        if size == 0:
+            return offset
         
-        binary.write_ulong(file, face[5])
-        binary.write_asciiz(file, face[3])
-        binary.write_asciiz(file, face[4])
-    
-    def write_faces(self, file):
-        for face in self.faces:
-            self.write_face(file, face)
+        data = np.frombuffer(buffer, dtype=np.uint8, count=size, offset=offset)
+        starts = np.zeros(len(face_lengths), dtype=np.int64)
+        np.cumsum(face_lengths[:-1], out=starts[1:])
 
+        byte_windows(data, 72, True)[starts] = self.get_face_blocks().view(np.uint8).reshape((-1, 72))
 
-    def write(self, file):
-        file.write(self.signature)
-        binary.write_ulong(file, *self.version)
-        
-        count_verts = len(self.verts)
-        count_normals = len(self.normals)
-        count_faces = len(self.faces)
-        
-        binary.write_ulong(file, count_verts, count_normals, count_faces, self.flags)
+        order = np.argsort(self.face_materials, kind="stable")
+        bounds = np.searchsorted(self.face_materials[order], np.arange(len(strings) + 1))
+        for i, value in enumerate(strings):
+            positions = starts[order[bounds[i]:bounds[i + 1]]] + 72
+            if len(positions) > 0:
+                byte_windows(data, len(value), True)[positions] = np.frombuffer(value, dtype=np.uint8)
 
-        self.write_verts(file)
-        self.write_normals(file)
-        self.write_faces(file)
-        
+        return offset + size
+    
+    def write_taggs(self, file):
         binary.write_chars(file, "TAGG")
         
         for tagg in self.taggs:
@@ -563,6 +727,35 @@ class P3D_LOD():
         eof.write(file)
             
         binary.write_float(file, float(self.resolution))
+
+    # The entire LOD is serialized into a single, presized buffer. The vertex, normal and
+    # face data is packed in bulk directly into the buffer, and only the comparatively
+    # small TAGG section is written through a stream.
+    def serialize(self):
+        count_verts = len(self.verts)
+        count_normals = len(self.normals)
+        count_faces = len(self.face_sides)
+
+        strings = self.get_face_strings()
+        face_lengths = self.get_face_lengths(strings)
+        
+        taggs = BytesIO()
+        self.write_taggs(taggs)
+        taggs = taggs.getbuffer()
+
+        size = 28 + count_verts * 16 + count_normals * 12 + int(face_lengths.sum()) + len(taggs)
+        output = bytearray(size)
+        self.struct_header.pack_into(output, 0, self.signature, *self.version, count_verts, count_normals, count_faces, self.flags)
+
+        offset = self.write_verts(output, 28)
+        offset = self.write_normals(output, offset)
+        offset = self.write_faces(output, offset, strings, face_lengths)
+        output[offset:] = taggs
+
+        return output
+
+    def write(self, file):
+        file.write(self.serialize())
     
     # Operations
 
@@ -570,24 +763,26 @@ class P3D_LOD():
     # which potentially result in a not normalized vector, which causes issues
     # in Blender, so the vectors need to be renormalized before usage.
     def renormalize_normals(self):
-        renormalized = []
-        for normal in self.normals:
-            length = math.sqrt(normal[0]**2 + normal[1]**2 + normal[2]**2)
-            
-            if length == 0:
-                renormalized.append(normal)
-                continue
-                
-            coef = 1 / length
-            renormalized.append((normal[0] * coef, normal[1] * coef, normal[2] * coef))
+        normals = self.normals.astype(np.float64)
+        lengths = np.sqrt(np.sum(normals ** 2, axis=1))
+        nonzero = lengths != 0
+        normals[nonzero] *= (1 / lengths[nonzero])[:, np.newaxis]
         
-        self.normals = renormalized
+        self.normals = normals.astype(np.float32)
     
+    # The vertex coordinates are passed as the (N, 3) array itself, without creating
+    # intermediate tuples for every single vertex.
     def pydata(self):
-        verts = [vert[0:3] for vert in self.verts]
-        faces = [face[0] for face in self.faces]
+        faces = np.split(self.face_verts, self.face_starts()[1:])
 
-        return verts, [], faces
+        return self.verts, [], faces
+    
+    # Index of the first loop of each face in the flat loop arrays.
+    def face_starts(self):
+        starts = np.zeros(len(self.face_sides), dtype=np.int64)
+        np.cumsum(self.face_sides[:-1], out=starts[1:])
+
+        return starts
     
     def clean_taggs(self):
         self.taggs = [tagg for tagg in self.taggs if tagg.active]
@@ -596,57 +791,36 @@ class P3D_LOD():
     # from the parent MLOD object, so the dictionary is edited in place, not 
     # returned.
     def get_materials(self, materials = {}):
-        for face in self.faces:
-            texture = face[3]
-            material = face[4]
+        for pair in self.materials:
+            if pair not in materials:
+                materials[pair] = len(materials)
+    
+    # Map the per-face string table indices to the indices in the material lookup dictionary.
+    def face_material_indices(self, materials):
+        lookup = np.array([materials[pair] for pair in self.materials], dtype=np.int64)
 
-            if (texture, material) not in materials:
-                materials[(texture, material)] = len(materials)
+        return lookup[self.face_materials] if len(lookup) > 0 else np.empty(0, dtype=np.int64)
     
     # Generate the necessary material index for each face, as well
     # as the indices of the used materials in each material slot.
+    # A new slot is started at every point where the material changes.
     def get_sections(self, materials):
-        slot_indices = []
-        slot_material_indices = []
-
-        last_idx = None
-        face_idx = 0
-
-        for face in self.faces:
-            texture = face[3]
-            material = face[4]
-            
-            idx = materials[(texture, material)]
-            if last_idx is None:
-                last_idx = idx
-                slot_material_indices.append(idx)
-
-            if idx != last_idx:
-                slot_material_indices.append(idx)
-                face_idx += 1
-                last_idx = idx
+        indices = self.face_material_indices(materials)
+        if len(indices) == 0:
+            return indices, []
+        
+        changes = np.empty(len(indices), dtype=bool)
+        changes[0] = True
+        np.not_equal(indices[1:], indices[:-1], out=changes[1:])
 
-            slot_indices.append(face_idx)
+        slot_indices = np.cumsum(changes) - 1
 
-        return slot_indices, slot_material_indices
+        return slot_indices, indices[changes].tolist()
     
     def get_sections_merged(self, materials):
-        slot_indices = []
-        material_slot_indices = {}
-
-        for face in self.faces:
-            texture = face[3]
-            material = face[4]
-
-            material_idx = materials[(texture, material)]
-            slot_idx = material_slot_indices.get(material_idx)
-            if slot_idx is None:
-                slot_idx = len(material_slot_indices)
-                material_slot_indices[material_idx] = slot_idx
-            
-            slot_indices.append(slot_idx)
+        material_indices, slot_indices = unique_ordered(self.face_material_indices(materials))
 
-        return slot_indices, list(material_slot_indices.keys())
+        return slot_indices, material_indices
 
     def renumber_components(self):
         counter = 1
@@ -696,11 +870,101 @@ class P3D_LOD():
 
             tagg.name = "proxy:%s.%03d" % (data[0], data[1])
     
+    # Delete the masked faces from the LOD, together with the vertices that are not
+    # used by any of the remaining faces anymore. The per face and per loop data,
+    # as well as the vertex indices in the TAGGs are updated accordingly.
+    def remove_faces(self, mask):
+        mask = np.asarray(mask, dtype=bool)
+        if not np.any(mask):
+            return
+        
+        mask_loops = np.repeat(mask, self.face_sides)
+        keep_faces = ~mask
+        keep_loops = ~mask_loops
+
+        used = np.zeros(len(self.verts), dtype=bool)
+        used[self.face_verts[keep_loops]] = True
+        removed = np.zeros(len(self.verts), dtype=bool)
+        removed[self.face_verts[mask_loops]] = True
+        keep_verts = used | ~removed
+
+        remap = np.cumsum(keep_verts, dtype=np.int64) - 1
+
+        self.verts = self.verts[keep_verts]
+        self.verts_flags = self.verts_flags[keep_verts]
+        self.face_verts = remap[self.face_verts[keep_loops]].astype(np.uint32)
+        self.face_normals = self.face_normals[keep_loops]
+        self.face_uvs = self.face_uvs[keep_loops]
+        self.face_sides = self.face_sides[keep_faces]
+        self.face_flags = self.face_flags[keep_faces]
+        self.face_materials = self.face_materials[keep_faces]
+
+        for tagg in self.taggs:
+            if tagg.name == "#SharpEdges#":
+                edges = np.array(tagg.data.edges, dtype=np.int64).reshape((-1, 2))
+                edges = edges[np.all(keep_verts[edges], axis=1)]
+                tagg.data.edges = [tuple(edge) for edge in remap[edges].tolist()]
+            elif tagg.name == "#Mass#":
+                tagg.data.masses = tuple(np.asarray(tagg.data.masses)[keep_verts].tolist())
+            elif tagg.name == "#UVSet#":
+                tagg.data.uvs = [tuple(uv) for uv in np.asarray(tagg.data.uvs).reshape((-1, 2))[keep_loops].tolist()]
+            elif type(tagg.data) is P3D_TAGG_DataSelection:
+                tagg.data.data_verts = tagg.data.data_verts[keep_verts]
+                tagg.data.data_faces = tagg.data.data_faces[keep_faces]
+    
+    # Separate the proxy triangles from the LOD. Every proxy is returned as a tuple of the
+    # path, index, vertex coordinates, faces (indices into the proxy vertices) and the weights
+    # of the other named selections the proxy vertices are part of. A face belongs to a proxy,
+    # if all of its vertices are in the proxy selection, the same way as when the selected
+    # vertices are separated in Blender. The proxy faces and selections are removed from the LOD.
+    def extract_proxies(self):
+        regex_proxy = r"proxy:(.*)\.(\d+)"
+
+        proxies = []
+        extracted = []
+        mask = np.zeros(len(self.face_sides), dtype=bool)
+        if len(self.face_sides) == 0:
+            return proxies
+        
+        starts = self.face_starts()
+        selections = [tagg for tagg in self.taggs if tagg.is_selection() and not tagg.is_proxy()]
+        
+        for tagg in self.taggs:
+            if not tagg.is_proxy():
+                continue
+
+            selected = tagg.data.data_verts[self.face_verts] != 0
+            faces = np.flatnonzero(np.logical_and.reduceat(selected, starts) & ~mask)
+            if len(faces) == 0:
+                continue
+            
+            mask[faces] = True
+            extracted.append(tagg)
+            loops = np.concatenate([np.arange(starts[i], starts[i] + self.face_sides[i]) for i in faces])
+            verts, face_verts = unique_ordered(self.face_verts[loops])
+            proxy_faces = np.split(face_verts, np.cumsum(self.face_sides[faces])[:-1])
+
+            proxy_selections = []
+            for item in selections:
+                weights = item.data.WEIGHTS[item.data.data_verts[verts]]
+                if np.any(weights):
+                    proxy_selections.append((item.name, weights))
+            
+            path, index = re.match(regex_proxy, tagg.name).groups()
+            proxies.append((path, int(index), self.verts[verts], [face.tolist() for face in proxy_faces], proxy_selections))
+        
+        self.taggs = [tagg for tagg in self.taggs if tagg not in extracted]
+        self.remove_faces(mask)
+
+        return proxies
+    
     # Extract the UVSet 0 embedded into the face data, and return a dictionary
     # of all UVSets, unique by ID. If UVSet 0 is also found as a TAGG, the TAGG
     # data takes precedence over the embedded values.
     def uvsets(self):
-        sets = {0: [uv for face in self.faces for uv in face[2]]}
+        uvs = self.face_uvs.astype(np.float64)
+        uvs[:, 1] = 1 - uvs[:, 1]
+        sets = {0: uvs}
         for tagg in self.taggs:
             if tagg.name != "#UVSet#":
                 continue
@@ -712,47 +976,52 @@ class P3D_LOD():
     # Generate loop normals list that can be directly used by the Blender API
     # mesh.normals_split_custom_set() function
     def loop_normals(self):
-        return [self.normals[item] for face in self.faces for item in face[1]]
+        return self.normals[self.face_normals]
     
     # Collect and group the used vertex flag values for setting up
     # the flag data layer and flag groups object data.
     def flag_groups_vertex(self):
-        groups = {}
-        values = []
-
-        for vert in self.verts:
-            flag = vert[3]
-            group = groups.get(flag)
-            if group is None:
-                group = len(groups)
-                groups[flag] = group
-            
-            values.append(group)
-        
-        return list(groups.keys()), values
+        return unique_ordered(self.verts_flags)
     
     # Collect and group the used face flag values for setting up
     # the flag data layer and flag groups object data.
     def flag_groups_face(self):
-        groups = {}
-        values = []
-
-        for face in self.faces:
-            flag = face[5]
-            group = groups.get(flag)
-            if group is None:
-                group = len(groups)
-                groups[flag] = group
-            
-            values.append(group)
+        return unique_ordered(self.face_flags)
+    
+    # Digest of the complete LOD content except the resolution, to recognize LODs
+    # that store identical geometry and data (eg.: matching view and fire geometries).
+    def get_hash(self):
+        digest = hashlib.sha1()
+        digest.update(b"%d,%d,%d,%d" % (len(self.verts), len(self.normals), len(self.face_sides), len(self.face_verts)))
+
+        arrays = (
+            (self.verts, np.float32),
+            (self.verts_flags, np.uint32),
+            (self.normals, np.float32),
+            (self.face_sides, np.uint32),
+            (self.face_verts, np.uint32),
+            (self.face_normals, np.uint32),
+            (self.face_uvs, np.float32),
+            (self.face_flags, np.uint32),
+            (self.face_materials, np.uint32)
+        )
+        for array, dtype in arrays:
+            digest.update(np.ascontiguousarray(array, dtype=dtype).tobytes())
+        
+        for texture, material in self.materials:
+            digest.update(b"%s\x00%s\x00" % (texture.encode('utf8'), material.encode('utf8')))
+        
+        buffer = BytesIO()
+        for tagg in self.taggs:
+            tagg.write(buffer)
+        
+        digest.update(buffer.getvalue())
 
-        return list(groups.keys()), values
+        return digest.hexdigest()
     
     # Change every file path, and selection name to lower case for a uniform output.
     def force_lowercase(self):
-        for face in self.faces:
-            face[3] = face[3].lower()
-            face[4] = face[4].lower()
+        self.materials = [(texture.lower(), material.lower()) for texture, material in self.materials]
         
         for tagg in self.taggs:
             if tagg.is_selection():
@@ -762,6 +1031,210 @@ class P3D_LOD():
                 tagg.data.value = tagg.data.value.lower()
 
 
+# Index record of a LOD in an MLOD file. It holds the location of the LOD data in the file,
+# and the basic header information, so the LOD can be identified without decoding it.
+class P3D_LOD_Index():
+    def __init__(self):
+        self.offset = 0
+        self.length = 0
+        self.flags = 0
+        self.count_verts = 0
+        self.count_normals = 0
+        self.count_faces = 0
+        self.resolution = P3D_LOD_Resolution()
+    
+    def __repr__(self):
+        return "LOD %d, %d @ %d" % (*self.resolution.get(), self.offset)
+    
+    # Walk through the LOD structure, skipping the payloads as much as possible.
+    # The file position is left at the start of the next LOD.
+    @classmethod
+    def scan(cls, reader):
+        output = cls()
+        output.offset = reader.tell()
+
+        signature = reader.read(4)
+        if signature != b"P3DM":
+            raise P3D_Error("Unsupported LOD type: %s" % str(signature))
+        
+        version = reader.read_ulongs(2)
+        if version != (0x1c, 0x100):
+            raise P3D_Error("Unsupported LOD version: %d.%d" % (version[0], version[1]))
+        
+        output.count_verts, output.count_normals, output.count_faces, output.flags = reader.read_ulongs(4)
+
+        reader.skip(output.count_verts * 16 + output.count_normals * 12)
+        P3D_LOD.skip_faces(reader, output.count_faces)
+
+        tagg_signature = reader.read_char(4)
+        if tagg_signature != "TAGG":
+            raise P3D_Error("Invalid TAGG section signature: %s" % tagg_signature)
+        
+        while P3D_TAGG.skip(reader) != "#EndOfFile#":
+            pass
+        
+        output.resolution.set_from_float(reader.read_float())
+        output.length = reader.tell() - output.offset
+
+        return output
+
+
+# Summary of the metadata of a LOD, collected without decoding the geometry.
+class P3D_LOD_Summary():
+    def __init__(self):
+        self.flags = 0
+        self.count_verts = 0
+        self.count_normals = 0
+        self.count_faces = 0
+        self.resolution = P3D_LOD_Resolution()
+        self.materials = []
+        self.selections = []
+        self.properties = []
+        self.proxies = []
+    
+    def __repr__(self):
+        return "LOD %d, %d" % self.resolution.get()
+    
+    # Only the texture and material paths, and the TAGG names are read from the LOD.
+    # The vertex, normal and face payloads, and the TAGG data (except for named properties)
+    # are skipped.
+    @classmethod
+    def scan(cls, reader):
+        output = cls()
+
+        signature = reader.read(4)
+        if signature != b"P3DM":
+            raise P3D_Error("Unsupported LOD type: %s" % str(signature))
+        
+        version = reader.read_ulongs(2)
+        if version != (0x1c, 0x100):
+            raise P3D_Error("Unsupported LOD version: %d.%d" % (version[0], version[1]))
+        
+        output.count_verts, output.count_normals, output.count_faces, output.flags = reader.read_ulongs(4)
+
+        reader.skip(output.count_verts * 16 + output.count_normals * 12)
+        _, _, output.materials = P3D_LOD.scan_faces(reader, output.count_faces)
+
+        tagg_signature = reader.read_char(4)
+        if tagg_signature != "TAGG":
+            raise P3D_Error("Invalid TAGG section signature: %s" % tagg_signature)
+        
+        regex_proxy = r"proxy:(.*)\.(\d+)"
+        while True:
+            active = reader.read_bool()
+            name = reader.read_asciiz()
+            length = reader.read_ulong()
+            if name == "#EndOfFile#":
+                break
+
+            if active and name == "#Property#" and length == 128:
+                output.properties.append((reader.read_asciiz_field(64), reader.read_asciiz_field(64)))
+                continue
+            
+            reader.skip(length)
+            if not active or (name.startswith("#") and name.endswith("#")):
+                continue
+            
+            output.selections.append(name)
+            proxy = re.match(regex_proxy, name)
+            if proxy:
+                output.proxies.append((proxy.group(1), int(proxy.group(2))))
+        
+        output.resolution.set_from_float(reader.read_float())
+
+        return output
+
+
+# Lightweight summary of a P3D file for inventory purposes. The module does not depend
+# on bpy, so the scan can be run from plain Python as well (see io/standalone.py).
+class P3D_MLOD_Summary():
+    def __init__(self):
+        self.source = ""
+        self.version = 257
+        self.size = 0
+        self.lods = []
+    
+    @classmethod
+    def scan(cls, file):
+        reader = binary.BinaryReader.wrap(file)
+
+        signature = reader.read(4)
+        if signature != b"MLOD":
+            raise P3D_Error("Invalid MLOD signature: %s" % str(signature))
+        
+        version = reader.read_ulong()
+        if version != 257:
+            raise P3D_Error("Unsupported MLOD version: %d" % version)
+
+        output = cls()
+        output.version = version
+        output.size = reader.size
+        
+        count_lods = reader.read_ulong()
+        output.lods = [P3D_LOD_Summary.scan(reader) for i in range(count_lods)]
+
+        return output
+    
+    @classmethod
+    def scan_file(cls, filepath):
+        output = None
+        with open(filepath, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                output = cls.scan(binary.BinaryReader(buffer))
+            finally:
+                buffer.close()
+        
+        output.source = filepath
+
+        return output
+    
+    # Unique texture and material paths used in the file.
+    def get_paths(self):
+        textures = set()
+        materials = set()
+        for lod in self.lods:
+            for texture, material in lod.materials:
+                textures.add(texture)
+                materials.add(material)
+        
+        textures.discard("")
+        materials.discard("")
+
+        return sorted(textures), sorted(materials)
+    
+    def get_proxies(self):
+        return sorted({path for lod in self.lods for path, index in lod.proxies})
+    
+    def as_dict(self):
+        textures, materials = self.get_paths()
+        output = {
+            "source": self.source,
+            "size": self.size,
+            "textures": textures,
+            "materials": materials,
+            "proxies": self.get_proxies(),
+            "lods": []
+        }
+
+        for lod in self.lods:
+            output["lods"].append({
+                "lod": lod.resolution.lod,
+                "resolution": lod.resolution.res,
+                "signature": lod.resolution.source,
+                "flags": lod.flags,
+                "vertices": lod.count_verts,
+                "normals": lod.count_normals,
+                "faces": lod.count_faces,
+                "materials": [list(pair) for pair in lod.materials],
+                "selections": lod.selections,
+                "properties": [list(prop) for prop in lod.properties],
+                "proxies": [list(proxy) for proxy in lod.proxies]
+            })
+        
+        return output
+
+
 class P3D_MLOD():
     def __init__(self):
         self.source = ""
@@ -772,23 +1245,24 @@ class P3D_MLOD():
     
     @classmethod
     def read(cls, file, first_lod_only = False):
+        reader = binary.BinaryReader.wrap(file)
         
-        signature = file.read(4)
+        signature = reader.read(4)
         if signature != b"MLOD":
             raise P3D_Error("Invalid MLOD signature: %s" % str(signature))
 
-        version = binary.read_ulong(file)
+        version = reader.read_ulong()
         if version != 257:
             raise P3D_Error("Unsupported MLOD version: %d" % version)
 
         output = cls()
         output.version = version
 
-        count_lods = binary.read_ulong(file)
+        count_lods = reader.read_ulong()
         if first_lod_only:
             count_lods = 1
         
-        output.lods = [P3D_LOD.read(file) for i in range(count_lods)]
+        output.lods = [P3D_LOD.read(reader) for i in range(count_lods)]
         
         return output
     
@@ -812,6 +1286,17 @@ class P3D_MLOD():
         for lod in self.lods:
             lod.write(file)
     
+    # Write the file from LODs that were already serialized separately (eg.: in worker processes).
+    def write_serialized(self, file, lods):
+        if len(lods) == 0:
+            raise P3D_Error("Cannot write file with no LODs")
+        
+        file.write(self.signature)
+        binary.write_ulong(file, self.version)
+        binary.write_ulong(file, len(lods))
+        for data in lods:
+            file.write(data)
+    
     def write_file(self, filepath):
         with open(filepath, "wb") as file:
             self.write(file)
@@ -849,3 +1334,146 @@ class P3D_MLOD():
                 signatures.add(sign)
 
         return duplicates
+
+
+# Lazy variant of the MLOD reader. The file is memory mapped, and the LODs are only
+# indexed as far as necessary. The actual LOD data is only decoded when it is
+# requested, so operations that need a few LODs (eg.: the Memory LOD for the pivot
+# points) only have to read the bytes they need. The reader has to be closed after use,
+# preferably by using it as a context manager.
+class P3D_MLOD_Lazy(P3D_MLOD):
+    def __init__(self):
+        self.source = ""
+        self.version = 257
+        self.signature = b"MLOD"
+        self.lod_types = None # LOD types to include in the lods list (None -> all)
+
+        self.count_lods = 0
+        self.index = []
+        self.buffer = None
+        self.reader = None
+        self.decoded = {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    # The LODs are decoded on access, and kept for subsequent requests.
+    @property
+    def lods(self):
+        return [self.get_lod(i) for i in range(self.count_lods) if self.lod_types is None or self.get_index(i).resolution.lod in self.lod_types]
+    
+    @classmethod
+    def read(cls, file, first_lod_only = False, lod_types = None):
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = binary.BinaryReader(buffer)
+
+        signature = reader.read(4)
+        if signature != b"MLOD":
+            buffer.close()
+            raise P3D_Error("Invalid MLOD signature: %s" % str(signature))
+        
+        version = reader.read_ulong()
+        if version != 257:
+            buffer.close()
+            raise P3D_Error("Unsupported MLOD version: %d" % version)
+        
+        output = cls()
+        output.version = version
+        output.buffer = buffer
+        output.reader = reader
+        output.lod_types = lod_types
+        output.count_lods = reader.read_ulong()
+        if first_lod_only:
+            output.count_lods = min(1, output.count_lods)
+
+        return output
+    
+    @classmethod
+    def read_file(cls, filepath, first_lod_only = False, lod_types = None):
+        output = None
+        with open(filepath, "br") as file:
+            output = cls.read(file, first_lod_only, lod_types)
+        
+        output.source = filepath
+
+        return output
+    
+    def close(self):
+        if self.buffer is not None:
+            self.reader = None
+            self.buffer.close()
+            self.buffer = None
+    
+    # Decode all included LODs, and release the file. The decoded LODs remain accessible.
+    def load(self):
+        lods = self.lods
+        self.close()
+
+        return lods
+
+    # Index the LODs sequentially until the requested one is reached.
+    def get_index(self, index):
+        if not 0 <= index < self.count_lods:
+            raise IndexError("LOD index out of range: %d" % index)
+        
+        while len(self.index) <= index:
+            offset = 12
+            if len(self.index) > 0:
+                last = self.index[-1]
+                offset = last.offset + last.length
+
+            self.reader.seek(offset)
+            self.index.append(P3D_LOD_Index.scan(self.reader))
+        
+        return self.index[index]
+    
+    def get_lod(self, index):
+        lod = self.decoded.get(index)
+        if lod is None:
+            self.reader.seek(self.get_index(index).offset)
+            lod = P3D_LOD.read(self.reader)
+            self.decoded[index] = lod
+        
+        return lod
+    
+    def find_lod(self, index = 0, resolution = 0):
+        for i in range(self.count_lods):
+            if self.get_index(i).resolution.get() == (index, resolution):
+                return self.get_lod(i)
+        
+        return None
+    
+    def get_duplicate_lods(self):
+        signatures = set()
+        duplicates = []
+
+        for i in range(self.count_lods):
+            sign = float(self.get_index(i).resolution)
+            if sign in signatures:
+                duplicates.append(i)
+            else:
+                signatures.add(sign)
+
+        return duplicates
+
+
+# Read a P3D file with the reader matching the given options. The function is intended
+# to be used as a task in worker processes (eg.: parallel batch import), so only picklable
+# data is passed in and out. The time spent with parsing is returned with the data.
+def read_file_task(filepath, first_lod_only = False, lod_types = None):
+    time_start = time.time()
+
+    if first_lod_only or lod_types is not None:
+        with P3D_MLOD_Lazy.read_file(filepath, first_lod_only, lod_types) as lazy:
+            mlod = P3D_MLOD()
+            mlod.version = lazy.version
+            mlod.lods = lazy.load()
+    else:
+        mlod = P3D_MLOD.read_file(filepath)
+    
+    mlod.source = filepath
+
+    return mlod, time.time() - time_start
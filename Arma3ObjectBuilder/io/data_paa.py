@@ -6,7 +6,6 @@
 
 import struct
 from enum import IntEnum
-from io import BytesIO, BufferedReader
 from copy import deepcopy
 
 from . import binary_handler as binary
@@ -37,12 +36,12 @@ class PAA_TAGG():
         self.data = None
     
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
 
-        output.name = file.read(4).decode("utf8")[::-1]
-        length = binary.read_ulong(file)
-        output.data = file.read(length)
+        output.name = reader.read(4).decode("utf8")[::-1]
+        length = reader.read_ulong()
+        output.data = reader.read(length)
 
         return output
 
@@ -56,10 +55,10 @@ class PAA_MIPMAP():
         self.lzo_compressed = False
     
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
 
-        output.width, output.height = binary.read_ushorts(file, 2)
+        output.width, output.height = reader.read_ushorts(2)
         if output.width == output.height == 0:
             return output
         
@@ -67,8 +66,8 @@ class PAA_MIPMAP():
             output.lzo_compressed = True
             output.width ^= 0x8000
 
-        length = struct.unpack('<I', file.read(3) + b"\x00")[0]
-        output.data_raw = bytearray(file.read(length))
+        length = struct.unpack('<I', reader.read(3) + b"\x00")[0]
+        output.data_raw = bytearray(reader.read(length))
 
         return output
     
@@ -84,13 +83,9 @@ class PAA_MIPMAP():
         
         data = self.data_raw
         if self.lzo_compressed:
-            stream_lzo = BytesIO(self.data_raw)
-            reader_lzo = BufferedReader(stream_lzo)
-            _, data = lzo1x_decompress(reader_lzo, lzo_expected)
+            _, data = lzo1x_decompress(binary.BinaryReader(self.data_raw), lzo_expected)
 
-        stream_dxt = BytesIO(data)
-        reader_dxt = BufferedReader(stream_dxt)
-        self.data = decompressor(reader_dxt, self.width, self.height)
+        self.data = decompressor(binary.BinaryReader(data), self.width, self.height)
 
     def swizzle(self, code):
         if self.data is None or len(self.data) != 4:
@@ -126,9 +121,10 @@ class PAA_File():
 
     @classmethod
     def read(cls, file):
+        reader = binary.BinaryReader.wrap(file)
         output = cls()
 
-        data_type = binary.read_ushort(file)
+        data_type = reader.read_ushort()
         try:
             output.type = PAA_Type(data_type)
             if output.type == PAA_Type.UNKNOWN:
@@ -137,23 +133,23 @@ class PAA_File():
             raise PAA_Error("Unknown format type: %d" % data_type)
 
         while True:
-            if file.read(4) != b"GGAT":
-                file.seek(-4, 1)
+            if reader.peek(4) != b"GGAT":
                 break
             
-            output.taggs.append(PAA_TAGG.read(file))
+            reader.skip(4)
+            output.taggs.append(PAA_TAGG.read(reader))
 
-        if binary.read_ushort(file) != 0:
+        if reader.read_ushort() != 0:
             raise PAA_Error("Indexed palettes are not supported")
         
         while True:
-            mip = PAA_MIPMAP.read(file)
+            mip = PAA_MIPMAP.read(reader)
             if mip.width == mip.height == 0:
                 break
 
             output.mips.append(mip)
         
-        eof = binary.read_ushort(file)
+        eof = reader.read_ushort()
         if eof != 0:
             raise PAA_Error("Unexpected EOF value: %d" % eof)
         
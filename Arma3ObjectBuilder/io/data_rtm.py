@@ -6,7 +6,6 @@
 
 
 import struct
-from io import BytesIO, BufferedReader
 import numpy as np
 
 from . import binary_handler as binary
@@ -23,12 +22,14 @@ class RTM_Transform():
         self.bone = ""
         self.matrix = [[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 1, 0], [0, 0, 0, 1]]
     
+    struct_matrix = struct.Struct('<12f')
+    
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
         
-        output.bone = binary.read_asciiz_field(file, 32)
-        data = struct.unpack('<12f', file.read(48))
+        output.bone = reader.read_asciiz_field(32)
+        data = reader.unpack(cls.struct_matrix)
 
         output.matrix = [
             [data[0], data[6], data[3], data[9]],
@@ -62,11 +63,11 @@ class RTM_Frame():
         return "Phase: %f" % self.phase
     
     @classmethod
-    def read(cls, file, count_bones):
+    def read(cls, reader, count_bones):
         output = cls()
 
-        output.phase = binary.read_float(file)
-        output.transforms = [RTM_Transform.read(file) for i in range(count_bones)]
+        output.phase = reader.read_float()
+        output.transforms = [RTM_Transform.read(reader) for i in range(count_bones)]
         
         return output
 
@@ -83,20 +84,20 @@ class RTM_MDAT():
         self.items = []
     
     @classmethod
-    def read(cls, file, skip_signature = False):
+    def read(cls, reader, skip_signature = False):
         output = cls()
 
         if not skip_signature:
-            signature = file.read(8)
+            signature = reader.read(8)
             if signature != b"RTM_MDAT":
                 raise RTM_Error("Invalid MDAT signature: %s" % str(signature))
 
-        file.read(4) # padding
-        count_items = binary.read_ulong(file)
+        reader.skip(4) # padding
+        count_items = reader.read_ulong()
         for i in range(count_items):
-            phase = binary.read_float(file)
-            name = binary.read_lascii(file)
-            value = binary.read_lascii(file)
+            phase = reader.read_float()
+            name = reader.read_lascii()
+            value = reader.read_lascii()
 
             output.items.append((phase, name, value))
 
@@ -121,19 +122,19 @@ class RTM_0101():
         self.bones = []
     
     @classmethod
-    def read(cls, file, skip_signature = False):
+    def read(cls, reader, skip_signature = False):
         output = cls()
         if not skip_signature:
-            signature = file.read(8)
+            signature = reader.read(8)
             if signature != b"RTM_0101":
                 raise RTM_Error("Invalid header signature: %s" % signature)
 
-        x, z, y = binary.read_floats(file, 3)
+        x, z, y = reader.read_floats(3)
         output.motion = (x, y, z)
-        count_frames, count_bones = binary.read_ulongs(file, 2)
+        count_frames, count_bones = reader.read_ulongs(2)
         
-        output.bones = [binary.read_asciiz_field(file, 32) for i in range(count_bones)]
-        output.frames = [RTM_Frame.read(file, count_bones) for i in range(count_frames)]
+        output.bones = [reader.read_asciiz_field(32) for i in range(count_bones)]
+        output.frames = [RTM_Frame.read(reader, count_bones) for i in range(count_frames)]
 
         return output
     
@@ -173,14 +174,15 @@ class RTM_File():
     
     @classmethod
     def read(cls, file):
+        reader = binary.BinaryReader.wrap(file)
         output = cls()
 
-        while file.peek():
-            signature = file.read(8)
+        while not reader.eof():
+            signature = reader.read(8)
             if signature == b"RTM_0101":
-                output.anim = RTM_0101.read(file, True)
+                output.anim = RTM_0101.read(reader, True)
             elif signature == b"RTM_MDAT":
-                output.props = RTM_MDAT.read(file, True)
+                output.props = RTM_MDAT.read(reader, True)
             else:
                 raise RTM_Error("Unknown datablock signature: %s" % str(signature))
         
@@ -220,13 +222,13 @@ class BMTR_Prop:
         self.phase = 0
     
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
 
-        file.read(4)
-        output.name = binary.read_asciiz(file)
-        output.phase = binary.read_float(file)
-        output.value = binary.read_asciiz(file)
+        reader.skip(4)
+        output.name = reader.read_asciiz()
+        output.phase = reader.read_float()
+        output.value = reader.read_asciiz()
 
         return output
 
@@ -239,12 +241,14 @@ class BMTR_Transform:
         self.quaternion = (0, 0, 0, 1)
         self.location = (0, 0, 0)
     
+    struct_transform = struct.Struct('<4h3e')
+
     @classmethod
-    def read(cls, file):
+    def read(cls, reader):
         output = cls()
 
-        output.quaternion = tuple([value / 16384 for value in binary.read_shorts(file, 4)])
-        x, z, y = binary.read_halfs(file, 3)
+        *quaternion, x, z, y = reader.unpack(cls.struct_transform)
+        output.quaternion = tuple([value / 16384 for value in quaternion])
         output.location = (-x, -y, z)
 
         return output
@@ -287,9 +291,9 @@ class BMTR_Frame:
         self.transforms = []
 
     @classmethod
-    def read(cls, file, count_bones):
+    def read(cls, reader, count_bones):
         output = cls()
-        output.transforms = [BMTR_Transform.read(file) for i in range(count_bones)]
+        output.transforms = [BMTR_Transform.read(reader) for i in range(count_bones)]
 
         return output
 
@@ -331,92 +335,93 @@ class BMTR_File:
         self.phases = []
         self.frames = []
     
-    def read_frame_phases(self, file, count_frames):
+    def read_frame_phases(self, reader, count_frames):
         expected = count_frames * 4
         compressed = expected >= 1024
         if self.version > 4:
-            compressed = binary.read_bool(file)
+            compressed = reader.read_bool()
         
         output = []
         if compressed:
             try:
-                _, uncompressed = lzo1x_decompress(file, expected)
+                _, uncompressed = lzo1x_decompress(reader, expected)
             except LZO_Error as ex:
                 raise BMTR_Error(str(ex))
             
-            buffer = BufferedReader(BytesIO(uncompressed))
-            output = [binary.read_float(buffer) for i in range(count_frames)]
-            if buffer.read() != b"":
+            buffer = binary.BinaryReader(uncompressed)
+            output = list(buffer.read_floats(count_frames))
+            if not buffer.eof():
                 raise BMTR_Error("Decompressed data is longer than expected")
         else:
-            output = [binary.read_float(file) for i in range(count_frames)]
+            output = list(reader.read_floats(count_frames))
         
         return output
 
-    def read_frames(self, file, count_frames, count_bones):
+    def read_frames(self, reader, count_frames, count_bones):
         output = []
         for i in range(count_frames):
-            count_bones = binary.read_ulong(file)
+            count_bones = reader.read_ulong()
 
             expected = count_bones * 14
             compressed = expected >= 1024
             if self.version > 4:
-                compressed = binary.read_bool(file)
+                compressed = reader.read_bool()
 
             if compressed:
                 try:
-                    _, uncompressed = lzo1x_decompress(file, expected)
+                    _, uncompressed = lzo1x_decompress(reader, expected)
                 except LZO_Error as ex:
                     raise BMTR_Error(str(ex))
                 
-                buffer = BufferedReader(BytesIO(uncompressed))
+                buffer = binary.BinaryReader(uncompressed)
                 output.append(BMTR_Frame.read(buffer, count_bones))
-                if buffer.read() != b"":
+                if not buffer.eof():
                     raise BMTR_Error("Decompressed data is longer than expected")
             else:
-                output.append(BMTR_Frame.read(file, count_bones))
+                output.append(BMTR_Frame.read(reader, count_bones))
 
         return output
 
     @classmethod
     def read(cls, file):
-        signature = file.read(4)
+        reader = binary.BinaryReader.wrap(file)
+
+        signature = reader.read(4)
         if signature != cls.signature:
             raise BMTR_Error("Invalid header signature: %s" % signature)
         
         output = cls()
-        version = binary.read_ulong(file)
+        version = reader.read_ulong()
         if version not in cls.versions:
             raise BMTR_Error("Unknown version: %s" % version)
 
         output.version = version
-        file.read(1)
-        x, z, y = binary.read_floats(file, 3)
+        reader.skip(1)
+        x, z, y = reader.read_floats(3)
         output.motion = (x, y, z)
 
-        count_frames = binary.read_ulong(file)
-        file.read(4)
-        count_bones = binary.read_ulong(file)
-        count_bones_check = binary.read_ulong(file)
+        count_frames = reader.read_ulong()
+        reader.skip(4)
+        count_bones = reader.read_ulong()
+        count_bones_check = reader.read_ulong()
         if count_bones_check != count_bones:
             raise BMTR_Error("Bone count mismatch (expected: %d, got: %d)" % (count_bones, count_bones_check))
         
-        output.bones = [binary.read_asciiz(file) for i in range(count_bones)]
+        output.bones = [reader.read_asciiz() for i in range(count_bones)]
 
         if output.version > 4:
-            file.read(4)
-            count_props = binary.read_ulong(file)
-            output.props = [BMTR_Prop.read(file) for i in range(count_props)]
+            reader.skip(4)
+            count_props = reader.read_ulong()
+            output.props = [BMTR_Prop.read(reader) for i in range(count_props)]
 
-        count_frames_check = binary.read_ulong(file)
+        count_frames_check = reader.read_ulong()
         if count_frames_check != count_frames:
             raise BMTR_Error("Frame count mismatch (expected: %d, got: %d)" % (count_frames, count_frames_check))
         
-        output.phases = output.read_frame_phases(file, count_frames)
-        output.frames = output.read_frames(file, count_frames, count_bones)
+        output.phases = output.read_frame_phases(reader, count_frames)
+        output.frames = output.read_frames(reader, count_frames, count_bones)
         
-        remainder = file.read()
-        if remainder != b"":
+        if not reader.eof():
             raise BMTR_Error("EOF not found")
 
         return output
@@ -458,12 +463,12 @@ class BMTR_File:
 
 
 def read_rtm_universal(file):
-    signature = file.read(4)
-    file.seek(0)
+    reader = binary.BinaryReader.wrap(file)
+    signature = reader.peek(4)
 
     if signature == b"BMTR":
-        return BMTR_File.read(file)
+        return BMTR_File.read(reader)
     elif signature == b"RTM_":
-        return RTM_File.read(file)
+        return RTM_File.read(reader)
     else:
         raise ValueError("File is not a valid RTM file.")
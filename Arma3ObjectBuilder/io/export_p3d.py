@@ -3,15 +3,25 @@
 # in the data_p3d module.
 
 
+import os
 import time
 import re
+import runpy
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from contextlib import contextmanager
 
 import bpy
-import bmesh
+import mathutils
+import numpy as np
 
 from . import data_p3d as p3d
-from .. import get_prefs
+from . import cache_p3d
+from . import serialize_p3d
+from .profiler import StageProfiler, StageProfilerNull
+from .. import get_prefs, bl_info
 from ..utilities import generic as utils
 from ..utilities import flags as flagutils
 from ..utilities import compat as computils
@@ -252,26 +262,6 @@ def get_sub_objects(obj, temp_collection):
     return sub_objects, proxy_objects
 
 
-def sort_sections(obj):
-    sections = {0: []}
-    for i in range(len(obj.material_slots)):
-        sections[i] = []
-
-    with utils.edit_bmesh(obj) as bm:
-        bm.faces.ensure_lookup_table()
-
-        for face in bm.faces:
-            sections.get(face.material_index, sections[0]).append(face)
-        
-        face_index = 0
-        for section in sections.values():
-            for face in section:
-                face.index = face_index
-                face_index -=- 1
-
-        bm.faces.sort()
-
-
 def cleanup_uvs(obj):
     if int(obj.a3ob_properties_object.lod) not in data.lod_allow_uvs:
         utils.clear_uvs(obj)
@@ -319,38 +309,42 @@ def temporary_component(operator, obj):
             obj.vertex_groups.remove(temporary_component)
 
 
-# Huge monolith function to produce the final object and mesh data that can be written to the 
-# P3D file. Merges the sub-objects and proxies into the main objects, applies transformations,
-# runs mesh validation and sorts sections if necessary. Also processes the LOD copy directives.
-# [(LOD object 0, proxy lookup 0), (..., ....), ....]
-def get_lod_data(operator, context, validator, temp_collection):
+def get_export_objects(operator, context):
     scene = context.scene
     export_objects = scene.objects
 
     if operator.use_selection:
         export_objects = context.selected_objects
 
+    return [obj for obj in export_objects if (not operator.visible_only or obj.visible_get()) and obj.type == 'MESH' and obj.a3ob_properties_object.is_a3_lod and obj.parent == None]
+
+
+# Huge monolith function to produce the final object and mesh data that can be written to the 
+# P3D file. Merges the sub-objects and proxies into the main objects, applies transformations,
+# runs mesh validation and sorts sections if necessary. Also processes the LOD copy directives.
+# The LOD object and its LOD copies are produced from a single export object.
+# [(LOD object 0, proxy lookup 0, is valid 0), (..., ...., ...), ....]
+def get_lod_data(operator, obj, validator, temp_collection, profiler):
     lod_list = []
 
-    for obj in [obj for obj in export_objects if not operator.visible_only or obj.visible_get()]:       
-        if obj.type != 'MESH' or not obj.a3ob_properties_object.is_a3_lod or obj.parent != None:
-            continue
-            
-        # Some operator polls fail later if an object is in edit mode.
-        if not obj.mode == 'OBJECT':
-            computils.call_operator_ctx(bpy.ops.object.mode_set, {"active_object": obj}, mode='OBJECT')
-        
-        main_obj = duplicate_object(obj, temp_collection)
-        is_valid = True
+    # Some operator polls fail later if an object is in edit mode.
+    if not obj.mode == 'OBJECT':
+        computils.call_operator_ctx(bpy.ops.object.mode_set, {"active_object": obj}, mode='OBJECT')
+    
+    main_obj = duplicate_object(obj, temp_collection)
+    is_valid = True
 
-        sub_objects, proxy_objects = get_sub_objects(obj, temp_collection)
-        
-        # Merging of the components has to be done in two steps (1st: sub-objects, 2nd: proxies), because the LOD
-        # validation would otherwise get confused by the proxy triangles (eg.: it'd be impossible to validate
-        # that a mesh is otherwise contiguous or not).
+    sub_objects, proxy_objects = get_sub_objects(obj, temp_collection)
+    
+    # Merging of the components has to be done in two steps (1st: sub-objects, 2nd: proxies), because the LOD
+    # validation would otherwise get confused by the proxy triangles (eg.: it'd be impossible to validate
+    # that a mesh is otherwise contiguous or not).
+    with profiler.stage("merge_sub_objects", obj.name, sub_objects=len(sub_objects)):
         merge_sub_objects(operator, main_obj, sub_objects)
-        is_valid = validate_proxies(operator, proxy_objects)
+    
+    is_valid = validate_proxies(operator, proxy_objects)
 
+    with profiler.stage("validate_lod", obj.name, copies=len(main_obj.a3ob_properties_object.copies)):
         is_valid_copies = []
         for copy in main_obj.a3ob_properties_object.copies:
             with temporary_component(operator, main_obj):
@@ -359,66 +353,410 @@ def get_lod_data(operator, context, validator, temp_collection):
         with temporary_component(operator, main_obj):
             is_valid &= validator.validate_lod(main_obj, main_obj.a3ob_properties_object.lod, True, operator.validate_lods_warning_errors and operator.validate_lods, operator.relative_paths)
 
-        proxy_lookup = merge_proxy_objects(main_obj, proxy_objects, operator.relative_paths)
+    proxy_lookup = merge_proxy_objects(main_obj, proxy_objects, operator.relative_paths)
 
-        if operator.apply_transforms:
-            apply_transforms(main_obj)
-        
-        if operator.validate_meshes:
-            main_obj.data.validate(clean_customdata=False)
-
-        # Sections are important for in-game performace, and should be sorted during export
-        # to avoid any unnecessary fragmentation. Some info about sections can be found on the
-        # community wiki: https://community.bistudio.com/wiki/Section_Count.
-        # Some corrections: https://mrcmodding.gitbook.io/home/documents/sections.
-        if operator.sort_sections:
-            sort_sections(main_obj)
+    if operator.apply_transforms:
+        apply_transforms(main_obj)
+    
+    if operator.validate_meshes:
+        main_obj.data.validate(clean_customdata=False)
+
+    for copy, is_valid_copy in zip(main_obj.a3ob_properties_object.copies, is_valid_copies):
+        main_obj_copy = duplicate_object(main_obj, temp_collection)
+        copy_props = main_obj_copy.a3ob_properties_object
+        copy_props.lod = copy.lod
+        copy_props.resolution = copy.resolution
+        copy_props.resolution_float = copy.resolution_float
+
+        cleanup_uvs(main_obj_copy)
+        cleanup_normals(operator, main_obj_copy)
+        generate_components(operator, main_obj_copy)
+        lod_list.append((main_obj_copy, proxy_lookup, is_valid_copy))
         
-        for copy, is_valid_copy in zip(main_obj.a3ob_properties_object.copies, is_valid_copies):
-            main_obj_copy = duplicate_object(main_obj, temp_collection)
-            copy_props = main_obj_copy.a3ob_properties_object
-            copy_props.lod = copy.lod
-            copy_props.resolution = copy.resolution
-            copy_props.resolution_float = copy.resolution_float
-
-            cleanup_uvs(main_obj_copy)
-            cleanup_normals(operator, main_obj_copy)
-            generate_components(operator, main_obj_copy)
-            lod_list.append((main_obj_copy, proxy_lookup, is_valid_copy))
-            
-        cleanup_uvs(main_obj)
-        cleanup_normals(operator, main_obj)
-        generate_components(operator, main_obj)
-        lod_list.append((main_obj, proxy_lookup, is_valid))
+    cleanup_uvs(main_obj)
+    cleanup_normals(operator, main_obj)
+    generate_components(operator, main_obj)
+    lod_list.append((main_obj, proxy_lookup, is_valid))
 
     return lod_list
 
 
-# Produce the vertex list from the bmesh data.
-def process_vertices(bm):
-    layer = flagutils.get_layer_flags_vertex(bm)
-    output = [(*vert.co, vert[layer]) for vert in bm.verts]
+# Evaluated export
+# The LOD parts are read from the depsgraph evaluated meshes, transformed and concatenated
+# as flat arrays, and the merged data is written into a single new mesh, instead of duplicating
+# and joining the parts with operators. The new objects are placed into the temporary collection,
+# and are processed with the same steps as the joined duplicates of the regular export
+# (validation, normals, UVs, components), so the exported data is the same.
+
+
+class LOD_MeshData():
+    def __init__(self):
+        self.verts = np.zeros((0, 3), dtype=np.float64)
+        self.verts_flags = np.zeros(0, dtype=np.uint32)
+        self.verts_mass = np.zeros(0, dtype=np.float32)
+        self.has_mass = False
+        self.loops = np.zeros(0, dtype=np.int32)
+        self.loop_normals = np.zeros((0, 3), dtype=np.float32)
+        self.face_sides = np.zeros(0, dtype=np.int32)
+        self.face_materials = np.zeros(0, dtype=np.int32)
+        self.face_smooth = np.zeros(0, dtype=bool)
+        self.face_flags = np.zeros(0, dtype=np.uint32)
+        self.sharp_edges = np.zeros((0, 2), dtype=np.int32)
+        self.uvs = {}
+        self.groups = {}
+        self.materials = []
+
+    # Read the mesh data of an object, optionally with the modifiers applied,
+    # transformed by the given matrix.
+    @classmethod
+    def from_object(cls, obj, depsgraph, matrix, apply_modifiers, is_proxy = False):
+        obj.update_from_editmode()
+        obj_eval = None
+        if apply_modifiers:
+            obj_eval = obj.evaluated_get(depsgraph)
+            mesh = obj_eval.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph)
+        else:
+            mesh = obj.data
 
-    return output
+        try:
+            output = cls.from_mesh(obj, mesh, matrix, is_proxy)
+        finally:
+            if obj_eval:
+                obj_eval.to_mesh_clear()
+
+        return output
+
+    @classmethod
+    def from_mesh(cls, obj, mesh, matrix, is_proxy):
+        output = cls()
+
+        count_verts = len(mesh.vertices)
+        count_loops = len(mesh.loops)
+        count_faces = len(mesh.polygons)
+        count_edges = len(mesh.edges)
+
+        matrix = np.array(matrix, dtype=np.float64)
+        coords = np.empty(count_verts * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", coords)
+        output.verts = coords.reshape((-1, 3)).astype(np.float64) @ matrix[:3, :3].T + matrix[:3, 3]
+
+        output.loops = np.empty(count_loops, dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", output.loops)
+
+        output.face_sides = np.empty(count_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("loop_total", output.face_sides)
+        output.face_materials = np.empty(count_faces, dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", output.face_materials)
+        output.face_smooth = np.empty(count_faces, dtype=bool)
+        mesh.polygons.foreach_get("use_smooth", output.face_smooth)
+
+        # Normals are transformed by the inverse transpose to stay perpendicular under non-uniform scaling.
+        normals = computils.mesh_get_corner_normals(mesh).astype(np.float64) @ np.linalg.inv(matrix[:3, :3])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        output.loop_normals = (normals / np.where(lengths > 0, lengths, 1)).astype(np.float32)
+
+        edges = np.empty(count_edges * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edges)
+        output.sharp_edges = edges.reshape((-1, 2))[computils.mesh_get_sharp_edges(mesh)]
+
+        output.materials = [slot.material for slot in obj.material_slots] or [None]
+
+        # The proxies are always flat shaded, and have no UVs, flags or mass.
+        if is_proxy:
+            output.face_smooth[:] = False
+            output.verts_flags = np.zeros(count_verts, dtype=np.uint32)
+            output.face_flags = np.zeros(count_faces, dtype=np.uint32)
+            output.verts_mass = np.zeros(count_verts, dtype=np.float32)
+        else:
+            for layer in mesh.uv_layers:
+                uvs = np.empty(count_loops * 2, dtype=np.float32)
+                layer.data.foreach_get("uv", uvs)
+                output.uvs[layer.name] = uvs.reshape((-1, 2))
+
+            flag_props = obj.a3ob_properties_object_flags
+            prefs = get_prefs()
+            output.verts_flags = bake_flags(get_attribute(mesh, "a3ob_flags_vertex", count_verts, np.int32), flag_props.vertex, prefs.flag_vertex)
+            output.face_flags = bake_flags(get_attribute(mesh, "a3ob_flags_face", count_faces, np.int32), flag_props.face, prefs.flag_face)
+
+            output.has_mass = "a3ob_mass" in mesh.attributes
+            output.verts_mass = get_attribute(mesh, "a3ob_mass", count_verts, np.float32)
+
+        output.groups = get_vertex_group_weights(obj, mesh)
+
+        return output
+
+    # Append the data of another part. The material slots are merged by material, the UV layers
+    # and vertex groups by name.
+    def append(self, other):
+        offset_verts = len(self.verts)
+        count_loops = len(self.loops)
+        count_loops_other = len(other.loops)
+
+        material_remap = []
+        for mat in other.materials:
+            if mat not in self.materials:
+                self.materials.append(mat)
+            material_remap.append(self.materials.index(mat))
+
+        material_remap = np.array(material_remap, dtype=np.int32)
+
+        for name in set(self.uvs) | set(other.uvs):
+            uvs_self = self.uvs.get(name, np.zeros((count_loops, 2), dtype=np.float32))
+            uvs_other = other.uvs.get(name, np.zeros((count_loops_other, 2), dtype=np.float32))
+            self.uvs[name] = np.concatenate((uvs_self, uvs_other))
+        
+        for name, (indices, weights) in other.groups.items():
+            indices_self, weights_self = self.groups.get(name, (np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)))
+            self.groups[name] = (np.concatenate((indices_self, indices + offset_verts)), np.concatenate((weights_self, weights)))
+
+        self.verts = np.concatenate((self.verts, other.verts))
+        self.verts_flags = np.concatenate((self.verts_flags, other.verts_flags))
+        self.verts_mass = np.concatenate((self.verts_mass, other.verts_mass))
+        self.has_mass |= other.has_mass
+        self.loops = np.concatenate((self.loops, other.loops + offset_verts))
+        self.loop_normals = np.concatenate((self.loop_normals, other.loop_normals))
+        self.face_sides = np.concatenate((self.face_sides, other.face_sides))
+        self.face_materials = np.concatenate((self.face_materials, material_remap[np.clip(other.face_materials, 0, len(material_remap) - 1)]))
+        self.face_smooth = np.concatenate((self.face_smooth, other.face_smooth))
+        self.face_flags = np.concatenate((self.face_flags, other.face_flags))
+        self.sharp_edges = np.concatenate((self.sharp_edges, other.sharp_edges + offset_verts))
+
+
+def get_attribute(mesh, name, count, dtype):
+    values = np.zeros(count, dtype=dtype)
+    layer = mesh.attributes.get(name)
+    if layer:
+        layer.data.foreach_get("value", values)
+    
+    return values
+
+
+# Dereference the flag group indices stored in the flag attribute.
+def bake_flags(values, groups, default_flag):
+    output = np.full(len(values), default_flag, dtype=np.int64)
+    flags = np.array([item.get_flag() for item in groups], dtype=np.int64)
+    if len(flags) > 0:
+        valid = (values >= 0) & (values < len(flags))
+        output[valid] = flags[values[valid]]
+
+    return output.astype(np.uint32)
+
+
+# Flattened vertex group assignments of the mesh. The deform weights have no mesh level bulk
+# access in the API, so the groups of each vertex are read with foreach_get into their slice of
+# the preallocated arrays, and the vertex indices are expanded from the per vertex assignment counts.
+# (group indices, vertex indices, weights)
+def get_group_assignments(mesh):
+    vert_groups = [vert.groups for vert in mesh.vertices]
+    counts = np.fromiter(map(len, vert_groups), dtype=np.int32, count=len(vert_groups))
+    bounds = np.concatenate(([0], np.cumsum(counts)))
+    group_indices = np.empty(bounds[-1], dtype=np.int32)
+    weights = np.empty(bounds[-1], dtype=np.float32)
+    for i in np.flatnonzero(counts).tolist():
+        vert_groups[i].foreach_get("group", group_indices[bounds[i]:bounds[i + 1]])
+        vert_groups[i].foreach_get("weight", weights[bounds[i]:bounds[i + 1]])
+    
+    vert_indices = np.repeat(np.arange(len(vert_groups), dtype=np.int32), counts)
 
+    return group_indices, vert_indices, weights
 
-# Produce the unique vertex normal dictionary from the bmesh data, as well as a mapping
-# dictionary.
-# {idx 0: (x, y, z), ...: (..., ..., ...), ....}
-# {loop idx 0: normal idx X, loop idx 1: normal idx Y, ...}
-def process_normals(mesh):
-    output = []
-    normals_index = {}
-    normals_lookup_dict = {}
+
+# The assignments are sorted by group, so every group is a slice of the sorted arrays.
+# {group name: (vertex indices, weights), ...}
+def get_vertex_group_weights(obj, mesh):
+    group_indices, vert_indices, weights = get_group_assignments(mesh)
+    order = np.argsort(group_indices, kind="stable")
+    bounds = np.searchsorted(group_indices[order], np.arange(len(obj.vertex_groups) + 1))
+    vert_indices = vert_indices[order]
+    weights = weights[order]
+    
+    return {group.name: (vert_indices[bounds[i]:bounds[i + 1]], weights[bounds[i]:bounds[i + 1]]) for i, group in enumerate(obj.vertex_groups)}
+
+
+# Vertex indices grouped by their weights, so the weights can be assigned with one call
+# per distinct value.
+# [(weight, vertex indices), ...]
+def group_by_weight(indices, weights):
+    if len(weights) == 0:
+        return []
     
-    for i, normal in computils.mesh_static_normals_iterator(mesh):
-        if normal not in normals_index:
-            normals_index[normal] = len(normals_index)
-            output.append(normal)
+    order = np.argsort(weights, kind="stable")
+    weights = weights[order]
+    starts = np.flatnonzero(np.diff(weights)) + 1
+
+    return list(zip(weights[np.concatenate(([0], starts))].tolist(), np.split(indices[order], starts)))
+
+
+def copy_lod_properties(source, target):
+    source_props = source.a3ob_properties_object
+    target_props = target.a3ob_properties_object
+    target_props.is_a3_lod = True
+    target_props.lod = source_props.lod
+    target_props.resolution = source_props.resolution
+    target_props.resolution_float = source_props.resolution_float
+
+    for prop in source_props.properties:
+        item = target_props.properties.add()
+        item.name = prop.name
+        item.value = prop.value
+    
+    for copy in source_props.copies:
+        item = target_props.copies.add()
+        item.lod = copy.lod
+        item.resolution = copy.resolution
+        item.resolution_float = copy.resolution_float
+
+
+# Build a temporary object from the merged LOD data. The custom normals are only set,
+# where the regular export would keep them as well (see cleanup_normals).
+def create_temp_object(operator, source, lod_data, temp_collection):
+    mesh = bpy.data.meshes.new(source.name)
+    mesh.vertices.add(len(lod_data.verts))
+    mesh.vertices.foreach_set("co", lod_data.verts.astype(np.float32).ravel())
+    
+    mesh.loops.add(len(lod_data.loops))
+    mesh.loops.foreach_set("vertex_index", lod_data.loops)
+
+    starts = np.zeros(len(lod_data.face_sides), dtype=np.int32)
+    np.cumsum(lod_data.face_sides[:-1], out=starts[1:])
+    mesh.polygons.add(len(lod_data.face_sides))
+    computils.mesh_set_polygons(mesh, starts, lod_data.face_sides)
+    mesh.update(calc_edges=True)
+
+    mesh.polygons.foreach_set("material_index", lod_data.face_materials)
+    mesh.polygons.foreach_set("use_smooth", lod_data.face_smooth)
+    for mat in lod_data.materials:
+        mesh.materials.append(mat)
+
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    computils.mesh_set_sharp_edges(mesh, p3d.match_edges(edges.reshape((-1, 2)), lod_data.sharp_edges))
+
+    for name, uvs in lod_data.uvs.items():
+        layer = mesh.uv_layers.new(name=name)
+        layer.data.foreach_set("uv", uvs.ravel())
+
+    layer = mesh.attributes.new("a3ob_flags_vertex", 'INT', 'POINT')
+    layer.data.foreach_set("value", lod_data.verts_flags.view(np.int32))
+    layer = mesh.attributes.new("a3ob_flags_face", 'INT', 'FACE')
+    layer.data.foreach_set("value", lod_data.face_flags.view(np.int32))
+
+    if lod_data.has_mass:
+        layer = mesh.attributes.new("a3ob_mass", 'FLOAT', 'POINT')
+        layer.data.foreach_set("value", lod_data.verts_mass)
+
+    if operator.preserve_normals and int(source.a3ob_properties_object.lod) in data.lod_visuals:
+        computils.mesh_auto_smooth(mesh)
+        mesh.normals_split_custom_set(lod_data.loop_normals)
+
+    obj = bpy.data.objects.new(source.name, mesh)
+    obj["a3ob_original_object"] = source.name
+    copy_lod_properties(source, obj)
+    temp_collection.objects.link(obj)
+
+    for name, (indices, weights) in lod_data.groups.items():
+        group = obj.vertex_groups.new(name=name)
+        for weight, group_indices in group_by_weight(indices, weights):
+            group.add(group_indices.tolist(), weight, 'REPLACE')
+
+    return obj
+
+
+def remove_temp_object(obj):
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+
+# Counterpart of get_lod_data, that produces the same LOD list from the evaluated meshes,
+# without duplicating or otherwise changing the objects of the scene.
+def get_lod_data_evaluated(operator, depsgraph, obj, validator, temp_collection, profiler):
+    lod_list = []
+
+    matrix_main = obj.matrix_world if operator.apply_transforms else mathutils.Matrix.Identity(4)
+    matrix_relative = matrix_main @ obj.matrix_world.inverted()
+
+    proxy_objects = []
+    with profiler.stage("merge_sub_objects", obj.name) as counts:
+        lod_data = LOD_MeshData.from_object(obj, depsgraph, matrix_main, operator.apply_modifiers)
+        counts["sub_objects"] = 0
+        for child in obj.children:
+            if child.type != 'MESH':
+                continue
+            
+            if child.a3ob_properties_object_proxy.is_a3_proxy:
+                proxy_objects.append(child)
+                continue
+
+            lod_data.append(LOD_MeshData.from_object(child, depsgraph, matrix_relative @ child.matrix_world, operator.apply_modifiers))
+            counts["sub_objects"] += 1
+
+        main_obj = create_temp_object(operator, obj, lod_data, temp_collection)
+    
+    is_valid = validate_proxies(operator, proxy_objects)
+
+    with profiler.stage("validate_lod", obj.name, copies=len(main_obj.a3ob_properties_object.copies)):
+        is_valid_copies = []
+        for copy in main_obj.a3ob_properties_object.copies:
+            with temporary_component(operator, main_obj):
+                is_valid_copies.append(is_valid and validator.validate_lod(main_obj, copy.lod, True, operator.validate_lods_warning_errors and operator.validate_lods, operator.relative_paths))
+
+        with temporary_component(operator, main_obj):
+            is_valid &= validator.validate_lod(main_obj, main_obj.a3ob_properties_object.lod, True, operator.validate_lods_warning_errors and operator.validate_lods, operator.relative_paths)
+
+    # Same as in the regular export, the proxies are only merged after the validation. The proxy
+    # triangles are concatenated to the arrays of the LOD, and the mesh is rebuilt from the result.
+    proxy_lookup = {}
+    if len(proxy_objects) > 0:
+        merged = LOD_MeshData()
+        merged.append(lod_data)
+        for i, proxy in enumerate(proxy_objects):
+            placeholder = "@proxy_%d" % i
+            proxy_data = LOD_MeshData.from_object(proxy, depsgraph, matrix_relative @ proxy.matrix_world, False, True)
+            proxy_data.groups[placeholder] = (np.arange(len(proxy_data.verts), dtype=np.int32), np.ones(len(proxy_data.verts), dtype=np.float32))
+            merged.append(proxy_data)
+            proxy_lookup[placeholder] = proxy.a3ob_properties_object_proxy.to_placeholder(operator.relative_paths)
         
-        normals_lookup_dict[i] = normals_index[normal]
+        remove_temp_object(main_obj)
+        main_obj = create_temp_object(operator, obj, merged, temp_collection)
+    
+    if operator.validate_meshes:
+        main_obj.data.validate(clean_customdata=False)
+
+    for copy, is_valid_copy in zip(main_obj.a3ob_properties_object.copies, is_valid_copies):
+        main_obj_copy = duplicate_object(main_obj, temp_collection)
+        copy_props = main_obj_copy.a3ob_properties_object
+        copy_props.lod = copy.lod
+        copy_props.resolution = copy.resolution
+        copy_props.resolution_float = copy.resolution_float
+
+        cleanup_uvs(main_obj_copy)
+        cleanup_normals(operator, main_obj_copy)
+        generate_components(operator, main_obj_copy)
+        lod_list.append((main_obj_copy, proxy_lookup, is_valid_copy))
+    
+    cleanup_uvs(main_obj)
+    cleanup_normals(operator, main_obj)
+    generate_components(operator, main_obj)
+    lod_list.append((main_obj, proxy_lookup, is_valid))
+
+    return lod_list
+
 
-    return output, normals_lookup_dict
+# Snapshots
+# The data of the LOD objects is extracted into snapshots of plain arrays and values in the
+# main thread. The P3D_LOD objects are built from these in the serialize_p3d module, that
+# does not depend on bpy, so that part can also be run in worker processes.
+
+
+# Produce the vertex coordinate and flag arrays from the mesh data.
+def process_vertices(mesh):
+    count_verts = len(mesh.vertices)
+    coords = np.empty(count_verts * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", coords)
+    flags = get_attribute(mesh, "a3ob_flags_vertex", count_verts, np.int32)
+
+    return coords.reshape((-1, 3)), flags.view(np.uint32)
 
 
 # Produce material lookup dictionary from the materials assigned to the object.
@@ -436,164 +774,168 @@ def process_materials(obj, relative):
     return output
 
 
-# Produce the face data dictionary from the obj and  bmesh data.
-# {face 0: ([vert 0, vert 1, vert 2], [normal 0, normal 1, normal 2], [(uv 0 0, uv 0 1), (...), ...], texture, material, flag), ...}
-def process_faces(obj, bm, normals_lookup, relative):
-    output = []
-    # Materials need to be precompiled to speed up the face access.
-    materials = process_materials(obj, relative)
+# Sections are important for in-game performace, and should be sorted during export
+# to avoid any unnecessary fragmentation. Some info about sections can be found on the
+# community wiki: https://community.bistudio.com/wiki/Section_Count.
+# Some corrections: https://mrcmodding.gitbook.io/home/documents/sections.
+# The faces are ordered by a stable sort of their material indices, faces with invalid
+# indices are sorted into the first section. The mesh itself is left unchanged.
+def get_section_order(obj, mesh):
+    materials = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", materials)
+    materials[(materials < 0) | (materials >= max(1, len(obj.material_slots)))] = 0
 
-    uv_layer = None
-    if len(bm.loops.layers.uv.values()) > 0: # 1st UV set needs to be written into the face data section too
-        uv_layer = bm.loops.layers.uv.values()[0]
-    
-    flag_layer = flagutils.get_layer_flags_face(bm)
-    
-    for face in bm.faces:
-        verts = []
-        normals = []
-        uvs = []
-
-        for loop in face.loops:
-            verts.append(loop.vert.index)
-            normals.append(normals_lookup[loop.index])
-            uvs.append((loop[uv_layer].uv[0], 1 - loop[uv_layer].uv[1]) if uv_layer else (0, 0))
-
-        output.append([verts, normals, uvs, *materials[face.material_index], face[flag_layer]])
+    return np.argsort(materials, kind='stable')
 
-    return output
 
+# Indices of the mesh loops in the order of the exported faces (the loops of a face are not
+# required to follow the face order in the mesh data). The faces are optionally permuted.
+def get_loop_order(mesh, face_order = None):
+    count_faces = len(mesh.polygons)
+    starts = np.empty(count_faces, dtype=np.int32)
+    sides = np.empty(count_faces, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    mesh.polygons.foreach_get("loop_total", sides)
 
-def is_flat_shaded(bm):
-    for face in bm.faces:
-        if face.smooth:
-            return False
+    if face_order is None:
+        face_order = np.arange(count_faces, dtype=np.int64)
     
-    return True
-
-
-def process_tagg_sharp(bm):
-    output = p3d.P3D_TAGG()
-    output.name = "#SharpEdges#"
-    output.data = p3d.P3D_TAGG_DataSharpEdges()
-
-    # For ease of use, the edges of flat shaded faces need to be exported as sharp as well.
-    # Technically this creates fertile ground for mistakes, maybe it should be only done
-    # if the whole mesh is flat shaded.
-    if is_flat_shaded(bm):
-        flat_face_edges = set()
-        for face in bm.faces:
-            if not face.smooth:
-                flat_face_edges.update({edge for edge in face.edges if edge.is_contiguous})
-        
-        output.data.edges = [(edge.verts[0].index, edge.verts[1].index) for edge in flat_face_edges]
-    else:
-        output.data.edges = [(edge.verts[0].index, edge.verts[1].index) for edge in bm.edges if not edge.smooth and edge.is_contiguous]
-
-    if len(output.data.edges) == 0:
-        None
-
-    return output
+    starts = starts[face_order]
+    sides = sides[face_order]
 
+    offsets = np.cumsum(sides) - sides
+    loop_order = np.arange(np.sum(sides), dtype=np.int64) + np.repeat(starts - offsets, sides)
 
-def process_tagg_uvset(bm, layer):
-    output = p3d.P3D_TAGG()
-    output.name = "#UVSet#"
-    output.data = p3d.P3D_TAGG_DataUVSet()
-    output.data.uvs = [(loop[layer].uv[0], loop[layer].uv[1]) for face in bm.faces for loop in face.loops]
+    return loop_order, face_order, sides
 
-    return output
 
+def get_uvs(mesh, layer, loop_order):
+    uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    layer.data.foreach_get("uv", uvs)
 
-def process_tagg_property(prop):
-    output = p3d.P3D_TAGG()
-    output.name = "#Property#"
-    output.data = p3d.P3D_TAGG_DataProperty()
-    output.data.key = prop.name
-    output.data.value = prop.value
+    return uvs.reshape((-1, 2))[loop_order]
 
-    return output
 
+# Fill the flat face data arrays of the snapshot from the mesh data.
+# The texture-material pairs of the material slots make up the string table,
+# so the material index of a face can be used directly as its table index.
+def process_faces(obj, mesh, loop_order, face_order, sides, relative, snapshot):
+    materials = process_materials(obj, relative)
+    count_faces = len(mesh.polygons)
 
-def process_tagg_mass(bm, layer):
-    output = p3d.P3D_TAGG()
-    output.name = "#Mass#"
-    output.data = p3d.P3D_TAGG_DataMass()
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
 
-    output.data.masses = [vert[layer] for vert in bm.verts]
+    face_materials = np.empty(count_faces, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", face_materials)
 
-    return output
+    flags = get_attribute(mesh, "a3ob_flags_face", count_faces, np.int32)
 
+    # 1st UV set needs to be written into the face data section too
+    if len(mesh.uv_layers) > 0:
+        uvs = get_uvs(mesh, mesh.uv_layers[0], loop_order)
+        uvs[:, 1] = 1 - uvs[:, 1]
+    else:
+        uvs = np.zeros((len(loop_order), 2), dtype=np.float32)
+
+    snapshot["loop_normals"] = computils.mesh_get_corner_normals(mesh)[loop_order]
+    snapshot["face_sides"] = sides.astype(np.uint32)
+    snapshot["face_verts"] = loop_verts[loop_order].astype(np.uint32)
+    snapshot["face_uvs"] = uvs
+    snapshot["face_flags"] = flags[face_order].view(np.uint32)
+    snapshot["face_materials"] = face_materials[face_order].astype(np.uint32)
+    snapshot["materials"] = [materials[i] for i in range(len(materials))]
+
+
+# Vertex index pairs of the sharp edges. Only contiguous edges are exported (manifold edges,
+# with the adjacent faces having consistent winding).
+# For ease of use, the edges of flat shaded faces need to be exported as sharp as well.
+# Technically this creates fertile ground for mistakes, so it is only done if the whole
+# mesh is flat shaded.
+def process_sharp_edges(mesh):
+    count_edges = len(mesh.edges)
+    count_loops = len(mesh.loops)
+
+    edges = np.empty(count_edges * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    loop_edges = np.empty(count_loops, dtype=np.int32)
+    mesh.loops.foreach_get("edge_index", loop_edges)
+    loop_verts = np.empty(count_loops, dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", smooth)
+
+    # The two loops of a contiguous edge start from different vertices.
+    counts = np.bincount(loop_edges, minlength=count_edges)
+    order = np.argsort(loop_edges, kind='stable')
+    manifold = counts == 2
+    firsts = (np.cumsum(counts) - counts)[manifold]
+    contiguous = np.zeros(count_edges, dtype=bool)
+    contiguous[manifold] = loop_verts[order[firsts]] != loop_verts[order[firsts + 1]]
+
+    if np.any(smooth):
+        contiguous &= computils.mesh_get_sharp_edges(mesh)
+
+    return edges.reshape((-1, 2))[contiguous]
+
+
+# Flattened vertex group assignments of the mesh.
+# [group names], (group indices, vertex indices, weights)
+def process_selections(obj, mesh, translate = False):
+    names = [group.name for group in obj.vertex_groups]
+    if translate:
+        names = [data.translations_english_czech.get(name.lower(), name) for name in names]
+
+    return names, get_group_assignments(mesh)
+
+
+def get_snapshot(operator, obj, proxy_lookup, lod_index, lod_resolution, signature, profiler):
+    object_props = obj.a3ob_properties_object
+    mesh = obj.data
 
-def process_taggs_selections(obj, bm):
-    output = []
+    snapshot = {
+        "name": obj["a3ob_original_object"],
+        "signature": signature,
+        "lod": lod_index,
+        "resolution": lod_resolution,
+        "proxies": proxy_lookup,
+        "renumber_components": operator.renumber_components,
+        "force_lowercase": operator.force_lowercase
+    }
 
-    for group in obj.vertex_groups:
-        new_tagg = p3d.P3D_TAGG()
-        new_tagg.name = group.name
-        new_tagg.data = p3d.P3D_TAGG_DataSelection()
-        new_tagg.data.count_verts = len(bm.verts)
-        new_tagg.data.count_faces = len(bm.faces)
-        output.append(new_tagg)
-
-    bm.verts.layers.deform.verify()
-    layer = bm.verts.layers.deform.active
-
-    for vert in bm.verts:
-        for idx in vert[layer].keys():
-            output[idx].data.weight_verts.append((vert.index, vert[layer][idx]))
-    
-    # If all vertices of a face belong to a selection, then the face belongs to the 
-    # selection as well.
-    for face in bm.faces:
-        indices = [idx for vert in face.verts for idx in vert[layer].keys()]
-        unique = set(indices)
-        for idx in unique:
-            if indices.count(idx) == len(face.loops):
-                output[idx].data.weight_faces.append((face.index, 1))
-    
-    return output
+    snapshot["verts"], snapshot["verts_flags"] = process_vertices(mesh)
 
+    with profiler.stage("process_faces", snapshot["name"], faces=len(mesh.polygons), loops=len(mesh.loops)):
+        face_order = get_section_order(obj, mesh) if operator.sort_sections else None
+        loop_order, face_order, sides = get_loop_order(mesh, face_order)
+        process_faces(obj, mesh, loop_order, face_order, sides, operator.relative_paths, snapshot)
 
-def process_taggs(obj, bm, logger):
-    object_props = obj.a3ob_properties_object
-    taggs = []
-    tagg_sharps = process_tagg_sharp(bm)
-    if tagg_sharps is not None:
-        taggs.append(tagg_sharps)
-        logger.step("Collected sharp edges")
-
-    uv_index = 0
-    for layer in bm.loops.layers.uv.values():
-        uvset = process_tagg_uvset(bm, layer)
-        uvset.data.id = uv_index
-        taggs.append(uvset)
-        uv_index += 1
-    logger.step("Collected UV sets")
-    
-    for prop in object_props.properties:
-        taggs.append(process_tagg_property(prop))
-    logger.step("Collected named properties")
+    snapshot["sharp_edges"] = process_sharp_edges(mesh)
+    snapshot["uvsets"] = [get_uvs(mesh, layer, loop_order) for layer in mesh.uv_layers]
+    snapshot["properties"] = [(prop.name, prop.value) for prop in object_props.properties]
 
     # Vertex mass should only be exported for the Geometry LOD
-    if object_props.lod == str(p3d.P3D_LOD_Resolution.GEOMETRY):
-        layer = bm.verts.layers.float.get("a3ob_mass")
-        if layer:
-            taggs.append(process_tagg_mass(bm, layer))
-            logger.step("Collected vertex masses")
+    snapshot["mass"] = None
+    if lod_index == p3d.P3D_LOD_Resolution.GEOMETRY and "a3ob_mass" in mesh.attributes:
+        snapshot["mass"] = get_attribute(mesh, "a3ob_mass", len(mesh.vertices), np.float32)
+
+    snapshot["selections"], snapshot["assignments"] = process_selections(obj, mesh, operator.translate_selections)
 
-    taggs.extend(process_taggs_selections(obj, bm))
-    logger.step("Collected selections")
+    return snapshot
 
-    return taggs
 
+def is_duplicate(operator, signature, processed_signatures):
+    if signature in processed_signatures and operator.lod_collisions != 'IGNORE':
+        if operator.lod_collisions == 'FAIL':
+            raise p3d.P3D_Error("Duplicate LODs detected")
+        return True
+    
+    processed_signatures.add(signature)
 
-def translate_selections(p3dm):
-    for tagg in p3dm.taggs:
-        tagg.name = data.translations_english_czech.get(tagg.name.lower(), tagg.name)
+    return False
 
 
-def process_lod(operator, obj, proxy_lookup, is_valid, processed_signatures, logger):
+def process_lod(operator, obj, proxy_lookup, is_valid, processed_signatures, logger, profiler):
     object_props = obj.a3ob_properties_object
     lod_name = object_props.get_name()
 
@@ -603,70 +945,174 @@ def process_lod(operator, obj, proxy_lookup, is_valid, processed_signatures, log
         logger.step(">> Failed validation -> skipping LOD (run manual validation for details)")
         return None
 
-    logger.start_subproc("Processing data:")
-    output = p3d.P3D_LOD()
-    lod_idx = int(object_props.lod)
-    if lod_idx != data.lod_unknown:
-        output.resolution.set(lod_idx, object_props.resolution)
-    else:
-        output.resolution.set(lod_idx, object_props.resolution_float)
+    lod_index = int(object_props.lod)
+    lod_resolution = object_props.resolution_float if lod_index == data.lod_unknown else object_props.resolution
+    resolution = p3d.P3D_LOD_Resolution()
+    resolution.set(lod_index, lod_resolution)
     
-    signature = float(output.resolution)
-    if signature in processed_signatures and operator.lod_collisions != 'IGNORE':
-        if operator.lod_collisions == 'FAIL':
-            raise p3d.P3D_Error("Duplicate LODs detected")
+    signature = float(resolution)
+    if is_duplicate(operator, signature, processed_signatures):
         logger.step(">> Duplicate -> skipping LOD")
-        logger.end_subproc()
         return None
-    else:
-        processed_signatures.add(signature)
 
-    mesh = obj.data
+    with profiler.stage("get_snapshot", obj["a3ob_original_object"], verts=len(obj.data.vertices), faces=len(obj.data.polygons)):
+        snapshot = get_snapshot(operator, obj, proxy_lookup, lod_index, lod_resolution, signature, profiler)
+    logger.step("Collected mesh data")
+
+    logger.start_subproc("File report:")
+    logger.step("Signature: %d" % signature)
+    logger.step("Type: P3DM")
+    logger.step("Version: 28.256")
+    logger.end_subproc()
 
-    normals, normals_lookup_dict = process_normals(mesh)
-    output.normals = normals
-    logger.step("Collected vertex normals")
+    return snapshot
 
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.normal_update()
-    bm.verts.ensure_lookup_table()
-    bm.edges.ensure_lookup_table()
-    bm.faces.ensure_lookup_table()
 
-    output.verts = process_vertices(bm)
-    logger.step("Collected vertices")
-    output.faces = process_faces(obj, bm, normals_lookup_dict, operator.relative_paths)
-    logger.step("Collected faces")
-    output.taggs = process_taggs(obj, bm, logger)
+# Build and serialize the LODs in worker processes. The workers only load the standalone
+# data handler modules, and the snapshots are passed to them as plain arrays and values.
+# The results are plain values as well (the LOD data is a bytearray), so no classes
+# of the standalone modules are mixed into the add-on data. If the worker processes cannot
+# be started (or the pool breaks), the LODs are serialized sequentially in the main process.
+# The results are returned in the order of the snapshots.
+# [(resolution signature, LOD data, (vertex count, normal count, face count, TAGG count), [profiling records]), ...]
+def serialize_lods_parallel(snapshots, max_workers = None, profile = False, logger = None):
+    logger = logger or ProcessLoggerNull()
+    standalone_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standalone.py")
 
-    if operator.renumber_components:
-        output.renumber_components()
-        logger.step("Renumbered component selections")
+    try:
+        standalone = runpy.run_path(standalone_path)
+        task = standalone["import_module"]("serialize_p3d").serialize_lod_task
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers, mp_context=context, initializer=runpy.run_path, initargs=(standalone_path,)) as executor:
+            return list(executor.map(task, snapshots, [profile] * len(snapshots)))
+    except (BrokenProcessPool, OSError) as ex:
+        logger.step("Worker processes are not available (%s), serializing %d LODs sequentially" % (ex, len(snapshots)))
     
-    if operator.translate_selections:
-        translate_selections(output)
-        logger.step("Translated selections to czech")
+    return [serialize_p3d.serialize_lod_task(snapshot, profile) for snapshot in snapshots]
+
+
+# Incremental export
+# The LOD objects are fingerprinted before any processing, and the serialized LODs of the
+# objects with unchanged fingerprints are reused from the cache. The fingerprint covers
+# everything that the output depends on: the (evaluated) mesh data, the modifiers, transforms,
+# materials, flags and properties of the LOD object and its children, as well as the relevant
+# export options and add-on preferences. The name of the object is not included, so renaming
+# does not invalidate the cache.
+# The validation of the LODs is also a function of these inputs, and only objects with all
+# of their LODs passing the validation are cached, so a cache hit stands for a validated LOD.
+# The add-on version is part of the fingerprint as well, to not reuse LODs that were validated
+# or serialized by different rules.
+
+
+fingerprint_options = (
+    "relative_paths",
+    "apply_transforms",
+    "apply_modifiers",
+    "preserve_normals",
+    "validate_meshes",
+    "use_evaluated",
+    "sort_sections",
+    "generate_components",
+    "validate_lods",
+    "validate_lods_warning_errors",
+    "renumber_components",
+    "force_lowercase",
+    "translate_selections"
+)
+
+
+def hash_values(digest, *values):
+    digest.update(repr(values).encode('utf8'))
+
+
+def hash_arrays(digest, *arrays):
+    for array in arrays:
+        digest.update(np.ascontiguousarray(array).tobytes())
+
+
+def hash_mesh(digest, obj, mesh):
+    count_verts = len(mesh.vertices)
+    count_faces = len(mesh.polygons)
+
+    coords, flags_vertex = process_vertices(mesh)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    starts = np.empty(count_faces, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    materials = np.empty(count_faces, dtype=np.int32)
+    mesh.polygons.foreach_get("material_index", materials)
+    smooth = np.empty(count_faces, dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", smooth)
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+
+    hash_arrays(digest, coords, flags_vertex, loop_verts, starts, materials, smooth, edges, computils.mesh_get_sharp_edges(mesh))
+    hash_arrays(digest, get_attribute(mesh, "a3ob_flags_face", count_faces, np.int32), get_attribute(mesh, "a3ob_mass", count_verts, np.float32))
+    hash_arrays(digest, computils.mesh_get_corner_normals(mesh))
+    
+    for layer in mesh.uv_layers:
+        uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+        layer.data.foreach_get("uv", uvs)
+        hash_values(digest, layer.name)
+        hash_arrays(digest, uvs)
+    
+    hash_values(digest, [group.name for group in obj.vertex_groups])
+    hash_arrays(digest, *get_group_assignments(mesh))
 
-    bm.free()
 
-    # The placeholder proxy selection names must be replaced with the actual names.
-    output.placeholders_to_proxies(proxy_lookup)
-    logger.step("Finalized proxy selection names")
-    logger.end_subproc()
+def hash_object(digest, operator, obj, depsgraph):
+    hash_values(digest, obj.type, [tuple(row) for row in obj.matrix_world])
+    if obj.type != 'MESH':
+        return
+    
+    hash_values(digest, [(mod.name, mod.type, mod.show_viewport) for mod in obj.modifiers])
+    obj.update_from_editmode()
+    if operator.apply_modifiers:
+        obj_eval = obj.evaluated_get(depsgraph)
+        try:
+            hash_mesh(digest, obj, obj_eval.to_mesh(preserve_all_data_layers=True, depsgraph=depsgraph))
+        finally:
+            obj_eval.to_mesh_clear()
+    else:
+        hash_mesh(digest, obj, obj.data)
 
-    logger.start_subproc("File report:")
-    logger.step("Signature: %d" % float(output.resolution))
-    logger.step("Type: P3DM")
-    logger.step("Version: 28.256")
-    logger.step("Vertices: %d" % len(output.verts))
-    logger.step("Normals: %d" % len(output.normals))
-    logger.step("Faces: %d" % len(output.faces))
-    logger.step("Taggs: %d" % (len(output.taggs) + 1))
+    hash_values(digest, [slot.material.a3ob_properties_material.to_p3d(operator.relative_paths) if slot.material else None for slot in obj.material_slots])
 
-    logger.end_subproc()
+    flag_props = obj.a3ob_properties_object_flags
+    hash_values(digest, [item.get_flag() for item in flag_props.vertex], [item.get_flag() for item in flag_props.face])
 
-    return output
+    object_props = obj.a3ob_properties_object
+    hash_values(digest, object_props.is_a3_lod, object_props.lod, object_props.resolution, object_props.resolution_float)
+    hash_values(digest, [(prop.name, prop.value) for prop in object_props.properties])
+    hash_values(digest, [(copy.lod, copy.resolution, copy.resolution_float) for copy in object_props.copies])
+
+    proxy_props = obj.a3ob_properties_object_proxy
+    hash_values(digest, proxy_props.is_a3_proxy)
+    if proxy_props.is_a3_proxy:
+        hash_values(digest, proxy_props.to_placeholder(operator.relative_paths))
+
+
+def get_fingerprint(operator, obj, depsgraph):
+    digest = hashlib.sha1()
+
+    prefs = get_prefs()
+    hash_values(digest, bl_info["version"], [getattr(operator, name) for name in fingerprint_options], prefs.flag_vertex, prefs.flag_face)
+    hash_object(digest, operator, obj, depsgraph)
+    for child in obj.children:
+        hash_object(digest, operator, child, depsgraph)
+    
+    return digest.hexdigest()
+
+
+# The disk cache is kept in a folder next to the .blend file, so it is only available
+# for saved files.
+def get_lod_cache(operator):
+    directory = None
+    if operator.incremental_disk and bpy.data.filepath:
+        directory = os.path.splitext(bpy.data.filepath)[0] + "_p3d_cache"
+    
+    return cache_p3d.get_lod_cache(directory)
 
 
 def write_file(operator, context, file, temp_collection):
@@ -680,13 +1126,59 @@ def write_file(operator, context, file, temp_collection):
     
     logger = ProcessLogger()
     logger.start_subproc("P3D export to %s" % operator.filepath)
+    profiler = StageProfiler() if operator.profile else StageProfilerNull()
+
+    export_objects = get_export_objects(operator, context)
+
+    # LODs imported in deferred mode have no mesh data until they are built with the
+    # Build LOD operator, so they are left out of the export.
+    deferred_objects = [obj for obj in export_objects if obj.a3ob_properties_object.deferred]
+    for obj in deferred_objects:
+        logger.step("Skipped deferred LOD that is not built yet: %s" % obj.name)
+    
+    export_objects = [obj for obj in export_objects if not obj.a3ob_properties_object.deferred]
+    if len(export_objects) == 0:
+        raise p3d.P3D_Error("Deferred LODs have to be built before export, cannot write P3D with 0 LODs")
+
+    # In incremental mode only the changed LOD objects are processed, the rest is reused from the cache.
+    cached_lods = []
+    fingerprints = {}
+    used_fingerprints = []
+    if operator.incremental:
+        lod_cache = get_lod_cache(operator)
+        depsgraph = context.evaluated_depsgraph_get()
+        changed_objects = []
+        for obj in export_objects:
+            with profiler.stage("fingerprint", obj.name):
+                fingerprint = get_fingerprint(operator, obj, depsgraph)
+            
+            used_fingerprints.append(fingerprint)
+            lods = lod_cache.get(operator.filepath, fingerprint)
+            if lods is None:
+                fingerprints[obj.name] = fingerprint
+                changed_objects.append(obj)
+            else:
+                cached_lods.extend(lods)
+        
+        logger.step("Reused %d unchanged LOD objects from cache (%s)" % (len(export_objects) - len(changed_objects), lod_cache.stats()))
+        export_objects = changed_objects
 
     # Gather all exportable LOD objects, duplicate them, merge their components, and validate for LOD type.
     # Produce the final mesh data, proxy lookup table and validity for each LOD.
-    lod_list = get_lod_data(operator, context, validator, temp_collection)
+    lod_list = []
+    depsgraph = context.evaluated_depsgraph_get() if operator.use_evaluated else None
+    for obj in export_objects:
+        with profiler.stage("get_lod_data", obj.name) as counts:
+            if operator.use_evaluated:
+                lods = get_lod_data_evaluated(operator, depsgraph, obj, validator, temp_collection, profiler)
+            else:
+                lods = get_lod_data(operator, obj, validator, temp_collection, profiler)
+            
+            counts["lods"] = len(lods)
+            lod_list.extend(lods)
     
     logger.step("Preprocessing done in %f sec" % (time.time() - logger.times[0]))
-    logger.step("Detected %d LOD objects" % len(lod_list))
+    logger.step("Detected %d LOD objects" % (len(lod_list) + len(cached_lods)))
 
     mlod = p3d.P3D_MLOD()
     logger.step("File type: MLOD")
@@ -695,36 +1187,84 @@ def write_file(operator, context, file, temp_collection):
     logger.step("Processing LOD data:")
     logger.start_subproc()
 
-    mlod_lods = []
+    results = []
     processed_signatures = set()
+    for signature, lod_data in cached_lods:
+        if not is_duplicate(operator, signature, processed_signatures):
+            results.append((signature, lod_data))
+
+    snapshots = []
+    lod_counts = {}
+    invalid_objects = set()
     for i, (lod, proxy_lookup, is_valid) in enumerate(lod_list):
-        logger.start_subproc("LOD %d: %s" % (i + 1, lod["a3ob_original_object"]))
+        name = lod["a3ob_original_object"]
+        lod_counts[name] = lod_counts.get(name, 0) + 1
+        if not is_valid:
+            invalid_objects.add(name)
+        logger.start_subproc("LOD %d: %s" % (i + 1, name))
 
-        new_lod = process_lod(operator, lod, proxy_lookup, is_valid, processed_signatures, logger)
-        if new_lod:
-            mlod_lods.append(new_lod)
+        snapshot = process_lod(operator, lod, proxy_lookup, is_valid, processed_signatures, logger, profiler)
+        if snapshot:
+            snapshots.append(snapshot)
 
         logger.end_subproc(True)
         wm.progress_update(i + 1)
     
     logger.end_subproc()
 
-    if len(mlod_lods) == 0:
+    if len(snapshots) + len(results) == 0:
         raise p3d.P3D_Error("All LODs failed validation, cannot write P3D with 0 LODs")
 
+    # The LODs are independent from each other, so with enough of them, the building
+    # and serialization is worth distributing among multiple processes.
+    time_start = time.time()
+    if operator.use_multiprocessing and len(snapshots) > 1:
+        serialized = serialize_lods_parallel(snapshots, min(len(snapshots), os.cpu_count() or 1), operator.profile, logger)
+        logger.step("Serialized %d LODs in worker processes in %f sec" % (len(serialized), time.time() - time_start))
+    else:
+        serialized = [serialize_p3d.serialize_lod_task(snapshot, operator.profile) for snapshot in snapshots]
+        logger.step("Serialized %d LODs in %f sec" % (len(serialized), time.time() - time_start))
+
+    lods_by_object = {}
+    for snapshot, (signature, lod_data, counts, records) in zip(snapshots, serialized):
+        profiler.merge(records)
+        results.append((signature, lod_data))
+        lods_by_object.setdefault(snapshot["name"], []).append((signature, lod_data))
+
+        logger.start_subproc("LOD report: %s (%d)" % (snapshot["name"], signature))
+        logger.step("Vertices: %d" % counts[0])
+        logger.step("Normals: %d" % counts[1])
+        logger.step("Faces: %d" % counts[2])
+        logger.step("Taggs: %d" % counts[3])
+        logger.end_subproc()
+    
+    # Objects are only cached if all of their LODs passed the validation and were exported.
+    for name, fingerprint in fingerprints.items():
+        lods = lods_by_object.get(name, [])
+        if name in invalid_objects or len(lods) != lod_counts.get(name, 0):
+            continue
+        
+        try:
+            lod_cache.put(operator.filepath, fingerprint, lods)
+        except OSError as ex:
+            logger.step("Could not write %s to disk cache: %s" % (name, ex))
+    
+    if operator.incremental:
+        lod_cache.prune(operator.filepath, used_fingerprints)
+
     # LODs should be sorted by their resolution signature.
-    mlod_lods.sort(key=lambda lod: float(lod.resolution))
-    mlod.lods = mlod_lods
+    results.sort(key=lambda item: item[0])
     logger.step("Sorted LODs")
 
-    if operator.force_lowercase:
-        mlod.force_lowercase()
-        logger.step("Forced lowercase")
-
-    mlod.write(file)
+    with profiler.stage("mlod.write", lods=len(results)):
+        mlod.write_serialized(file, [lod_data for signature, lod_data in results])
+    
+    if operator.profile:
+        profiler.write_reports(operator.filepath)
+        logger.step("Wrote profiling reports")
     
     logger.end_subproc()
     wm.progress_end()
     logger.step("P3D export finished in %f sec" % (time.time() - logger.times.pop()))
 
-    return len(lod_list), len(mlod_lods)
+    return len(lod_list) + len(cached_lods) + len(deferred_objects), len(results)
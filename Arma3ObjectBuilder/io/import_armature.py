@@ -6,7 +6,8 @@ import bpy
 from mathutils import Vector
 
 from . import data_p3d
-from ..utilities.logger import ProcessLogger
+from .import_p3d import get_cache
+from ..utilities.logger import ProcessLogger, ProcessLoggerNull
 
 
 def vector_average(vectors):
@@ -26,12 +27,12 @@ def extract_pivot_coords(lod):
         if not tagg.is_selection():
             continue
 
-        data = tagg.data
-        if len(data.weight_verts) < 1:
+        indices, _ = tagg.data.nonzero_verts()
+        if len(indices) < 1:
             continue
 
-        vert_idx = data.weight_verts[0][0]
-        vert_co = lod.verts[vert_idx][0:3]
+        vert_idx = indices[0]
+        vert_co = lod.verts[vert_idx]
 
         pivot_points[tagg.name.lower()] = Vector(vert_co)
         
@@ -53,9 +54,22 @@ def fake_pivot_coords(unknown, pivots):
     return placeholders
 
 
-def read_pivots(pivots_path):
-    p3d_data = data_p3d.P3D_MLOD.read_file(pivots_path)
-    memory = p3d_data.find_lod(data_p3d.P3D_LOD_Resolution.MEMORY)
+# Only the Memory LOD is needed, so without a cache the file is read lazily to skip decoding
+# the rest. The cache can only store complete files, so on a cache miss the whole file is read.
+def read_pivots(pivots_path, cache = None, logger = None):
+    logger = logger or ProcessLoggerNull()
+    p3d_data = cache.get(pivots_path) if cache else None
+    if p3d_data is not None:
+        memory = p3d_data.find_lod(data_p3d.P3D_LOD_Resolution.MEMORY)
+    elif cache:
+        p3d_data = data_p3d.P3D_MLOD.read_file(pivots_path)
+        if not cache.put(pivots_path, p3d_data):
+            logger.step("Could not write file to cache: %s" % cache.directory)
+        memory = p3d_data.find_lod(data_p3d.P3D_LOD_Resolution.MEMORY)
+    else:
+        with data_p3d.P3D_MLOD_Lazy.read_file(pivots_path) as p3d_data:
+            memory = p3d_data.find_lod(data_p3d.P3D_LOD_Resolution.MEMORY)
+    
     if not memory:
         return {}
     
@@ -144,7 +158,10 @@ def import_armature(operator, skeleton):
     logger = ProcessLogger()
     logger.start_subproc("Armature reconstruction from pivots from %s" % operator.filepath)
     logger.step("Skeleton definition: %s" % skeleton.name)
-    pivots = read_pivots(operator.filepath)
+    cache = get_cache()
+    pivots = read_pivots(operator.filepath, cache, logger)
+    if cache:
+        logger.step("P3D cache: %s" % cache.stats())
     logger.step("Potential pivot points: %d" % len(pivots))
     pos_known, pos_unknown = filter_bones(list(skeleton.bones), pivots)
     logger.step("Bones without pivot point: %s" % len(pos_unknown))
@@ -5,23 +5,32 @@
 
 import time
 import os
+import json
+import runpy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
 
 import bpy
-import bmesh
 import mathutils
+import numpy as np
 
 from . import data_p3d as p3d
+from . import cache_p3d
+from .profiler import StageProfiler, StageProfilerNull
+from .. import get_prefs
 from ..utilities import generic as utils
 from ..utilities import lod as lodutils
 from ..utilities import compat as computils
 from ..utilities import proxy as proxyutils
-from ..utilities import flags as flagutils
+from ..utilities import materials as matutils
 from ..utilities import structure as structutils
 from ..utilities import data
 from ..utilities.logger import ProcessLogger
 
 
-def categorize_lods(operator, context, mlod):
+def categorize_lods(operator, context, lods_source):
     categories = {}
     lods = []
 
@@ -32,10 +41,10 @@ def categorize_lods(operator, context, mlod):
     
     if operator.groupby == 'NONE':
         categories["None"] = [0, root]
-        lods = [[*lod.resolution.get(), 0] for lod in mlod.lods]
+        lods = [[*lod.resolution.get(), 0] for lod in lods_source]
 
     else:
-        for lod in mlod.lods:
+        for lod in lods_source:
             lod_index, lod_resolution = lod.resolution.get()
             group_dict = data.lod_groups[operator.groupby]
             group_name = group_dict[lod_index]
@@ -50,10 +59,47 @@ def categorize_lods(operator, context, mlod):
     return [cat[1] for cat in categories.values()], lods
 
 
-def create_blender_materials(lookup, absolute):
+# Translate the LOD type filter of the operator to the set of LOD indices to import.
+# None is returned if every type is enabled, so no filtering is needed.
+def get_lod_types(operator):
+    if len(operator.lod_types) == len(lod_type_groups):
+        return None
+    
+    groups = {lod_type_groups[item] for item in operator.lod_types}
+    return {idx for idx, group in data.lod_groups_type.items() if group in groups}
+
+
+# Cache of parsed files if it is enabled in the add-on preferences.
+def get_cache():
+    prefs = get_prefs()
+    if prefs.cache_dir == "":
+        return None
+    
+    return cache_p3d.get_cache(bpy.path.abspath(prefs.cache_dir), prefs.cache_size * 1024 * 1024)
+
+
+lod_type_groups = {
+    'VISUALS': "Visuals",
+    'SHADOWS': "Shadows",
+    'GEOMETRIES': "Geometries",
+    'POINTCLOUDS': "Point clouds",
+    'MISC': "Misc"
+}
+
+
+# Materials already in the blend file are reused, if one with the same normalized
+# texture-material pair is found in the registry.
+def create_blender_materials(lookup, absolute, registry = None):
     materials = []
     
     for texture, material in lookup.keys():
+        if registry is not None:
+            key = matutils.get_p3d_key(texture, material)
+            existing = registry.get(key)
+            if existing:
+                materials.append(existing)
+                continue
+        
         material_name = "P3D: %s :: %s" % (os.path.basename(texture), os.path.basename(material))
         if texture == "" and material == "":
             material_name = "P3D: no material"
@@ -61,6 +107,9 @@ def create_blender_materials(lookup, absolute):
         new_mat = bpy.data.materials.new(material_name)
         new_mat.a3ob_properties_material.from_p3d(texture.strip(), material.strip(), absolute)
         materials.append(new_mat)
+
+        if registry is not None:
+            registry[key] = new_mat
         
     return materials
 
@@ -75,7 +124,25 @@ def process_normals(mesh, lod):
     return False
 
 
-def process_sharps(bm, lod):
+# The mesh is built directly from the flat LOD arrays.
+def create_mesh(name, lod):
+    mesh = bpy.data.meshes.new(name)
+
+    mesh.vertices.add(len(lod.verts))
+    mesh.vertices.foreach_set("co", lod.verts.ravel())
+
+    mesh.loops.add(len(lod.face_verts))
+    mesh.loops.foreach_set("vertex_index", lod.face_verts.astype(np.int32))
+
+    mesh.polygons.add(len(lod.face_sides))
+    computils.mesh_set_polygons(mesh, lod.face_starts().astype(np.int32), lod.face_sides.astype(np.int32))
+
+    mesh.update(calc_edges=True)
+
+    return mesh
+
+
+def process_sharps(mesh, lod):
     data = None
     for tagg in lod.taggs:
         if tagg.name == "#SharpEdges#":
@@ -85,54 +152,49 @@ def process_sharps(bm, lod):
     if not data:
         return
     
-    for edge in bm.edges:
-        edge.smooth = True
+    edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+    mesh.edges.foreach_get("vertices", edges)
+    sharp = p3d.match_edges(edges.reshape((-1, 2)), np.array(data.edges, dtype=np.int64).reshape((-1, 2)))
     
-    for item in data.edges:
-        edge = bm.edges.get([bm.verts[item[0]], bm.verts[item[1]]])
-        if edge:
-            edge.smooth = False
+    computils.mesh_set_sharp_edges(mesh, sharp)
 
 
-def process_uvsets(bm, lod):
+def process_uvsets(mesh, lod):
     uvsets = lod.uvsets()
+    count = 0
         
     for idx in uvsets:
-        uvs = uvsets[idx]
+        uvs = np.asarray(uvsets[idx], dtype=np.float32).ravel()
+        if len(uvs) != len(mesh.loops) * 2:
+            continue
+
         layer_name = "UVSet %d" % idx
-        layer = bm.loops.layers.uv.get(layer_name)
+        layer = mesh.uv_layers.get(layer_name)
         if not layer:
-            layer = bm.loops.layers.uv.new(layer_name) 
+            layer = mesh.uv_layers.new(name=layer_name)
         
-        for face in bm.faces:
-            for loop in face.loops:
-                loop[layer].uv = uvs[loop.index]
+        layer.data.foreach_set("uv", uvs)
+        count += 1
     
-    return len(uvsets)
+    return count
 
 
-def process_selections(bm, lod):
-    bm.verts.layers.deform.verify()
-    layer = bm.verts.layers.deform.active
-    
+def process_selections(obj, lod):
     selection_names = []
-    count_selections = 0
     for tagg in lod.taggs:
         if tagg.name[0] == tagg.name[-1] == "#":
             continue
         
-        weights = tagg.data.weight_verts
-        for idx, weight in weights:
-            bm.verts[idx][layer][count_selections] = weight
-
-        count_selections += 1
+        group = obj.vertex_groups.new(name=tagg.name)
+        for weight, indices in tagg.data.grouped_verts():
+            group.add(indices.tolist(), weight, 'REPLACE')
         
         selection_names.append(tagg.name)
     
     return selection_names
 
 
-def process_materials(operator, mesh, bm, lod, materials, materials_lookup):
+def process_materials(operator, mesh, lod, materials, materials_lookup):
     slot_indices = []
     material_indices = []
     if operator.sections == 'PRESERVE':
@@ -140,14 +202,14 @@ def process_materials(operator, mesh, bm, lod, materials, materials_lookup):
     elif operator.sections == 'MERGE':
         slot_indices, material_indices = lod.get_sections_merged(materials_lookup)
     
-    for i, idx in enumerate(slot_indices):
-        bm.faces[i].material_index = idx
+    if len(slot_indices) == len(mesh.polygons):
+        mesh.polygons.foreach_set("material_index", np.asarray(slot_indices, dtype=np.int32))
     
     for idx in material_indices:
         mesh.materials.append(materials[idx])
 
 
-def process_mass(bm, lod):
+def process_mass(mesh, lod):
     data = None
     for tagg in lod.taggs:
         if tagg.name == "#Mass#":
@@ -157,9 +219,8 @@ def process_mass(bm, lod):
     if not data:
         return
     
-    layer = bm.verts.layers.float.new("a3ob_mass")
-    for vert in bm.verts:
-        vert[layer] = data.masses[vert.index]
+    layer = mesh.attributes.new("a3ob_mass", 'FLOAT', 'POINT')
+    layer.data.foreach_set("value", np.asarray(data.masses, dtype=np.float32))
 
 
 def process_properties(obj, lod):
@@ -172,12 +233,11 @@ def process_properties(obj, lod):
         new_prop.value = tagg.data.value
 
 
-def process_flag_groups_vertex(obj, bm, lod):
+def process_flag_groups_vertex(obj, mesh, lod):
     groups, values = lod.flag_groups_vertex()
 
-    layer = flagutils.get_layer_flags_vertex(bm)
-    for vert in bm.verts:
-        vert[layer] = values[vert.index]
+    layer = mesh.attributes.new("a3ob_flags_vertex", 'INT', 'POINT')
+    layer.data.foreach_set("value", np.asarray(values, dtype=np.int32))
     
     for i, grp in enumerate(groups):
         new_group = obj.a3ob_properties_object_flags.vertex.add()
@@ -185,12 +245,11 @@ def process_flag_groups_vertex(obj, bm, lod):
         new_group.set_flag(grp)
 
 
-def process_flag_groups_face(obj, bm, lod):
+def process_flag_groups_face(obj, mesh, lod):
     groups, values = lod.flag_groups_face()
 
-    layer = flagutils.get_layer_flags_face(bm)
-    for face in bm.faces:
-        face[layer] = values[face.index]
+    layer = mesh.attributes.new("a3ob_flags_face", 'INT', 'FACE')
+    layer.data.foreach_set("value", np.asarray(values, dtype=np.int32))
     
     for i, grp in enumerate(groups):
         new_group = obj.a3ob_properties_object_flags.face.add()
@@ -198,93 +257,70 @@ def process_flag_groups_face(obj, bm, lod):
         new_group.set_flag(grp)
 
 
-# Align the object coordinate system with the proxy coordinates.
+# Align the object coordinate system with the proxy coordinates. The rotation and the
+# translation are combined, so the mesh is only transformed once.
 # https://mrcmodding.gitbook.io/home/documents/proxy-coordinates
 def transform_proxy(obj):
     if len(obj.data.vertices) < 3:
         return
     
     rotation_matrix = proxyutils.get_transform_rotation(obj)
-    obj.data.transform(rotation_matrix)
-    obj.matrix_world @= rotation_matrix.inverted()
-    
-    translate = mathutils.Matrix.Translation(-proxyutils.find_axis_vertices(obj.data)[0].co)
-    obj.data.transform(translate)
-    obj.matrix_world @= translate.inverted()
-    
+    center = proxyutils.find_axis_vertices(obj.data)[0].co
+    matrix = mathutils.Matrix.Translation(-(rotation_matrix @ center)) @ rotation_matrix
+
+    obj.data.transform(matrix)
+    obj.matrix_world @= matrix.inverted()
     obj.data.update()
 
 
-def process_proxies(operator, obj, proxy_lookup, empty_material):
-    bpy.context.view_layer.objects.active = obj
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
+# The proxy objects are created from the proxy triangles separated from the parsed LOD data.
+def create_proxy(operator, obj, proxy, empty_material):
+    path, index, verts, faces, selections = proxy
 
-    for key in proxy_lookup:
-        vgroup = obj.vertex_groups.get(key)
-        if not vgroup:
-            continue
-            
-        obj.vertex_groups.active = vgroup
-        computils.call_operator_ctx(bpy.ops.object.vertex_group_select)
-
-        try:
-            bpy.ops.mesh.separate(type='SELECTED')
-            obj.vertex_groups.remove(vgroup)
-        except:
-            pass
+    mesh = bpy.data.meshes.new("proxy")
+    mesh.from_pydata(verts.tolist(), [], faces)
+    mesh.update(calc_edges=True)
 
-    bpy.ops.object.mode_set(mode='OBJECT')
+    proxy_obj = bpy.data.objects.new("proxy", mesh)
+    for name, weights in selections:
+        group = proxy_obj.vertex_groups.new(name=name)
+        values, inverse = np.unique(weights, return_inverse=True)
+        for i, weight in enumerate(values.tolist()):
+            if weight != 0:
+                group.add(np.flatnonzero(inverse == i).tolist(), weight, 'REPLACE')
     
-    proxy_objects = [proxy for proxy in bpy.context.selected_objects if proxy != obj]
-        
-    bpy.ops.object.select_all(action='DESELECT')
-    
-    if operator.proxy_action == 'CLEAR':
-        for obj in proxy_objects:
-            bpy.data.meshes.remove(obj.data)
-
-    elif operator.proxy_action == 'SEPARATE':
-        for i, proxy_obj in enumerate(proxy_objects):
-            proxy_obj.a3ob_properties_object.is_a3_lod = False
-
-            transform_proxy(proxy_obj)
-            structutils.cleanup_vertex_groups(proxy_obj) # need to remove the unused groups leftover from the separation
-
-            vgroup = proxy_obj.vertex_groups.get("@proxy_%d" % i)
-            if not vgroup:
-                continue
-            
-            path, index = proxy_lookup[vgroup.name]
-            proxy_obj.vertex_groups.remove(vgroup)
-            proxy_obj.a3ob_properties_object_proxy.proxy_path = utils.restore_absolute(path, ".p3d") if operator.absolute_paths else path
-            proxy_obj.a3ob_properties_object_proxy.proxy_index = index
+    if operator.translate_selections:
+        translate_selections(proxy_obj)
 
-            proxy_obj.a3ob_properties_object_flags.vertex.clear()
-            proxy_obj.a3ob_properties_object_flags.face.clear()
+    transform_proxy(proxy_obj)
 
-            proxy_obj.display_type = 'WIRE'
-            proxy_obj.show_name = True
+    proxy_obj.a3ob_properties_object_proxy.proxy_path = utils.restore_absolute(path, ".p3d") if operator.absolute_paths else path
+    proxy_obj.a3ob_properties_object_proxy.proxy_index = index
+    proxy_obj.a3ob_properties_object_proxy.is_a3_proxy = True
 
-            bm = bmesh.new()
-            bm.from_mesh(proxy_obj.data)
+    proxy_obj.display_type = 'WIRE'
+    proxy_obj.show_name = True
 
-            flagutils.clear_layer_flags_vertex(bm)
-            flagutils.clear_layer_flags_face(bm)
+    if empty_material is not None:
+        mesh.materials.append(empty_material)
+    
+    proxy_obj.parent = obj
+    name = "proxy: %s" % proxy_obj.a3ob_properties_object_proxy.get_name()
+    proxy_obj.name = name
+    mesh.name = name
 
-            bm.to_mesh(proxy_obj.data)
-            bm.free()
+    for collection in obj.users_collection:
+        collection.objects.link(proxy_obj)
+    
+    return proxy_obj
 
-            proxy_obj.a3ob_properties_object_proxy.is_a3_proxy = True
-            proxy_obj.data.materials.clear()
-            if empty_material is not None:
-                proxy_obj.data.materials.append(empty_material)
-            proxy_obj.parent = obj
-            name = "proxy: %s" % proxy_obj.a3ob_properties_object_proxy.get_name()
-            proxy_obj.name = name
-            proxy_obj.data.name = name
 
-            utils.clear_uvs(proxy_obj)
+def process_proxies(operator, obj, proxies, empty_material):
+    if operator.proxy_action != 'SEPARATE':
+        return
+    
+    for proxy in proxies:
+        create_proxy(operator, obj, proxy, empty_material)
 
 
 def translate_selections(obj):
@@ -292,7 +328,8 @@ def translate_selections(obj):
         group.name = data.translations_czech_english.get(group.name.lower(), group.name)
 
 
-def process_lod(operator, logger, lod, materials, materials_lookup, categories, lod_links):
+def process_lod(operator, logger, lod, materials, materials_lookup, categories, lod_links, profiler = None):
+    profiler = profiler or StageProfilerNull()
     lod_index = lod_links[0]
     lod_resolution = lod_links[1]
     lod_name = lodutils.format_lod_name(lod_index, lod_resolution)
@@ -304,87 +341,85 @@ def process_lod(operator, logger, lod, materials, materials_lookup, categories,
     logger.step("Version: 28.256")
     logger.step("Vertices: %d" % len(lod.verts))
     logger.step("Normals: %d" % len(lod.normals))
-    logger.step("Faces: %d" % len(lod.faces))
+    logger.step("Faces: %d" % len(lod.face_sides))
     logger.step("Taggs: %d" % (len(lod.taggs) + 1))
     logger.end_subproc()
 
     logger.start_subproc("Processing data:")
+
+    # The proxy triangles are separated before the LOD mesh is created, so they
+    # do not have to be removed from the mesh later.
+    proxies = []
+    if operator.proxy_action != 'NOTHING' and 'SELECTIONS' in operator.additional_data:
+        proxies = lod.extract_proxies()
+        logger.step("Separated proxies: %d" % len(proxies))
     
-    mesh = bpy.data.meshes.new(lod_name)
-    
-    mesh.from_pydata(*lod.pydata())
-    mesh.update(calc_edges=True)
-    
-    obj = bpy.data.objects.new(lod_name, mesh)
+    with profiler.stage("create_mesh", lod_name, verts=len(lod.verts), faces=len(lod.face_sides)):
+        mesh = create_mesh(lod_name, lod)
+        obj = bpy.data.objects.new(lod_name, mesh)
 
     logger.step("Created raw mesh")
 
     # Setup LOD properties
     object_props = obj.a3ob_properties_object
-    object_props.lod = str(lod_index)
-    
-    if lod_index != data.lod_unknown:
-        object_props.resolution = lod_resolution
-    else:
-        object_props.resolution_float = lod_resolution
+    set_lod_resolution(object_props, lod_index, lod_resolution)
 
     if lod_index not in data.lod_shadows:
-        for face in mesh.polygons:
-            face.use_smooth = True
-        
+        mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
         computils.mesh_auto_smooth(mesh)
     
-    if 'NORMALS' in operator.additional_data and lod_index in data.lod_visuals:
-        if process_normals(mesh, lod):
-            logger.step("Applied split normals")
-        else:
-            logger.step("Could not apply split normals")
-    
     # Process TAGGs
-    bm = bmesh.new()
-    bm.from_mesh(mesh)
-    bm.verts.ensure_lookup_table()
-    bm.edges.ensure_lookup_table()
-    bm.faces.ensure_lookup_table()
-    
-    process_sharps(bm, lod)
+    process_sharps(mesh, lod)
     logger.step("Marked sharp edges")
     
     if 'UV' in operator.additional_data:
-        count_uv = process_uvsets(bm, lod)
+        count_uv = process_uvsets(mesh, lod)
         logger.step("Added UV channels: %d" % count_uv)
     
-    selection_names = []
-    proxy_lookup = {}
     if 'SELECTIONS' in operator.additional_data:
-        proxy_lookup = lod.proxies_to_placeholders()
-        selection_names = process_selections(bm, lod)
+        placeholders = lod.proxies_to_placeholders()
+        with profiler.stage("process_selections", lod_name) as counts:
+            selection_names = process_selections(obj, lod)
+            counts["selections"] = len(selection_names)
+        
         logger.step("Added vertex groups: %d" % (len(selection_names)))
+
+        # Proxy selections that could not be separated (no complete proxy triangle) are
+        # left as placeholder vertex groups, the original paths are reported instead.
+        if operator.proxy_action != 'NOTHING':
+            for name, (path, index) in placeholders.items():
+                logger.step("Proxy without triangle kept as vertex group %s: %s.%03d" % (name, path, index))
     
     if 'MATERIALS' in operator.additional_data:
-        process_materials(operator, mesh, bm, lod, materials, materials_lookup)
+        with profiler.stage("process_materials", lod_name, materials=len(lod.materials)):
+            process_materials(operator, mesh, lod, materials, materials_lookup)
+        
         logger.step("Assigned materials")
     
     if lod_index == p3d.P3D_LOD_Resolution.GEOMETRY and 'MASS' in operator.additional_data:
-        process_mass(bm, lod)
+        process_mass(mesh, lod)
         logger.step("Added vertex masses")
     
     process_properties(obj, lod)
     logger.step("Added named properties")
 
     if 'FLAGS' in operator.additional_data:
-        process_flag_groups_vertex(obj, bm, lod)
+        process_flag_groups_vertex(obj, mesh, lod)
         logger.step("Assigned vertex flag groups")
 
-        process_flag_groups_face(obj, bm, lod)
+        process_flag_groups_face(obj, mesh, lod)
         logger.step("Assigned face flag groups")
+    
+    if 'NORMALS' in operator.additional_data and lod_index in data.lod_visuals:
+        with profiler.stage("process_normals", lod_name, normals=len(lod.normals)):
+            normals_applied = process_normals(mesh, lod)
         
-    for name in selection_names:
-        obj.vertex_groups.new(name=name)
+        if normals_applied:
+            logger.step("Applied split normals")
+        else:
+            logger.step("Could not apply split normals")
 
-    bm.normal_update()
-    bm.to_mesh(mesh)
-    bm.free()
+    mesh.update()
 
     collection = categories[lod_links[2]]
     collection.objects.link(obj)
@@ -400,10 +435,10 @@ def process_lod(operator, logger, lod, materials, materials_lookup, categories,
         structutils.cleanup_vertex_groups(obj)
         logger.step("Cleaned up vertex groups")
 
-    if operator.proxy_action != 'NOTHING' and 'SELECTIONS' in operator.additional_data:
+    if len(proxies) > 0:
         empty_material = materials[0] if materials is not None else None
-        process_proxies(operator, obj, proxy_lookup, empty_material)
-        logger.step("Processed proxies: %d" % len(proxy_lookup))
+        process_proxies(operator, obj, proxies, empty_material)
+        logger.step("Processed proxies: %d" % len(proxies))
 
     object_props.is_a3_lod = True
 
@@ -412,30 +447,107 @@ def process_lod(operator, logger, lod, materials, materials_lookup, categories,
     return obj
 
 
-def read_file(operator, context, file):
-    # If something is left selected in the scene, the proxy separation trips up with the operators.
-    for obj in bpy.context.selected_objects:
-        obj.select_set(False)
-        
-    context.view_layer.objects.active = None
+def set_lod_resolution(props, lod_index, lod_resolution):
+    props.lod = str(lod_index)
+    if lod_index != data.lod_unknown:
+        props.resolution = lod_resolution
+    else:
+        props.resolution_float = lod_resolution
+
+
+# The LOD types are processed differently in process_lod (shading, mass, custom normals), so
+# identical content may only be shared between LODs of the same processing class.
+def get_lod_class(lod_index):
+    return (lod_index in data.lod_visuals, lod_index in data.lod_shadows, lod_index == p3d.P3D_LOD_Resolution.GEOMETRY)
+
+
+# LODs with content identical to an already imported LOD are created as linked duplicates,
+# sharing the mesh of the original. The proxies are duplicated the same way.
+def create_lod_duplicate(original, categories, lod_links):
+    lod_index = lod_links[0]
+    lod_resolution = lod_links[1]
+
+    obj = original.copy()
+    obj.name = lodutils.format_lod_name(lod_index, lod_resolution)
+    set_lod_resolution(obj.a3ob_properties_object, lod_index, lod_resolution)
+    categories[lod_links[2]].objects.link(obj)
 
+    for child in original.children:
+        child_copy = child.copy()
+        child_copy.parent = obj
+        for collection in child.users_collection:
+            collection.objects.link(child_copy)
+    
+    return obj
+
+
+# Alternatively the identical LODs are only set up as copies of the original, that are
+# created during export.
+def add_lod_copy(original, lod_links):
+    copy = original.a3ob_properties_object.copies.add()
+    set_lod_resolution(copy, lod_links[0], lod_links[1])
+
+
+# The material registry can be passed in, so the existing materials only have to be collected
+# once, when multiple files are imported in one run. New materials are added to it as they are created.
+def read_file(operator, context, file, mlod = None, registry = None):
     wm = context.window_manager
     wm.progress_begin(0, 1000)
     wm.progress_update(0)
     logger = ProcessLogger()
     logger.start_subproc("P3D import from %s" % operator.filepath)
+    profiler = StageProfiler() if operator.profile else StageProfilerNull()
 
     if operator.first_lod_only:
         logger.step("Importing 1st LOD only")
     
+    lod_types = get_lod_types(operator)
+    if lod_types is not None:
+        logger.step("Importing LOD types: %s" % ", ".join([lod_type_groups[item] for item in operator.lod_types]))
+    
+    if operator.deferred and mlod is None:
+        lod_objects = read_file_deferred(operator, context, file, logger)
+        logger.end_subproc()
+        wm.progress_end()
+        logger.step("P3D import finished in %f sec" % (time.time() - logger.times.pop()))
+
+        return lod_objects
+    
     time_read_start = time.time()
-    mlod = p3d.P3D_MLOD.read(file, operator.first_lod_only)
+    with profiler.stage("mlod.read") as counts:
+        cache = get_cache() if mlod is None else None
+        cached = cache.get(operator.filepath) if cache else None
+        # When only some of the LODs are needed, the file is indexed first, and only the
+        # requested LODs are decoded. The cache always holds the complete file.
+        if mlod is not None:
+            logger.step("File was read in advance")
+        elif cached is not None:
+            mlod = cached
+            if operator.first_lod_only:
+                mlod.lods = mlod.lods[:1]
+            if lod_types is not None:
+                mlod.lods = [lod for lod in mlod.lods if lod.resolution.lod in lod_types]
+        elif operator.first_lod_only or lod_types is not None:
+            mlod = p3d.P3D_MLOD_Lazy.read(file, operator.first_lod_only, lod_types)
+            mlod.load()
+        else:
+            mlod = p3d.P3D_MLOD.read(file)
+            if cache:
+                # A failed cache write (full disk, read-only directory etc.) should not fail the import.
+                if not cache.put(operator.filepath, mlod):
+                    logger.step("Could not write file to cache: %s" % cache.directory)
+
+        counts["lods"] = len(mlod.lods)
+    
+    if cache:
+        logger.step("Cache %s (%s)" % ("hit" if cached else "miss", cache.stats()))
+    
     logger.step("File reading done in %f sec" % (time.time() - time_read_start))
 
     logger.step("File version: %d" % mlod.version)
     logger.step("Number of read LODs: %d" % len(mlod.lods))
     
-    categories, lod_links = categorize_lods(operator, context, mlod)
+    categories, lod_links = categorize_lods(operator, context, mlod.lods)
 
     if not operator.additional_data_allowed:
         operator.additional_data = set()
@@ -444,23 +556,250 @@ def read_file(operator, context, file):
     materials_lookup = None
     if 'MATERIALS' in operator.additional_data:
         materials_lookup = mlod.get_materials()
-        materials = create_blender_materials(materials_lookup, operator.absolute_paths)
+        if not operator.reuse_materials:
+            registry = None
+        elif registry is None:
+            registry = matutils.get_material_registry()
+        
+        count_existing = len(registry) if registry is not None else 0
+        materials = create_blender_materials(materials_lookup, operator.absolute_paths, registry)
         logger.step("Number of unique materials: %d" % len(materials))
+        if registry is not None:
+            logger.step("Created new materials: %d" % (len(registry) - count_existing))
     
     logger.start_subproc("Processing mesh data:")
 
     lod_objects = []
+    lod_hashes = {}
     for i, lod in enumerate(mlod.lods):
         logger.start_subproc("LOD %d" % (i + 1))
 
-        lod_objects.append(process_lod(operator, logger, lod, materials, materials_lookup, categories, lod_links[i]))
+        with profiler.stage("process_lod", lodutils.format_lod_name(lod_links[i][0], lod_links[i][1])) as counts:
+            # The hash has to be calculated before the LOD data is modified during the processing.
+            original = None
+            if operator.lod_duplicates != 'SEPARATE':
+                lod_hash = (get_lod_class(lod.resolution.lod), lod.get_hash())
+                original = lod_hashes.get(lod_hash)
+            
+            counts["duplicate"] = original is not None
+            if original is None:
+                obj = process_lod(operator, logger, lod, materials, materials_lookup, categories, lod_links[i], profiler)
+                lod_objects.append(obj)
+                if operator.lod_duplicates != 'SEPARATE':
+                    lod_hashes[lod_hash] = obj
+            elif operator.lod_duplicates == 'LINK':
+                lod_objects.append(create_lod_duplicate(original, categories, lod_links[i]))
+                logger.step("Linked duplicate of %s" % original.name)
+            else:
+                add_lod_copy(original, lod_links[i])
+                logger.step("Added as copy of %s" % original.name)
 
         logger.end_subproc(True)
         wm.progress_update(i + 1)
 
     logger.end_subproc()
+
+    if operator.profile:
+        profiler.write_reports(operator.filepath)
+        logger.step("Wrote profiling reports")
+    
     logger.end_subproc()
     wm.progress_end()
     logger.step("P3D import finished in %f sec" % (time.time() - logger.times.pop()))
     
     return lod_objects
+
+
+# Options of the import that are stored with the deferred LODs, so the
+# meshes can be built later with the same settings.
+deferred_options = (
+    "absolute_paths",
+    "additional_data_allowed",
+    "additional_data",
+    "validate_meshes",
+    "proxy_action",
+    "translate_selections",
+    "cleanup_empty_selections",
+    "sections",
+    "reuse_materials"
+)
+
+
+# In deferred mode only the LOD headers are scanned, and lightweight placeholder objects
+# are created. The actual meshes are built on demand with the Build LOD operator.
+def read_file_deferred(operator, context, file, logger):
+    time_read_start = time.time()
+    mlod = p3d.P3D_MLOD_Lazy.read(file, operator.first_lod_only, get_lod_types(operator))
+    lod_types = mlod.lod_types
+    try:
+        entries = [(i, mlod.get_index(i)) for i in range(mlod.count_lods)]
+    finally:
+        mlod.close()
+    
+    if lod_types is not None:
+        entries = [(i, entry) for i, entry in entries if entry.resolution.lod in lod_types]
+
+    logger.step("File scanning done in %f sec" % (time.time() - time_read_start))
+    logger.step("Number of deferred LODs: %d" % len(entries))
+
+    options = {}
+    for name in deferred_options:
+        value = getattr(operator, name)
+        options[name] = sorted(value) if isinstance(value, set) else value
+    
+    options = json.dumps(options)
+    filepath = os.path.abspath(operator.filepath)
+    categories, lod_links = categorize_lods(operator, context, [entry for i, entry in entries])
+
+    lod_objects = []
+    for (i, entry), links in zip(entries, lod_links):
+        lod_name = lodutils.format_lod_name(links[0], links[1])
+        mesh = bpy.data.meshes.new(lod_name)
+        obj = bpy.data.objects.new(lod_name, mesh)
+
+        object_props = obj.a3ob_properties_object
+        object_props.is_a3_lod = True
+        set_lod_resolution(object_props, links[0], links[1])
+        object_props.deferred = True
+        object_props.deferred_source = filepath
+        object_props.deferred_index = i
+        object_props.deferred_verts = entry.count_verts
+        object_props.deferred_faces = entry.count_faces
+        object_props.deferred_options = options
+
+        categories[links[2]].objects.link(obj)
+        lod_objects.append(obj)
+    
+    return lod_objects
+
+
+# The LOD is decoded from the cached parse result if available, otherwise from the source file.
+def read_deferred_lod(filepath, index):
+    cache = get_cache()
+    mlod = cache.get(filepath) if cache else None
+    if mlod is not None:
+        return mlod.lods[index]
+    
+    with p3d.P3D_MLOD_Lazy.read_file(filepath) as mlod:
+        return mlod.get_lod(index)
+
+
+# Build the mesh of a deferred LOD placeholder with the same processing as the normal
+# import, and replace the placeholder with the new object.
+def build_deferred_lod(context, obj, registry = None):
+    object_props = obj.a3ob_properties_object
+    filepath = object_props.deferred_source
+    
+    operator = SimpleNamespace(**json.loads(object_props.deferred_options))
+    operator.additional_data = set(operator.additional_data)
+    operator.filepath = filepath
+    if not operator.additional_data_allowed:
+        operator.additional_data = set()
+
+    logger = ProcessLogger()
+    logger.start_subproc("Deferred P3D import from %s" % filepath)
+
+    lod = read_deferred_lod(filepath, object_props.deferred_index)
+
+    materials = None
+    materials_lookup = None
+    if 'MATERIALS' in operator.additional_data:
+        materials_lookup = {("", ""): 0}
+        lod.get_materials(materials_lookup)
+        if not operator.reuse_materials:
+            registry = None
+        elif registry is None:
+            registry = matutils.get_material_registry()
+        
+        materials = create_blender_materials(materials_lookup, operator.absolute_paths, registry)
+    
+    lod_index = int(object_props.lod)
+    lod_resolution = object_props.resolution_float if lod_index == data.lod_unknown else object_props.resolution
+    collections = list(obj.users_collection) or [context.scene.collection]
+
+    new_obj = process_lod(operator, logger, lod, materials, materials_lookup, collections, (lod_index, lod_resolution, 0))
+    for collection in collections[1:]:
+        collection.objects.link(new_obj)
+
+    new_obj.matrix_world = obj.matrix_world
+    for copy in object_props.copies:
+        new_copy = new_obj.a3ob_properties_object.copies.add()
+        set_lod_resolution(new_copy, int(copy.lod), copy.resolution_float if int(copy.lod) == data.lod_unknown else copy.resolution)
+    
+    name = obj.name
+    mesh = obj.data
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+    new_obj.name = name
+    new_obj.data.name = name
+
+    logger.end_subproc()
+    logger.step("Deferred LOD import finished in %f sec" % (time.time() - logger.times.pop()))
+
+    return new_obj
+
+
+def build_deferred_lods(context, objects):
+    built = []
+    registry = None
+    for obj in objects:
+        if obj.type == 'MESH' and obj.a3ob_properties_object.deferred:
+            if registry is None:
+                registry = matutils.get_material_registry()
+            
+            built.append(build_deferred_lod(context, obj, registry))
+    
+    return built
+
+
+# Read multiple P3D files in worker processes. The parsing does not depend on bpy, so the
+# workers only load the standalone data handler modules (the add-on itself cannot be imported
+# outside of Blender). The parsed files are passed back in the packed cache form, and are
+# unpacked into the classes of the add-on. The results are yielded in the order of completion,
+# so the Blender data can be created in the main thread while the rest of the files are still
+# being parsed. If the worker processes cannot be started (or the pool breaks), the remaining
+# files are parsed sequentially in the main process.
+# Failed files are yielded with the exception instead of the data.
+# (filepath, mlod, parsing time, exception)
+def read_files_parallel(operator, filepaths, max_workers = None):
+    lod_types = get_lod_types(operator)
+    remaining = list(filepaths)
+
+    try:
+        for path, mlod, time_read, ex in read_files_pool(list(remaining), max_workers, operator.first_lod_only, lod_types):
+            remaining.remove(path)
+            yield path, mlod, time_read, ex
+    except (BrokenProcessPool, OSError) as ex:
+        ProcessLogger().step("Worker processes are not available (%s), parsing %d files sequentially" % (ex, len(remaining)))
+
+    for path in remaining:
+        try:
+            mlod, time_read = p3d.read_file_task(path, operator.first_lod_only, lod_types)
+        except Exception as ex:
+            yield path, None, 0, ex
+            continue
+
+        yield path, mlod, time_read, None
+
+
+def read_files_pool(filepaths, max_workers, first_lod_only, lod_types):
+    standalone_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standalone.py")
+    standalone = runpy.run_path(standalone_path)
+    task = standalone["import_module"]("cache_p3d").read_file_task
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers, mp_context=context, initializer=runpy.run_path, initargs=(standalone_path,)) as executor:
+        futures = {executor.submit(task, path, first_lod_only, lod_types): path for path in filepaths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                arrays, time_read = future.result()
+            except BrokenProcessPool:
+                raise
+            except Exception as ex:
+                yield path, None, 0, ex
+                continue
+            
+            mlod = cache_p3d.P3D_Cache.unpack(arrays)
+            mlod.source = path
+            yield path, mlod, time_read, None
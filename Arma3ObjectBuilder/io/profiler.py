@@ -0,0 +1,115 @@
+# Stage level profiling of the P3D import and export. The stages are timed per LOD, and
+# can be annotated with counts (vertices, faces etc.). The records can be written as
+# a JSON report with per stage totals, or in the Chrome trace event format, that can be
+# opened in profiler viewers (chrome://tracing, Perfetto, Speedscope).
+# The module does not depend on bpy, so it can be used in worker processes as well.
+
+
+import os
+import json
+import time
+from contextlib import contextmanager
+
+
+class StageProfiler():
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.records = []
+
+    # The counts can be passed in advance, or added to the yielded dictionary during the stage.
+    # The perf_counter clock is system wide on the supported platforms, so the records of
+    # worker processes can be merged into the main profiler.
+    @contextmanager
+    def stage(self, name, lod = None, **counts):
+        start = time.perf_counter()
+        try:
+            yield counts
+        finally:
+            self.records.append({
+                "name": name,
+                "lod": lod,
+                "start": start,
+                "duration": time.perf_counter() - start,
+                "pid": os.getpid(),
+                "counts": counts
+            })
+
+    def merge(self, records):
+        self.records.extend(records)
+
+    # {stage name: {"calls": X, "total": Y, "max": Z}, ...}
+    def get_totals(self):
+        totals = {}
+        for record in self.records:
+            item = totals.setdefault(record["name"], {"calls": 0, "total": 0.0, "max": 0.0})
+            item["calls"] += 1
+            item["total"] += record["duration"]
+            item["max"] = max(item["max"], record["duration"])
+
+        return totals
+
+    # {LOD name: {stage name: duration, ...}, ...}
+    def get_lods(self):
+        lods = {}
+        for record in self.records:
+            if record["lod"] is None:
+                continue
+
+            stages = lods.setdefault(record["lod"], {})
+            stages[record["name"]] = stages.get(record["name"], 0.0) + record["duration"]
+
+        return lods
+
+    def to_json(self):
+        return {
+            "stages": self.get_totals(),
+            "lods": self.get_lods(),
+            "records": [dict(record, start=record["start"] - self.origin) for record in sorted(self.records, key=lambda item: item["start"])]
+        }
+
+    # The trace events are complete events (phase "X") with microsecond timestamps.
+    def to_chrome_trace(self):
+        events = []
+        for record in self.records:
+            args = dict(record["counts"])
+            if record["lod"] is not None:
+                args["lod"] = record["lod"]
+
+            events.append({
+                "name": record["name"],
+                "cat": "a3ob",
+                "ph": "X",
+                "ts": (record["start"] - self.origin) * 1e6,
+                "dur": record["duration"] * 1e6,
+                "pid": record["pid"],
+                "tid": 0,
+                "args": args
+            })
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_json(self, filepath):
+        with open(filepath, "wt") as file:
+            json.dump(self.to_json(), file, indent=2)
+
+    def write_chrome_trace(self, filepath):
+        with open(filepath, "wt") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+    # The reports are written next to the given file, as <name>.profile.json and <name>.trace.json.
+    def write_reports(self, filepath):
+        basepath = os.path.splitext(filepath)[0]
+        self.write_json(basepath + ".profile.json")
+        self.write_chrome_trace(basepath + ".trace.json")
+
+
+class StageProfilerNull():
+    def __init__(self):
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, lod = None, **counts):
+        yield counts
+
+    def merge(self, records):
+        pass
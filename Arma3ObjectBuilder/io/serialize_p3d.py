@@ -0,0 +1,174 @@
+# Building and serialization of the P3D LODs during export. The data of the LOD objects
+# is extracted into snapshots of plain arrays and values in the export_p3d module, and
+# the P3D_LOD objects are built from those here. The module does not depend on bpy,
+# so the LODs can be processed in worker processes as well (the module is loaded through
+# the standalone package there).
+
+
+import numpy as np
+
+from . import data_p3d as p3d
+from .profiler import StageProfiler, StageProfilerNull
+
+
+# Deduplicate the loop normals on their float32 bit patterns. The unique normals are kept
+# in the order of their first occurrence. Same as with the comparison of the values, -0.0
+# and 0.0 are considered equal, the written normal keeps the sign of the first occurrence.
+# [(x, y, z), (..., ..., ...), ....]
+# [loop 0 normal idx, loop 1 normal idx, ...]
+def process_normals(normals):
+    normals = np.ascontiguousarray(normals, dtype=np.float32).reshape((-1, 3))
+    if len(normals) == 0:
+        return normals, np.zeros(0, dtype=np.uint32)
+
+    keys = normals + np.float32(0) # -0.0 -> 0.0
+    _, first, inverse = np.unique(keys.view(np.uint32), axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    remap = np.empty(len(order), dtype=np.uint32)
+    remap[order] = np.arange(len(order), dtype=np.uint32)
+
+    return normals[first[order]], remap[inverse.reshape(-1)]
+
+
+def process_tagg_sharp(edges):
+    output = p3d.P3D_TAGG()
+    output.name = "#SharpEdges#"
+    output.data = p3d.P3D_TAGG_DataSharpEdges()
+    output.data.edges = [tuple(edge) for edge in edges.tolist()]
+
+    return output
+
+
+def process_tagg_uvset(uvs, index):
+    output = p3d.P3D_TAGG()
+    output.name = "#UVSet#"
+    output.data = p3d.P3D_TAGG_DataUVSet()
+    output.data.id = index
+    output.data.uvs = uvs.astype(np.float64)
+
+    return output
+
+
+def process_tagg_property(key, value):
+    output = p3d.P3D_TAGG()
+    output.name = "#Property#"
+    output.data = p3d.P3D_TAGG_DataProperty()
+    output.data.key = key
+    output.data.value = value
+
+    return output
+
+
+def process_tagg_mass(masses):
+    output = p3d.P3D_TAGG()
+    output.name = "#Mass#"
+    output.data = p3d.P3D_TAGG_DataMass()
+    output.data.masses = masses
+
+    return output
+
+
+# The selections are encoded into a dense (groups x vertices) byte array in bulk, from
+# the flattened vertex group assignments. The face membership is derived from a separate
+# (groups x vertices) mask of the assignments, in chunks of groups, to keep the temporary
+# (groups x loops) arrays bounded.
+def process_taggs_selections(names, assignments, count_verts, face_sides, face_verts, chunk_size = 16):
+    group_indices, vert_indices, weights = assignments
+    count_groups = len(names)
+    count_faces = len(face_sides)
+    group_indices = group_indices.astype(np.int64)
+    vert_indices = vert_indices.astype(np.int64)
+
+    data_verts = np.zeros((count_groups, count_verts), dtype=np.uint8)
+    data_verts[group_indices, vert_indices] = p3d.P3D_TAGG_DataSelection.encode_weights(weights)
+
+    # A vertex is part of a selection if it is assigned to the vertex group, regardless of
+    # its weight (assigned vertices with 0 weight are written with 0 too).
+    assigned = np.zeros((count_groups, count_verts), dtype=bool)
+    assigned[group_indices, vert_indices] = True
+
+    # If all vertices of a face belong to a selection, then the face belongs to the
+    # selection as well.
+    data_faces = np.zeros((count_groups, count_faces), dtype=np.uint8)
+    if count_faces > 0 and count_groups > 0:
+        starts = (np.cumsum(face_sides) - face_sides).astype(np.int64)
+        face_verts = face_verts.astype(np.int64)
+        for i in range(0, count_groups, chunk_size):
+            corners = assigned[i:i + chunk_size, face_verts]
+            data_faces[i:i + chunk_size] = np.logical_and.reduceat(corners, starts, axis=1)
+
+    output = []
+    for i, name in enumerate(names):
+        new_tagg = p3d.P3D_TAGG()
+        new_tagg.name = name
+        new_tagg.data = p3d.P3D_TAGG_DataSelection()
+        new_tagg.data.data_verts = data_verts[i]
+        new_tagg.data.data_faces = data_faces[i]
+        output.append(new_tagg)
+
+    return output
+
+
+def process_taggs(snapshot, output_lod):
+    taggs = [process_tagg_sharp(snapshot["sharp_edges"])]
+
+    for i, uvs in enumerate(snapshot["uvsets"]):
+        taggs.append(process_tagg_uvset(uvs, i))
+
+    for key, value in snapshot["properties"]:
+        taggs.append(process_tagg_property(key, value))
+
+    if snapshot["mass"] is not None:
+        taggs.append(process_tagg_mass(snapshot["mass"]))
+
+    taggs.extend(process_taggs_selections(snapshot["selections"], snapshot["assignments"], len(output_lod.verts), output_lod.face_sides, output_lod.face_verts))
+
+    return taggs
+
+
+def build_lod(snapshot, profiler = None):
+    profiler = profiler or StageProfilerNull()
+    name = snapshot["name"]
+
+    output = p3d.P3D_LOD()
+    output.resolution.set(snapshot["lod"], snapshot["resolution"])
+    output.verts = snapshot["verts"]
+    output.verts_flags = snapshot["verts_flags"]
+    with profiler.stage("process_normals", name, loops=len(snapshot["loop_normals"])) as counts:
+        output.normals, output.face_normals = process_normals(snapshot["loop_normals"])
+        counts["normals"] = len(output.normals)
+
+    output.face_sides = snapshot["face_sides"]
+    output.face_verts = snapshot["face_verts"]
+    output.face_uvs = snapshot["face_uvs"]
+    output.face_flags = snapshot["face_flags"]
+    output.face_materials = snapshot["face_materials"]
+    output.materials = snapshot["materials"]
+    with profiler.stage("process_taggs", name, selections=len(snapshot["selections"]), uvsets=len(snapshot["uvsets"])) as counts:
+        output.taggs = process_taggs(snapshot, output)
+        counts["taggs"] = len(output.taggs)
+
+    if snapshot["renumber_components"]:
+        output.renumber_components()
+
+    # The placeholder proxy selection names must be replaced with the actual names.
+    output.placeholders_to_proxies(snapshot["proxies"])
+
+    if snapshot["force_lowercase"]:
+        output.force_lowercase()
+
+    return output
+
+
+# Build and serialize a LOD from its snapshot. The function is intended to be used as a task
+# in worker processes, so only picklable data is passed in and out. The profiling records
+# are returned with the data, so they can be merged into the profiler of the main process.
+# (resolution signature, LOD data, (vertex count, normal count, face count, TAGG count), [profiling records])
+def serialize_lod_task(snapshot, profile = False):
+    profiler = StageProfiler() if profile else StageProfilerNull()
+    lod = build_lod(snapshot, profiler)
+    with profiler.stage("serialize", snapshot["name"]) as counts:
+        lod_data = lod.serialize()
+        counts["bytes"] = len(lod_data)
+
+    return float(lod.resolution), lod_data, (len(lod.verts), len(lod.normals), len(lod.face_sides), len(lod.taggs) + 1), profiler.records
@@ -0,0 +1,38 @@
+# Loader for the binary data handler modules of the io package (data_p3d, data_rtm etc.),
+# that makes them usable from plain Python, without Blender. The add-on package itself
+# cannot be imported outside of Blender, so the io folder is registered as a standalone
+# package, and the modules are imported from there.
+# The data handler modules only depend on the standard library and NumPy.
+#
+# Usage:
+#   import runpy
+#   standalone = runpy.run_path("<add-on folder>/io/standalone.py")
+#   data_p3d = standalone["import_module"]("data_p3d")
+
+
+import os
+import sys
+import types
+import importlib
+
+
+package_name = "a3ob_standalone"
+package_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def register():
+    package = sys.modules.get(package_name)
+    if package is None:
+        package = types.ModuleType(package_name)
+        package.__path__ = [package_dir]
+        sys.modules[package_name] = package
+    
+    return package
+
+
+def import_module(name):
+    register()
+    return importlib.import_module("%s.%s" % (package_name, name))
+
+
+register()
@@ -214,6 +214,31 @@ class A3OB_PG_properties_object_mesh(bpy.types.PropertyGroup):
         type = A3OB_PG_properties_lod_copy
     )
     copies_index: bpy.props.IntProperty(name="Active Copy Index", description="")
+    deferred: bpy.props.BoolProperty(
+        name = "Deferred",
+        description = "The LOD mesh is not built yet, it is imported from the source file with the Build LOD operator"
+    )
+    deferred_source: bpy.props.StringProperty(
+        name = "Source",
+        description = "File to import the deferred LOD from",
+        subtype = 'FILE_PATH'
+    )
+    deferred_index: bpy.props.IntProperty(
+        name = "Source Index",
+        description = "Position of the deferred LOD in the source file"
+    )
+    deferred_verts: bpy.props.IntProperty(
+        name = "Vertices",
+        description = "Number of vertices in the deferred LOD"
+    )
+    deferred_faces: bpy.props.IntProperty(
+        name = "Faces",
+        description = "Number of faces in the deferred LOD"
+    )
+    deferred_options: bpy.props.StringProperty(
+        name = "Import Options",
+        description = "Import settings to build the deferred LOD with (JSON)"
+    )
 
     def get_name(self):
         return lodutils.format_lod_name(int(self.lod), self.resolution)
@@ -4,8 +4,11 @@
 #   Add-on: Arma 3 Object Builder
 #   
 #   Description:
-#       The script creates an empty "dummy" P3D file at the specified path.
-#       It might come in handy in special testing cases.
+#       The script creates a "dummy" P3D file at the specified path. By default the file
+#       has a single empty LOD, but synthetic geometry can be generated with the given
+#       number of LODs, vertices, faces, selections and UV sets.
+#       It might come in handy in special testing cases (eg.: benchmarks).
+#       The script can be run in Blender, or from plain Python (with NumPy installed).
 #
 #   Usage:
 #       1. set settings as necessary
@@ -19,30 +22,114 @@
 class Settings:
     # Target path for dummy P3D
     filepath = r""
+    # Number of LODs (visual resolutions 1, 2, 3...)
+    count_lods = 1
+    # Number of faces per LOD (quads laid out in a grid)
+    count_faces = 0
+    # Minimum number of vertices per LOD (vertices above the ones needed by the faces are left loose)
+    count_verts = 0
+    # Number of selections per LOD
+    count_selections = 0
+    # Number of UV sets per LOD
+    count_uvsets = 0
 
 
 #   ---------------------------------------- LOGIC -----------------------------------------
 
+import os
 import importlib
 
-import bpy
+import numpy as np
 
-name = None
-for addon in bpy.context.preferences.addons:
-    if addon.module.endswith("Arma3ObjectBuilder"):
-        name = addon.module
-        break
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy:
+    name = None
+    for addon in bpy.context.preferences.addons:
+        if addon.module.endswith("Arma3ObjectBuilder"):
+            name = addon.module
+            break
+    else:
+        raise Exception("Arma 3 Object Builder could not be found")
+
+    a3ob = importlib.import_module(name)
+    p3d = a3ob.io.data_p3d
 else:
-    raise Exception("Arma 3 Object Builder could not be found")
+    import runpy
+
+    standalone = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "io", "standalone.py"))
+    p3d = standalone["import_module"]("data_p3d")
+
+
+def create_lod(resolution, count_verts, count_faces, count_selections, count_uvsets, seed = 0):
+    rng = np.random.default_rng(seed)
+    lod = p3d.P3D_LOD()
+    lod.resolution.set(0, resolution)
+
+    # Grid of quads, extended by loose vertices if needed
+    cols = max(int(np.ceil(np.sqrt(count_faces))), 1)
+    rows = int(np.ceil(count_faces / cols))
+    count_grid = (cols + 1) * (rows + 1) if count_faces > 0 else 0
+    count_total = max(count_grid, count_verts)
+
+    coords = rng.random((count_total, 3), dtype=np.float32)
+    if count_grid > 0:
+        grid_x, grid_y = np.meshgrid(np.arange(cols + 1, dtype=np.float32), np.arange(rows + 1, dtype=np.float32))
+        coords[:count_grid, 0] = grid_x.ravel()
+        coords[:count_grid, 1] = grid_y.ravel()
+        coords[:count_grid, 2] = 0
+    
+    lod.verts = coords
+    lod.verts_flags = np.zeros(count_total, dtype=np.uint32)
+    # The faces all reference the first normal, an empty LOD has none
+    lod.normals = np.tile(np.array([0, 0, 1], dtype=np.float32), (count_total if count_faces > 0 else 0, 1))
+
+    cells = np.arange(count_faces)
+    corner = cells // cols * (cols + 1) + cells % cols
+    quads = np.column_stack((corner, corner + cols + 1, corner + cols + 2, corner + 1)).astype(np.uint32)
+    count_loops = count_faces * 4
+
+    lod.face_sides = np.full(count_faces, 4, dtype=np.uint32)
+    lod.face_verts = quads.ravel()
+    lod.face_normals = np.zeros(count_loops, dtype=np.uint32)
+    lod.face_uvs = rng.random((count_loops, 2), dtype=np.float32)
+    lod.face_flags = np.zeros(count_faces, dtype=np.uint32)
+    lod.face_materials = (cells % 2).astype(np.uint32)
+    lod.materials = [("#(argb,8,8,3)color(1,0,0,1,co)", ""), ("#(argb,8,8,3)color(0,1,0,1,co)", "a3\\data_f\\default.rvmat")]
+
+    for i in range(count_uvsets):
+        tagg = p3d.P3D_TAGG()
+        tagg.name = "#UVSet#"
+        tagg.data = p3d.P3D_TAGG_DataUVSet()
+        tagg.data.id = i
+        tagg.data.uvs = rng.random((count_loops, 2)).tolist()
+        lod.taggs.append(tagg)
+
+    for i in range(count_selections):
+        tagg = p3d.P3D_TAGG()
+        tagg.name = "selection_%d" % i
+        tagg.data = p3d.P3D_TAGG_DataSelection(count_total, count_faces)
+        tagg.data.data_verts[:] = rng.choice([0, 0, 0, 1, 128], count_total)
+        lod.taggs.append(tagg)
+
+    return lod
+
+
+def create_mlod(count_lods = 1, count_verts = 0, count_faces = 0, count_selections = 0, count_uvsets = 0):
+    model = p3d.P3D_MLOD()
+    for i in range(count_lods):
+        model.lods.append(create_lod(i + 1, count_verts, count_faces, count_selections, count_uvsets, i))
 
-a3ob = importlib.import_module(name)
-a3ob_utils = a3ob.utilities
-a3ob_io = a3ob.io
+    return model
 
-p3d = a3ob.io.data_p3d
 
+def main():
+    model = create_mlod(Settings.count_lods, Settings.count_verts, Settings.count_faces, Settings.count_selections, Settings.count_uvsets)
+    model.write_file(Settings.filepath)
 
-model = p3d.P3D_MLOD()
-model.lods.append(p3d.P3D_LOD())
 
-model.write_file(Settings.filepath)
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,9 @@
 #       The script batch imports P3D files from a given folder, with the given settings.
 #       The available settings correspond to the options available in the import function
 #       included in the standard Blender menu.
+#       In parallel mode the files are parsed in separate worker processes, and the Blender
+#       data is created as soon as a file is ready. Failed files are reported at the end,
+#       they do not abort the batch.
 #
 #   Usage:
 #       1. copy the path of source folder
@@ -41,6 +44,12 @@ class Settings:
         'UV',           # additional UV sets
         'MATERIALS'     # material
     }
+    # Handling of LODs with identical content: 'SEPARATE', 'LINK' or 'COPY'
+    lod_duplicates = 'SEPARATE'
+    # Only create placeholders, the LOD meshes are built with the Build LOD operator
+    deferred = False
+    # Write stage timings next to each imported file (<name>.profile.json and <name>.trace.json)
+    profile = False
     # Validate and cleanup imported meshes with degenerated geometry
     validate_meshes = False
     # Postprocess proxies: 'NOTHING', 'SEPARATE' or 'CLEAR'
@@ -49,11 +58,20 @@ class Settings:
     translate_selections = False
     # Cleanup selections without any vertices assigned
     cleanup_empty_selections = False
+    # Use existing materials with the same texture and material paths
+    reuse_materials = True
+    # Merge the materials with identical texture and material paths after the import
+    relink_materials = False
+    # Parse files in parallel worker processes
+    parallel = True
+    # Number of worker processes (None -> number of CPU cores)
+    max_workers = None
 
 
 #   ---------------------------------------- LOGIC -----------------------------------------
 
 import os
+import time
 import importlib
 
 import bpy
@@ -67,7 +85,46 @@ else:
     raise Exception("Arma 3 Object Builder could not be found")
 
 a3ob = importlib.import_module(name)
-read_file = a3ob.io.import_p3d.read_file
+import_p3d = a3ob.io.import_p3d
+matutils = a3ob.utilities.materials
+
+# Importer options that are not exposed as settings of the script
+Settings.absolute_paths = Settings.relative_paths
+Settings.sections = 'PRESERVE'
+Settings.lod_types = set(import_p3d.lod_type_groups)
+
+
+def import_sequential(files, timings, failures, registry):
+    for item in files:
+        Settings.filepath = item
+        time_start = time.time()
+
+        try:
+            with open(item, "rb") as file:
+                import_p3d.read_file(Settings, bpy.context, file, None, registry)
+        except Exception as ex:
+            failures.append((item, ex))
+            continue
+        
+        timings.append((item, None, time.time() - time_start))
+
+
+def import_parallel(files, timings, failures, registry):
+    for item, mlod, time_read, ex in import_p3d.read_files_parallel(Settings, files, Settings.max_workers):
+        if ex is not None:
+            failures.append((item, ex))
+            continue
+
+        Settings.filepath = item
+        time_start = time.time()
+
+        try:
+            import_p3d.read_file(Settings, bpy.context, None, mlod, registry)
+        except Exception as ex:
+            failures.append((item, ex))
+            continue
+        
+        timings.append((item, time_read, time.time() - time_start))
 
 
 def main():
@@ -82,11 +139,37 @@ def main():
         if os.path.isfile(item) and os.path.splitext(item)[1].lower() == ".p3d":
             files.append(item)
 
-    for item in files:
-        Settings.filepath = item
-        
-        with open(Settings.filepath, "rb") as file:
-                read_file(Settings, bpy.context, file)
+    timings = []
+    failures = []
+    time_start = time.time()
+
+    # The existing materials are collected once for the whole batch.
+    registry = matutils.get_material_registry() if Settings.reuse_materials else None
+    if Settings.parallel:
+        import_parallel(files, timings, failures, registry)
+    else:
+        import_sequential(files, timings, failures, registry)
+    
+    Settings.filepath = folder
+
+    count_relinked = 0
+    if Settings.relink_materials:
+        count_relinked = matutils.relink_duplicate_materials()
+    
+    print("Batch P3D import report:")
+    for item, time_read, time_import in timings:
+        if time_read is None:
+            print("    %s: %f sec" % (os.path.basename(item), time_import))
+        else:
+            print("    %s: parsing %f sec, import %f sec" % (os.path.basename(item), time_read, time_import))
+    
+    for item, ex in failures:
+        print("    %s: FAILED (%s)" % (os.path.basename(item), str(ex)))
+    
+    if Settings.relink_materials:
+        print("Merged duplicate materials: %d" % count_relinked)
+    
+    print("Imported %d of %d files in %f sec" % (len(timings), len(files), time.time() - time_start))
 
 
 main()
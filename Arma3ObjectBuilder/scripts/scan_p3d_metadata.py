@@ -0,0 +1,90 @@
+#   ---------------------------------------- HEADER ----------------------------------------
+#   
+#   Author: MrClock
+#   Add-on: Arma 3 Object Builder
+#   
+#   Description:
+#       The script scans the P3D files in a given folder (and its subfolders) for metadata,
+#       without decoding the geometry. The LOD list, resolutions, vertex/face counts,
+#       selection names, named properties, texture/material paths and proxy paths are
+#       collected into a JSON file for asset inventory purposes.
+#       The script can be run in Blender, or from plain Python (with NumPy installed) as:
+#       python scan_p3d_metadata.py
+#
+#   Usage:
+#       1. set settings as necessary
+#       2. run script
+#   
+#   ----------------------------------------------------------------------------------------
+
+
+#   --------------------------------------- SETTINGS ---------------------------------------
+
+class Settings:
+    # Folder of P3D files
+    path_input = r""
+    # Output JSON file
+    path_output = r""
+    # Search subfolders too
+    recursive = True
+
+
+#   ---------------------------------------- LOGIC -----------------------------------------
+
+import os
+import json
+import importlib
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+if bpy:
+    name = None
+    for addon in bpy.context.preferences.addons:
+        if addon.module.endswith("Arma3ObjectBuilder"):
+            name = addon.module
+            break
+    else:
+        raise Exception("Arma 3 Object Builder could not be found")
+
+    a3ob = importlib.import_module(name)
+    p3d = a3ob.io.data_p3d
+else:
+    import runpy
+
+    standalone = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "io", "standalone.py"))
+    p3d = standalone["import_module"]("data_p3d")
+
+
+def get_files(folder, recursive):
+    for root, dirs, files in os.walk(folder):
+        for item in files:
+            if os.path.splitext(item)[1].lower() == ".p3d":
+                yield os.path.join(root, item)
+        
+        if not recursive:
+            break
+
+
+def main():
+    folder = Settings.path_input
+    if not os.path.isdir(folder):
+        return
+
+    results = []
+    failed = []
+    for item in get_files(folder, Settings.recursive):
+        try:
+            results.append(p3d.P3D_MLOD_Summary.scan_file(item).as_dict())
+        except Exception as ex:
+            failed.append({"source": item, "error": str(ex)})
+    
+    with open(Settings.path_output, "wt") as file:
+        json.dump({"files": results, "failed": failed}, file, indent=2)
+    
+    print("Scanned %d files (%d failed)" % (len(results) + len(failed), len(failed)))
+
+
+main()
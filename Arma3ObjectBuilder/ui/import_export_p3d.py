@@ -76,6 +76,19 @@ class A3OB_OP_import_p3d(bpy.types.Operator, bpy_extras.io_utils.ImportHelper):
         name = "First LOD Only",
         description = "Import only the first LOD found in the file"
     )
+    lod_types: bpy.props.EnumProperty(
+        name = "LOD Types",
+        description = "Types of LODs to import (the rest of the LODs are skipped without decoding them)",
+        options = {'ENUM_FLAG'},
+        items = (
+            ('VISUALS', "Visuals", "Visual resolutions and first person views"),
+            ('SHADOWS', "Shadows", "Shadow volumes"),
+            ('GEOMETRIES', "Geometries", "Collision, view and fire geometries"),
+            ('POINTCLOUDS', "Point Clouds", "Memory, Land Contact and Hit-points"),
+            ('MISC', "Misc", "Every other LOD type")
+        ),
+        default = {'VISUALS', 'SHADOWS', 'GEOMETRIES', 'POINTCLOUDS', 'MISC'}
+    )
     translate_selections: bpy.props.BoolProperty(
         name = "Translate Selections",
         description = "Try to translate czech selection names to english"
@@ -92,6 +105,29 @@ class A3OB_OP_import_p3d(bpy.types.Operator, bpy_extras.io_utils.ImportHelper):
         ),
         default = 'PRESERVE'
     )
+    reuse_materials: bpy.props.BoolProperty(
+        name = "Reuse Materials",
+        description = "Use the existing materials with the same texture and material paths, instead of creating new ones",
+        default = True
+    )
+    deferred: bpy.props.BoolProperty(
+        name = "Deferred LODs",
+        description = "Only create placeholders for the LODs, and build the meshes on demand with the Build LOD operator (placeholders that are not built yet are skipped during export)"
+    )
+    profile: bpy.props.BoolProperty(
+        name = "Profile",
+        description = "Write the timings of the import stages next to the imported file (<name>.profile.json, and <name>.trace.json in Chrome trace format)"
+    )
+    lod_duplicates: bpy.props.EnumProperty(
+        name = "Identical LODs",
+        description = "Handling of LODs with identical content",
+        items = (
+            ('SEPARATE', "Separate", "Create a separate mesh for every LOD"),
+            ('LINK', "Link", "Create linked duplicates that share the mesh of the first identical LOD"),
+            ('COPY', "Copy", "Only create the first identical LOD, and set up the rest as LOD copies")
+        ),
+        default = 'SEPARATE'
+    )
     
     def draw(self, context):
         pass
@@ -127,6 +163,12 @@ class A3OB_PT_import_p3d_main(bpy.types.Panel):
         
         layout.prop(operator, "first_lod_only")
         layout.prop(operator, "validate_meshes")
+        layout.prop(operator, "lod_duplicates")
+        layout.prop(operator, "deferred")
+        layout.prop(operator, "profile")
+        col_types = layout.column(heading="LOD Types", align=True)
+        col_types.prop(operator, "lod_types", text=" ")
+        col_types.enabled = not operator.first_lod_only
 
 
 class A3OB_PT_import_p3d_collections(bpy.types.Panel):
@@ -182,8 +224,11 @@ class A3OB_PT_import_p3d_data(bpy.types.Panel):
         col_enum.prop(operator, "additional_data", text=" ") # text=" " otherwise the enum is stretched accross the panel
         row_sections = layout.row(align=True)
         row_sections.prop(operator, "sections", expand=True)
+        row_reuse = layout.row(align=True)
+        row_reuse.prop(operator, "reuse_materials")
         if not operator.additional_data_allowed or 'MATERIALS' not in operator.additional_data:
             row_sections.enabled = False
+            row_reuse.enabled = False
 
 
 class A3OB_PT_import_p3d_post(bpy.types.Panel):
@@ -226,6 +271,34 @@ class A3OB_PT_import_p3d_post(bpy.types.Panel):
             col.prop(operator, "proxy_action", expand=True)
 
 
+class A3OB_OT_import_p3d_deferred(bpy.types.Operator):
+    """Build the meshes of the selected deferred LODs"""
+
+    bl_idname = "a3ob.import_p3d_deferred"
+    bl_label = "Build LOD"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return any([obj.type == 'MESH' and obj.a3ob_properties_object.deferred for obj in context.selected_objects + [context.object] if obj])
+    
+    def execute(self, context):
+        objects = set(context.selected_objects)
+        if context.object:
+            objects.add(context.object)
+        
+        built = import_p3d.build_deferred_lods(context, list(objects))
+        for obj in built:
+            obj.select_set(True)
+        
+        if len(built) > 0:
+            context.view_layer.objects.active = built[-1]
+
+        utils.op_report(self, {'INFO'}, "Built %d deferred LODs (check the logs in the system console)" % len(built))
+        
+        return {'FINISHED'}
+
+
 class A3OB_OP_export_p3d(bpy.types.Operator, bpy_extras.io_utils.ExportHelper):
     """Export to Arma 3 MLOD P3D"""
     
@@ -276,6 +349,10 @@ class A3OB_OP_export_p3d(bpy.types.Operator, bpy_extras.io_utils.ExportHelper):
         description = "Sort faces in LODs by the assigned materials (prevents fragmentation in the face list, and allows proper sorting of alpha faces)",
         default = True
     )
+    use_evaluated: bpy.props.BoolProperty(
+        name = "Evaluated Meshes",
+        description = "Read the mesh data from the evaluated meshes, and merge the LOD parts as arrays, instead of duplicating and joining the LOD objects with operators"
+    )
     lod_collisions: bpy.props.EnumProperty(
         name = "Collisions",
         description = "Action to take when detecting LODs with identical signatures",
@@ -313,6 +390,22 @@ class A3OB_OP_export_p3d(bpy.types.Operator, bpy_extras.io_utils.ExportHelper):
         description = "Generate Component## selections if none are already defined",
         default = True
     )
+    use_multiprocessing: bpy.props.BoolProperty(
+        name = "Multiprocessing",
+        description = "Build and serialize the LODs in parallel worker processes (only worth it with many LODs, the worker startup takes time)"
+    )
+    incremental: bpy.props.BoolProperty(
+        name = "Incremental",
+        description = "Only process the LOD objects that changed since their last export, and reuse the cached data of the rest"
+    )
+    incremental_disk: bpy.props.BoolProperty(
+        name = "Disk Cache",
+        description = "Store the cached LOD data in a folder next to the .blend file too, so it is kept between sessions (only available for saved files)"
+    )
+    profile: bpy.props.BoolProperty(
+        name = "Profile",
+        description = "Write the timings of the export stages next to the exported file (<name>.profile.json, and <name>.trace.json in Chrome trace format)"
+    )
 
     def draw(self, context):
         pass
@@ -410,6 +503,7 @@ class A3OB_PT_export_p3d_meshes(bpy.types.Panel):
         
         col = layout.column(align=True)
         col.prop(operator, "validate_meshes")
+        col.prop(operator, "use_evaluated")
         col.prop(operator, "apply_modifiers")
         col.prop(operator, "apply_transforms")
         col.prop(operator, "preserve_normals")
@@ -468,6 +562,12 @@ class A3OB_PT_export_p3d_post(bpy.types.Panel):
         col.prop(operator, "renumber_components")
         col.prop(operator, "force_lowercase")
         col.prop(operator, "translate_selections")
+        col.prop(operator, "use_multiprocessing")
+        col.prop(operator, "incremental")
+        row_disk = col.row(align=True)
+        row_disk.prop(operator, "incremental_disk")
+        row_disk.enabled = operator.incremental
+        col.prop(operator, "profile")
 
 
 classes = (
@@ -476,6 +576,7 @@ classes = (
     A3OB_PT_import_p3d_collections,
     A3OB_PT_import_p3d_data,
     A3OB_PT_import_p3d_post,
+    A3OB_OT_import_p3d_deferred,
     A3OB_OP_export_p3d,
     A3OB_PT_export_p3d_main,
     A3OB_PT_export_p3d_include,
@@ -601,6 +601,11 @@ class A3OB_PT_object_mesh(bpy.types.Panel):
                 layout.prop(object_props, "resolution")
             elif lod_idx == data.lod_unknown:
                 layout.prop(object_props, "resolution_float")
+            
+            if object_props.deferred:
+                col_deferred = layout.column(align=True)
+                col_deferred.label(text="Deferred: %d vertices, %d faces" % (object_props.deferred_verts, object_props.deferred_faces), icon='TIME')
+                col_deferred.operator("a3ob.import_p3d_deferred", icon='IMPORT')
 
 
 class A3OB_PT_object_mesh_namedprops(bpy.types.Panel):
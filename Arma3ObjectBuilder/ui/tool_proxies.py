@@ -117,9 +117,24 @@ class A3OB_OT_proxy_extract(bpy.types.Operator):
     validate_meshes: bpy.props.BoolProperty(default=True)
     proxy_action: bpy.props.EnumProperty(items=(('SEPARATE', "", ""),), default='SEPARATE')
     first_lod_only: bpy.props.BoolProperty(default=True)
+    lod_types: bpy.props.EnumProperty(
+        options = {'ENUM_FLAG'},
+        items = (
+            ('VISUALS', "", ""),
+            ('SHADOWS', "", ""),
+            ('GEOMETRIES', "", ""),
+            ('POINTCLOUDS', "", ""),
+            ('MISC', "", "")
+        ),
+        default = {'VISUALS', 'SHADOWS', 'GEOMETRIES', 'POINTCLOUDS', 'MISC'}
+    )
     translate_selections: bpy.props.BoolProperty()
     cleanup_empty_selections: bpy.props.BoolProperty()
     sections: bpy.props.EnumProperty(items=(("PRESERVE", "", ""),), default="PRESERVE")
+    reuse_materials: bpy.props.BoolProperty(default=True)
+    lod_duplicates: bpy.props.EnumProperty(items=(('SEPARATE', "", ""),), default='SEPARATE')
+    deferred: bpy.props.BoolProperty(default=False)
+    profile: bpy.props.BoolProperty(default=False)
     absolute_paths: bpy.props.BoolProperty(default=True)
     filepath: bpy.props.StringProperty()
     
@@ -31,6 +31,8 @@ if "data" in locals():
         reload(rigging)
     if "structure" in locals():
         reload(structure)
+    if "materials" in locals():
+        reload(materials)
 
 
 # In order of dependency
@@ -49,3 +51,4 @@ from . import masses
 from . import outliner
 from . import rigging
 from . import structure
+from . import materials
@@ -2,6 +2,7 @@
 
 
 import bpy
+import numpy as np
 
 
 bl_version = bpy.app.version
@@ -26,6 +27,30 @@ def mesh_static_normals_iterator(mesh):
         yield i, loop.normal.copy().freeze()
 
 
+def mesh_get_corner_normals(mesh):
+    mesh.calc_normals_split()
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.loops.foreach_get("normal", normals)
+
+    return normals.reshape((-1, 3))
+
+
+def mesh_set_polygons(mesh, loop_starts, loop_totals):
+    mesh.polygons.foreach_set("loop_start", loop_starts)
+    mesh.polygons.foreach_set("loop_total", loop_totals)
+
+
+def mesh_get_sharp_edges(mesh):
+    values = np.zeros(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("use_edge_sharp", values)
+
+    return values
+
+
+def mesh_set_sharp_edges(mesh, values):
+    mesh.edges.foreach_set("use_edge_sharp", values)
+
+
 # Blender 4.0.0 removed the traditional bpy.ops.xyz.xyz(ctx, **kwargs) type operator calling,
 # and since the new temp_override method was only introduced late in the 3.x.x versions,
 # to maintain compatibility with older releases, the operator call has to be version dependent
@@ -40,6 +65,32 @@ if bl_version > (3, 6, 0):
             op(**kwargs)
 
 
+# Blender 4.0.0 made the polygon loop totals read-only, they are derived from the loop starts.
+# https://developer.blender.org/docs/release_notes/4.0/python_api/#mesh
+if bl_version >= (4, 0, 0):
+    def mesh_set_polygons(mesh, loop_starts, loop_totals):
+        mesh.polygons.foreach_set("loop_start", loop_starts)
+
+
+# Blender 4.0.0 moved the edge sharpness into a generic boolean attribute.
+# https://developer.blender.org/docs/release_notes/4.0/python_api/#mesh
+if bl_version >= (4, 0, 0):
+    def mesh_get_sharp_edges(mesh):
+        values = np.zeros(len(mesh.edges), dtype=bool)
+        layer = mesh.attributes.get("sharp_edge")
+        if layer:
+            layer.data.foreach_get("value", values)
+        
+        return values
+
+    def mesh_set_sharp_edges(mesh, values):
+        layer = mesh.attributes.get("sharp_edge")
+        if not layer:
+            layer = mesh.attributes.new("sharp_edge", 'BOOLEAN', 'EDGE')
+        
+        layer.data.foreach_set("value", values)
+
+
 # https://developer.blender.org/docs/release_notes/4.1/python_api/#breaking-changes
 if bl_version >= (4, 1, 0):
     def mesh_auto_smooth(mesh):
@@ -48,3 +99,9 @@ if bl_version >= (4, 1, 0):
     def mesh_static_normals_iterator(mesh):
         for i, normal_value in enumerate(mesh.corner_normals):
             yield i, normal_value.vector.copy().freeze()
+    
+    def mesh_get_corner_normals(mesh):
+        normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+        mesh.corner_normals.foreach_get("vector", normals)
+
+        return normals.reshape((-1, 3))
@@ -1,6 +1,10 @@
 import os
 import re
 
+import bpy
+
+from . import generic as utils
+
 
 class RVMATTemplateField:
     def __init__(self, string):
@@ -67,3 +71,67 @@ class RVMATTemplate:
         except Exception as ex:
             print(ex)
             return False
+
+
+# Texture-material pairs are compared in a normalized form, so the same pair read from
+# different files (or stored with absolute paths in Blender) is recognized.
+# Procedural colors are reformatted the same way as they are exported.
+def get_p3d_key(texture, material):
+    regex_procedural_color = r"#\(argb,\d+,\d+,\d+\)color\((\d+.?\d*),(\d+.?\d*),(\d+.?\d*),(\d+.?\d*),([a-zA-Z]+)\)"
+
+    texture = utils.replace_slashes(texture.strip().lower()).lstrip("\\")
+    material = utils.replace_slashes(material.strip().lower()).lstrip("\\")
+
+    color = re.match(regex_procedural_color, texture.replace(" ", ""))
+    if color:
+        values = color.groups()
+        texture = "#(argb,8,8,3)color(%.3f,%.3f,%.3f,%.3f,%s)" % (float(values[0]), float(values[1]), float(values[2]), float(values[3]), values[4])
+    
+    return texture, material
+
+
+def get_material_key(material):
+    return get_p3d_key(*material.a3ob_properties_material.to_p3d(True))
+
+
+# Blend-level lookup of the existing materials by their normalized texture-material pair.
+# Materials without any paths set are only matched to the empty pair, if they were created
+# as the placeholder of the P3D import.
+def get_material_registry():
+    registry = {}
+    for mat in bpy.data.materials:
+        if mat.library:
+            continue
+
+        key = get_material_key(mat)
+        if key == ("", "") and not mat.name.startswith("P3D: no material"):
+            continue
+
+        registry.setdefault(key, mat)
+    
+    return registry
+
+
+# Replace all uses of materials with identical texture-material pairs with a single material,
+# and remove the rest. The material with the shortest name (the one without a numeric suffix)
+# is kept from each group.
+def relink_duplicate_materials():
+    groups = {}
+    for mat in sorted(bpy.data.materials, key=lambda item: (len(item.name), item.name)):
+        if mat.library:
+            continue
+
+        key = get_material_key(mat)
+        if key == ("", "") and not mat.name.startswith("P3D: no material"):
+            continue
+
+        groups.setdefault(key, []).append(mat)
+    
+    count = 0
+    for materials in groups.values():
+        for mat in materials[1:]:
+            mat.user_remap(materials[0])
+            bpy.data.materials.remove(mat)
+            count += 1
+    
+    return count
@@ -4,14 +4,24 @@ blender -b -noaudio --python tests/p3d.py
 
 
 import os
+import runpy
 import unittest
 
 import bpy
+import numpy as np
 
 
 folder_inputs = os.path.join(os.getcwd(), "tests/inputs/p3d")
 folder_outputs = os.path.join(os.getcwd(), "tests/outputs/p3d")
 
+standalone = runpy.run_path(os.path.join(os.getcwd(), "Arma3ObjectBuilder/io/standalone.py"))
+data_p3d = standalone["import_module"]("data_p3d")
+
+
+# Vertex coordinates in a canonical order, independent from the order of the parts in the mesh.
+def sorted_verts(lod):
+    return lod.verts[np.lexsort(lod.verts.T[::-1])]
+
 
 class P3DTest(unittest.TestCase):
     """Test cases to test P3D related functionalities"""
@@ -50,6 +60,33 @@ class P3DTest(unittest.TestCase):
             size_out_re = os.path.getsize(file_out_p3d_2)
             self.assertEqual(size_out, size_out_re, "%s (%d bytes) and %s (%d bytes) are not the same size" % (file_out_p3d_1, size_out, file_out_p3d_2, size_out_re))
 
+    def test_export_evaluated(self):
+        """Import the sample models, export them with and without the evaluated meshes, and compare the LODs"""
+
+        for file in self.inputs:
+            name = os.path.splitext(file)[0]
+
+            file_in_p3d = os.path.join(folder_inputs, file)
+            file_out_p3d = os.path.join(folder_outputs, name + "_out_joined.p3d")
+            file_out_p3d_evaluated = os.path.join(folder_outputs, name + "_out_evaluated.p3d")
+
+            bpy.ops.wm.read_homefile(app_template="")
+            bpy.ops.a3ob.import_p3d(filepath=file_in_p3d)
+            bpy.ops.a3ob.export_p3d(filepath=file_out_p3d, use_evaluated=False)
+            bpy.ops.a3ob.export_p3d(filepath=file_out_p3d_evaluated, use_evaluated=True)
+
+            self.assertEqual(os.path.getsize(file_out_p3d), os.path.getsize(file_out_p3d_evaluated))
+
+            mlod = data_p3d.P3D_MLOD.read_file(file_out_p3d)
+            mlod_evaluated = data_p3d.P3D_MLOD.read_file(file_out_p3d_evaluated)
+            self.assertEqual(len(mlod.lods), len(mlod_evaluated.lods))
+            for lod, lod_evaluated in zip(mlod.lods, mlod_evaluated.lods):
+                self.assertEqual(lod.resolution.get(), lod_evaluated.resolution.get())
+                self.assertEqual((len(lod.verts), len(lod.normals), len(lod.face_sides)), (len(lod_evaluated.verts), len(lod_evaluated.normals), len(lod_evaluated.face_sides)))
+                np.testing.assert_allclose(sorted_verts(lod), sorted_verts(lod_evaluated), atol=1e-5)
+                self.assertEqual(lod.materials, lod_evaluated.materials)
+                self.assertEqual([tagg.name for tagg in lod.taggs], [tagg.name for tagg in lod_evaluated.taggs])
+
 
 def main():
     if not os.path.isdir(folder_inputs):
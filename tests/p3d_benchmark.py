@@ -0,0 +1,195 @@
+"""
+blender -b -noaudio --python tests/p3d_benchmark.py -- [output JSON path] [repeats]
+python tests/p3d_benchmark.py [output JSON path] [repeats]
+
+Synthetic P3D benchmarks. Parametric models are generated with the create_dummy_p3d.py script,
+and the P3D_MLOD.read and P3D_MLOD.write file handling, as well as the Blender side import_p3d.read_file
+and export_p3d.write_file functions are timed separately. The per vertex and the grouped
+vertex group weight assignment are also compared. The Blender side is only measured
+when the benchmark is run in Blender. The results are written to a JSON file.
+"""
+
+
+import os
+import sys
+import json
+import time
+import runpy
+import platform
+import importlib
+from types import SimpleNamespace
+
+import numpy as np
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+
+folder_addon = os.path.join(os.getcwd(), "Arma3ObjectBuilder")
+folder_outputs = os.path.join(os.getcwd(), "tests/outputs/benchmark")
+
+
+cases = (
+    {"name": "small", "count_lods": 1, "count_verts": 1000, "count_faces": 1000, "count_selections": 5, "count_uvsets": 1},
+    {"name": "medium", "count_lods": 4, "count_verts": 20000, "count_faces": 20000, "count_selections": 20, "count_uvsets": 1},
+    {"name": "large", "count_lods": 1, "count_verts": 200000, "count_faces": 200000, "count_selections": 10, "count_uvsets": 2},
+    {"name": "selections", "count_lods": 1, "count_verts": 50000, "count_faces": 50000, "count_selections": 200, "count_uvsets": 1},
+    {"name": "lods", "count_lods": 40, "count_verts": 2000, "count_faces": 2000, "count_selections": 10, "count_uvsets": 1}
+)
+
+
+def load_modules():
+    dummy = runpy.run_path(os.path.join(folder_addon, "scripts/create_dummy_p3d.py"), run_name="create_dummy_p3d")
+    if not bpy:
+        return dummy["create_mlod"], dummy["p3d"], None, None
+
+    name = None
+    for addon in bpy.context.preferences.addons:
+        if addon.module.endswith("Arma3ObjectBuilder"):
+            name = addon.module
+            break
+    else:
+        raise Exception("Arma 3 Object Builder could not be found")
+
+    a3ob = importlib.import_module(name)
+
+    return dummy["create_mlod"], a3ob.io.data_p3d, a3ob.io.import_p3d, a3ob.io.export_p3d
+
+
+# Collect the default values of the operator properties, so the import and export
+# functions can be called directly, without the operator overhead.
+def get_operator_settings(operator, **kwargs):
+    settings = SimpleNamespace()
+    for prop in operator.get_rna_type().properties:
+        if prop.identifier == "rna_type":
+            continue
+
+        if prop.type == 'ENUM' and prop.is_enum_flag:
+            value = set(prop.default_flag)
+        elif getattr(prop, "is_array", False):
+            value = tuple(prop.default_array)
+        else:
+            value = prop.default
+
+        setattr(settings, prop.identifier, value)
+
+    for key, value in kwargs.items():
+        setattr(settings, key, value)
+
+    return settings
+
+
+def measure(func, repeats):
+    times = []
+    for i in range(repeats):
+        time_start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - time_start)
+
+    return min(times)
+
+
+# Comparison of the per vertex weight assignment, and the bulk assignment of the vertices
+# grouped by weight, on the selections of the first LOD.
+def measure_vertex_groups(p3d, lod, repeats):
+    mesh = bpy.data.meshes.new("benchmark")
+    mesh.vertices.add(len(lod.verts))
+    obj = bpy.data.objects.new("benchmark", mesh)
+    selections = [tagg for tagg in lod.taggs if isinstance(tagg.data, p3d.P3D_TAGG_DataSelection)]
+
+    def assign_per_vertex():
+        obj.vertex_groups.clear()
+        for tagg in selections:
+            group = obj.vertex_groups.new(name=tagg.name)
+            indices, weights = tagg.data.nonzero_verts()
+            for idx, weight in zip(indices.tolist(), weights.tolist()):
+                group.add([idx], weight, 'REPLACE')
+
+    def assign_grouped():
+        obj.vertex_groups.clear()
+        for tagg in selections:
+            group = obj.vertex_groups.new(name=tagg.name)
+            for weight, indices in tagg.data.grouped_verts():
+                group.add(indices.tolist(), weight, 'REPLACE')
+
+    result = {
+        "per_vertex": measure(assign_per_vertex, repeats),
+        "grouped": measure(assign_grouped, repeats)
+    }
+
+    bpy.data.objects.remove(obj)
+    bpy.data.meshes.remove(mesh)
+
+    return result
+
+
+def run_case(case, repeats, create_mlod, p3d, import_p3d, export_p3d):
+    params = {key: value for key, value in case.items() if key != "name"}
+    filepath = os.path.join(folder_outputs, "%s.p3d" % case["name"])
+    filepath_out = os.path.join(folder_outputs, "%s_out.p3d" % case["name"])
+
+    mlod = create_mlod(**params)
+    mlod.write_file(filepath)
+
+    result = dict(case)
+    result["size"] = os.path.getsize(filepath)
+    result["read"] = measure(lambda: p3d.P3D_MLOD.read_file(filepath), repeats)
+
+    mlod = p3d.P3D_MLOD.read_file(filepath)
+    result["write"] = measure(lambda: mlod.write_file(filepath_out), repeats)
+
+    if not bpy:
+        return result
+
+    bpy.ops.wm.read_homefile(app_template="")
+    result["vertex_groups"] = measure_vertex_groups(p3d, mlod.lods[0], repeats)
+
+    settings_import = get_operator_settings(bpy.ops.a3ob.import_p3d, filepath=filepath)
+    time_start = time.perf_counter()
+    with open(filepath, "rb") as file:
+        import_p3d.read_file(settings_import, bpy.context, file)
+    result["import"] = time.perf_counter() - time_start
+
+    settings_export = get_operator_settings(bpy.ops.a3ob.export_p3d, filepath=filepath_out)
+    temp_collection = export_p3d.create_temp_collection(bpy.context)
+    time_start = time.perf_counter()
+    with open(filepath_out, "wb") as file:
+        export_p3d.write_file(settings_export, bpy.context, file, temp_collection)
+    result["export"] = time.perf_counter() - time_start
+    export_p3d.cleanup_temp_collection(temp_collection)
+
+    return result
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else sys.argv[1:]
+    filepath_json = argv[0] if len(argv) > 0 else os.path.join(folder_outputs, "results.json")
+    repeats = int(argv[1]) if len(argv) > 1 else 3
+
+    if not os.path.isdir(folder_outputs):
+        os.makedirs(folder_outputs)
+
+    modules = load_modules()
+    results = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "blender": bpy.app.version_string if bpy else None,
+        "repeats": repeats,
+        "cases": []
+    }
+
+    for case in cases:
+        result = run_case(case, repeats, *modules)
+        results["cases"].append(result)
+        print(json.dumps(result))
+
+    with open(filepath_json, "wt") as file:
+        json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+"""
+python tests/p3d_standalone.py
+
+Test cases of the P3D data handling, that do not need Blender. The data handler modules
+are loaded through the io/standalone.py loader.
+"""
+
+
+import os
+import io
+import time
+import struct
+import shutil
+import runpy
+import tempfile
+import multiprocessing
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+folder_addon = os.path.join(os.getcwd(), "Arma3ObjectBuilder")
+folder_inputs = os.path.join(os.getcwd(), "tests/inputs/p3d")
+path_standalone = os.path.join(folder_addon, "io/standalone.py")
+
+standalone = runpy.run_path(path_standalone)
+binary = standalone["import_module"]("binary_handler")
+data_p3d = standalone["import_module"]("data_p3d")
+cache_p3d = standalone["import_module"]("cache_p3d")
+serialize_p3d = standalone["import_module"]("serialize_p3d")
+
+
+def assert_lods_equal(test, lod_a, lod_b):
+    test.assertEqual(float(lod_a.resolution), float(lod_b.resolution))
+    for name in cache_p3d.P3D_Cache.lod_arrays:
+        np.testing.assert_array_equal(getattr(lod_a, name), getattr(lod_b, name), name)
+
+    test.assertEqual(lod_a.materials, lod_b.materials)
+    test.assertEqual([tagg.name for tagg in lod_a.taggs], [tagg.name for tagg in lod_b.taggs])
+
+
+# Weight encoding of the original per element implementation.
+def encode_weight_reference(weight):
+    if weight in (0, 1):
+        return int(weight)
+    
+    return round(255 - 254 * weight)
+
+
+# LOD writer following the original per element implementation, to validate the output
+# of the bulk serialization against.
+def serialize_reference(lod):
+    file = io.BytesIO()
+    file.write(lod.signature)
+    binary.write_ulong(file, *lod.version)
+    binary.write_ulong(file, len(lod.verts), len(lod.normals), len(lod.face_sides), lod.flags)
+
+    for (x, y, z), flag in zip(lod.verts.tolist(), lod.verts_flags.tolist()):
+        file.write(struct.pack("<fffI", x, z, y, flag))
+    
+    for x, y, z in lod.normals.tolist():
+        file.write(struct.pack("<fff", -x, -z, -y))
+    
+    loop = 0
+    for sides, flag, material in zip(lod.face_sides.tolist(), lod.face_flags.tolist(), lod.face_materials.tolist()):
+        binary.write_ulong(file, sides)
+        for i in range(loop, loop + sides):
+            file.write(struct.pack("<IIff", lod.face_verts[i], lod.face_normals[i], *lod.face_uvs[i].tolist()))
+        
+        if sides < 4:
+            file.write(bytearray(16))
+        
+        loop += sides
+        texture, material = (lod.materials or [("", "")])[material]
+        binary.write_ulong(file, flag)
+        binary.write_asciiz(file, texture)
+        binary.write_asciiz(file, material)
+    
+    binary.write_chars(file, "TAGG")
+    for tagg in lod.taggs:
+        binary.write_bool(file, True)
+        binary.write_asciiz(file, tagg.name)
+        binary.write_ulong(file, tagg.data.length())
+        if tagg.name == "#SharpEdges#":
+            for edge in tagg.data.edges:
+                if edge[0] != edge[1]:
+                    binary.write_ulong(file, *edge)
+        elif tagg.name == "#Property#":
+            binary.write_asciiz_field(file, tagg.data.key, 64)
+            binary.write_asciiz_field(file, tagg.data.value, 64)
+        elif tagg.name == "#Mass#":
+            binary.write_float(file, *tagg.data.masses)
+        elif tagg.name == "#UVSet#":
+            binary.write_ulong(file, tagg.data.id)
+            for u, v in tagg.data.uvs:
+                binary.write_float(file, u, 1 - v)
+        else:
+            file.write(bytes(tagg.data.data_verts.tolist()))
+            file.write(bytes(tagg.data.data_faces.tolist()))
+    
+    binary.write_bool(file, True)
+    binary.write_asciiz(file, "#EndOfFile#")
+    binary.write_ulong(file, 0)
+    binary.write_float(file, float(lod.resolution))
+
+    return file.getvalue()
+
+
+# Append a proxy triangle to the LOD. The proxy vertices are also added to the named selection.
+def add_proxy(lod, name, selection):
+    count_verts = len(lod.verts)
+    lod.verts = np.concatenate((lod.verts, np.array([[0, 0, 0], [0, 0, 2], [0, 1, 0]], dtype=np.float32)))
+    lod.verts_flags = np.concatenate((lod.verts_flags, np.zeros(3, dtype=np.uint32)))
+    lod.face_sides = np.append(lod.face_sides, np.uint32(3))
+    lod.face_verts = np.concatenate((lod.face_verts, np.arange(count_verts, count_verts + 3, dtype=np.uint32)))
+    lod.face_normals = np.concatenate((lod.face_normals, np.zeros(3, dtype=np.uint32)))
+    lod.face_uvs = np.concatenate((lod.face_uvs, np.zeros((3, 2), dtype=np.float32)))
+    lod.face_flags = np.append(lod.face_flags, np.uint32(0))
+    lod.face_materials = np.append(lod.face_materials, np.uint32(0))
+
+    for tagg in lod.taggs:
+        if tagg.name == "#UVSet#":
+            tagg.data.uvs = list(tagg.data.uvs) + [(0, 1)] * 3
+        elif tagg.name == "#Mass#":
+            tagg.data.masses = tuple(tagg.data.masses) + (0, 0, 0)
+        elif tagg.is_selection():
+            value = 1 if tagg.name == selection else 0
+            tagg.data.data_verts = np.concatenate((tagg.data.data_verts, np.full(3, value, dtype=np.uint8)))
+            tagg.data.data_faces = np.append(tagg.data.data_faces, np.uint8(0))
+    
+    tagg = data_p3d.P3D_TAGG()
+    tagg.name = name
+    tagg.data = data_p3d.P3D_TAGG_DataSelection(len(lod.verts), len(lod.face_sides))
+    tagg.data.data_verts[count_verts:] = 1
+    tagg.data.data_faces[-1] = 1
+    lod.taggs.append(tagg)
+
+
+# Export snapshot of a LOD, with the same content as the snapshots of the LOD objects in Blender.
+def get_snapshot(lod):
+    selections = [tagg for tagg in lod.taggs if tagg.is_selection()]
+    assignments = [(i, *tagg.data.nonzero_verts()) for i, tagg in enumerate(selections)]
+
+    return {
+        "name": "LOD %d" % lod.resolution.lod,
+        "signature": float(lod.resolution),
+        "lod": lod.resolution.lod,
+        "resolution": lod.resolution.res,
+        "proxies": {},
+        "renumber_components": False,
+        "force_lowercase": False,
+        "verts": lod.verts,
+        "verts_flags": lod.verts_flags,
+        "loop_normals": lod.normals[lod.face_normals],
+        "face_sides": lod.face_sides,
+        "face_verts": lod.face_verts,
+        "face_uvs": lod.face_uvs,
+        "face_flags": lod.face_flags,
+        "face_materials": lod.face_materials,
+        "materials": lod.materials,
+        "sharp_edges": np.array(next(tagg.data.edges for tagg in lod.taggs if tagg.name == "#SharpEdges#"), dtype=np.uint32).reshape((-1, 2)),
+        "uvsets": [np.array(tagg.data.uvs, dtype=np.float32).reshape((-1, 2)) for tagg in lod.taggs if tagg.name == "#UVSet#"],
+        "properties": [(tagg.data.key, tagg.data.value) for tagg in lod.taggs if tagg.name == "#Property#"],
+        "mass": next((np.array(tagg.data.masses, dtype=np.float32) for tagg in lod.taggs if tagg.name == "#Mass#"), None),
+        "selections": [tagg.name for tagg in selections],
+        "assignments": (
+            np.concatenate([np.full(len(indices), i, dtype=np.int32) for i, indices, weights in assignments] or [np.zeros(0, dtype=np.int32)]),
+            np.concatenate([indices for i, indices, weights in assignments] or [np.zeros(0, dtype=np.int64)]).astype(np.int32),
+            np.concatenate([weights for i, indices, weights in assignments] or [np.zeros(0)]).astype(np.float32)
+        )
+    }
+
+
+class P3DStandaloneTest(unittest.TestCase):
+    """Test cases of the P3D data handling, that run without Blender"""
+
+    def __init__(self, methodName = "runTest"):
+        self.inputs = [os.path.join(folder_inputs, file) for file in os.listdir(folder_inputs) if os.path.splitext(file)[1].lower() == ".p3d"]
+        super().__init__(methodName)
+
+    def test_read_file_task(self):
+        """Parse the sample models with the worker task of the parallel import, and unpack the results"""
+
+        for filepath in self.inputs:
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            arrays, time_read = cache_p3d.read_file_task(filepath)
+
+            for value in arrays.values():
+                self.assertIsInstance(value, np.ndarray)
+
+            unpacked = cache_p3d.P3D_Cache.unpack(arrays)
+            self.assertEqual(len(unpacked.lods), len(mlod.lods))
+            for lod_a, lod_b in zip(mlod.lods, unpacked.lods):
+                assert_lods_equal(self, lod_a, lod_b)
+
+    def test_read_file_task_workers(self):
+        """Parse the sample models in spawned worker processes, that only load the standalone modules"""
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=context, initializer=runpy.run_path, initargs=(path_standalone,)) as executor:
+            results = list(executor.map(cache_p3d.read_file_task, self.inputs))
+
+        for filepath, (arrays, time_read) in zip(self.inputs, results):
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            unpacked = cache_p3d.P3D_Cache.unpack(arrays)
+            for lod_a, lod_b in zip(mlod.lods, unpacked.lods):
+                assert_lods_equal(self, lod_a, lod_b)
+
+    def test_serialize_lod_task(self):
+        """Build and serialize the LODs of the sample models from export snapshots, in the main process and in spawned workers"""
+
+        snapshots = [get_snapshot(lod) for filepath in self.inputs for lod in data_p3d.P3D_MLOD.read_file(filepath).lods]
+        results = [serialize_p3d.serialize_lod_task(snapshot) for snapshot in snapshots]
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=context, initializer=runpy.run_path, initargs=(path_standalone,)) as executor:
+            results_workers = list(executor.map(serialize_p3d.serialize_lod_task, snapshots))
+        
+        for snapshot, result, result_worker in zip(snapshots, results, results_workers):
+            signature, lod_data, counts, records = result_worker
+            self.assertIsInstance(signature, float)
+            self.assertIsInstance(lod_data, (bytes, bytearray))
+            self.assertEqual(result[:3], result_worker[:3])
+
+            lod = data_p3d.P3D_LOD.read(binary.BinaryReader(lod_data))
+            self.assertEqual(float(lod.resolution), snapshot["signature"])
+            self.assertEqual(counts, (len(lod.verts), len(lod.normals), len(lod.face_sides), len(lod.taggs) + 1))
+            np.testing.assert_array_equal(lod.verts, snapshot["verts"])
+            np.testing.assert_array_equal(lod.face_verts, snapshot["face_verts"])
+            np.testing.assert_allclose(lod.normals[lod.face_normals], snapshot["loop_normals"], atol=1e-6)
+            self.assertEqual(lod.materials, snapshot["materials"] if len(snapshot["face_sides"]) > 0 else [])
+            self.assertEqual([tagg.name for tagg in lod.taggs if tagg.is_selection()], snapshot["selections"])
+    
+    def test_cache(self):
+        """Store the sample models in the parsed file cache, and check the hits, misses and eviction"""
+
+        with tempfile.TemporaryDirectory() as folder:
+            filepath = os.path.join(folder, "model_1.p3d")
+            filepath_other = os.path.join(folder, "model_2.p3d")
+            shutil.copyfile(self.inputs[0], filepath)
+            shutil.copyfile(self.inputs[0], filepath_other)
+
+            cache = cache_p3d.P3D_Cache(os.path.join(folder, "cache"), 1024 * 1024 * 1024)
+            self.assertIsNone(cache.get(filepath))
+
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            self.assertTrue(cache.put(filepath, mlod))
+            cached = cache.get(filepath)
+            self.assertIsNotNone(cached)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            for lod_a, lod_b in zip(mlod.lods, cached.lods):
+                assert_lods_equal(self, lod_a, lod_b)
+
+            # A modified source file must not be read from the cache.
+            stat = os.stat(filepath)
+            os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+            self.assertIsNone(cache.get(filepath))
+
+            # The least recently used entry is evicted when the size limit is exceeded.
+            self.assertTrue(cache.put(filepath, mlod))
+            size = cache.get_entries()[0][1]
+            cache.max_size = size
+            time.sleep(0.05)
+            self.assertTrue(cache.put(filepath_other, mlod))
+            self.assertEqual(len(cache.get_entries()), 1)
+            self.assertIsNone(cache.get(filepath))
+            self.assertIsNotNone(cache.get(filepath_other))
+
+    def test_cache_unavailable(self):
+        """The cache is best-effort, an unusable directory results in misses and skipped writes"""
+
+        with tempfile.TemporaryDirectory() as folder:
+            filepath = os.path.join(folder, "model.p3d")
+            shutil.copyfile(self.inputs[0], filepath)
+            blocker = os.path.join(folder, "blocker")
+            with open(blocker, "wb"):
+                pass
+
+            cache = cache_p3d.P3D_Cache(os.path.join(blocker, "cache"), 1024 * 1024)
+            self.assertFalse(cache.put(filepath, data_p3d.P3D_MLOD.read_file(filepath)))
+            self.assertIsNone(cache.get(filepath))
+            self.assertIsNone(cache.get(os.path.join(folder, "missing.p3d")))
+
+    def test_lod_cache(self):
+        """Store serialized LODs in the incremental export cache, keyed on the target file and fingerprint"""
+
+        lods = [(0.0, b"lod_0"), (1.0, b"lod_1")]
+        with tempfile.TemporaryDirectory() as folder:
+            filepath = os.path.join(folder, "model_1.p3d")
+            filepath_other = os.path.join(folder, "model_2.p3d")
+
+            cache = cache_p3d.P3D_LOD_Cache(os.path.join(folder, "cache"))
+            self.assertIsNone(cache.get(filepath, "a"))
+            cache.put(filepath, "a", lods)
+            cache.put(filepath, "b", lods[:1])
+            self.assertEqual(cache.get(filepath, "a"), lods)
+            self.assertIsNone(cache.get(filepath_other, "a"))
+            self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+            # The entries are read back from the disk in a new session.
+            cache = cache_p3d.P3D_LOD_Cache(os.path.join(folder, "cache"))
+            self.assertEqual(cache.get(filepath, "a"), lods)
+
+            # Unused entries of the file are removed from the memory and the disk.
+            cache.put(filepath_other, "b", lods)
+            cache.prune(filepath, ["a"])
+            cache = cache_p3d.P3D_LOD_Cache(os.path.join(folder, "cache"))
+            self.assertEqual(cache.get(filepath, "a"), lods)
+            self.assertIsNone(cache.get(filepath, "b"))
+            self.assertEqual(cache.get(filepath_other, "b"), lods)
+
+    def test_binary_reader(self):
+        """Decode the same values with the buffer reader and the file object reading functions"""
+
+        data = b"".join((
+            struct.pack("<BhHiIefd", 200, -2, 65000, -70000, 4000000000, 0.5, 1.25, -3.5),
+            b"\x81\x02",
+            b"text\x00",
+            b"field".ljust(16, b"\x00"),
+            b"\x05lasci",
+            struct.pack("<3f", 1, 2, 3)
+        ))
+        functions = (
+            "read_byte", "read_short", "read_ushort", "read_long", "read_ulong", "read_half",
+            "read_float", "read_double", "read_compressed_uint", "read_asciiz"
+        )
+
+        reader = binary.BinaryReader(data)
+        file = io.BytesIO(data)
+        for name in functions:
+            self.assertEqual(getattr(reader, name)(), getattr(binary, name)(file), name)
+            self.assertEqual(reader.tell(), file.tell(), name)
+        
+        self.assertEqual(reader.read_asciiz_field(16), binary.read_asciiz_field(file, 16))
+        self.assertEqual(reader.read_lascii(), binary.read_lascii(file))
+        self.assertEqual(reader.peek(4), data[reader.tell():reader.tell() + 4])
+        np.testing.assert_array_equal(reader.read_array("<f4", 3), binary.read_floats(file, 3))
+        self.assertTrue(reader.eof())
+
+        reader.seek(0)
+        self.assertEqual(reader.read(4), data[:4])
+        reader.seek(-4, 2)
+        self.assertEqual(reader.read_float(), 3)
+        self.assertEqual(reader.read(), b"")
+    
+    def test_lazy_reader(self):
+        """Read the sample models with the lazy reader, and compare the LODs and index to a full read"""
+
+        for filepath in self.inputs:
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            with data_p3d.P3D_MLOD_Lazy.read_file(filepath) as lazy:
+                self.assertEqual(lazy.count_lods, len(mlod.lods))
+
+                # Only the LODs up to the requested one are indexed.
+                lazy.get_lod(1)
+                self.assertEqual(len(lazy.index), 2)
+                self.assertEqual(list(lazy.decoded), [1])
+
+                offset = 12
+                for i, lod in enumerate(mlod.lods):
+                    index = lazy.get_index(i)
+                    self.assertEqual(index.offset, offset)
+                    self.assertEqual(index.length, len(lod.serialize()))
+                    self.assertEqual(index.resolution.get(), lod.resolution.get())
+                    self.assertEqual((index.count_verts, index.count_normals, index.count_faces), (len(lod.verts), len(lod.normals), len(lod.face_sides)))
+                    offset += index.length
+                
+                self.assertEqual(lazy.get_duplicate_lods(), mlod.get_duplicate_lods())
+                self.assertIs(lazy.find_lod(9, 0), lazy.get_lod(5))
+                self.assertIsNone(lazy.find_lod(1, 0))
+                with self.assertRaises(IndexError):
+                    lazy.get_index(lazy.count_lods)
+
+                lods = lazy.load()
+                self.assertIsNone(lazy.buffer)
+            
+            self.assertEqual(len(lods), len(mlod.lods))
+            for lod_a, lod_b in zip(mlod.lods, lods):
+                assert_lods_equal(self, lod_a, lod_b)
+            
+            with data_p3d.P3D_MLOD_Lazy.read_file(filepath, lod_types={6, 7}) as lazy:
+                self.assertEqual([lod.resolution.get() for lod in lazy.lods], [(6, 0), (7, 0)])
+            
+            with data_p3d.P3D_MLOD_Lazy.read_file(filepath, True) as lazy:
+                self.assertEqual(len(lazy.lods), 1)
+    
+    def test_summary_scan(self):
+        """Scan the sample models for their summaries, and compare them to the fully read data"""
+
+        for filepath in self.inputs:
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            summary = data_p3d.P3D_MLOD_Summary.scan_file(filepath)
+
+            self.assertEqual(summary.source, filepath)
+            self.assertEqual(summary.size, os.path.getsize(filepath))
+            self.assertEqual(len(summary.lods), len(mlod.lods))
+            for lod, item in zip(mlod.lods, summary.lods):
+                self.assertEqual(item.resolution.get(), lod.resolution.get())
+                self.assertEqual((item.count_verts, item.count_normals, item.count_faces), (len(lod.verts), len(lod.normals), len(lod.face_sides)))
+                self.assertEqual(item.materials, lod.materials)
+                self.assertEqual(item.selections, [tagg.name for tagg in lod.taggs if tagg.is_selection()])
+                self.assertEqual(item.properties, [(tagg.data.key, tagg.data.value) for tagg in lod.taggs if tagg.name == "#Property#"])
+            
+            textures, materials = summary.get_paths()
+            self.assertEqual(materials, ["a3\\data_f\\penetration\\plastic.rvmat"])
+            self.assertEqual(summary.as_dict()["lods"][3]["properties"], [list(item) for item in summary.lods[3].properties])
+    
+    def test_encode_weights(self):
+        """Encode selection weights in bulk, and compare them to the original per element encoding"""
+
+        selection = data_p3d.P3D_TAGG_DataSelection
+        weights = np.concatenate((np.linspace(0, 1, 10001), np.random.default_rng(0).random(1000)))
+        expected = [encode_weight_reference(weight) for weight in weights.tolist()]
+        self.assertEqual(selection.encode_weights(weights).tolist(), expected)
+        self.assertEqual([selection.encode_weight(weight) for weight in weights.tolist()], expected)
+
+        # Every byte value survives a decode-encode cycle (255 is weight 0, same as 0).
+        values = np.arange(255, dtype=np.uint8)
+        np.testing.assert_array_equal(selection.encode_weights(selection.WEIGHTS[values]), values)
+        self.assertEqual([selection.decode_weight(value) for value in range(256)], selection.WEIGHTS.tolist())
+
+        data = selection(4, 2)
+        data.set_weights_verts([0, 2, 3], [1, 0.5, 1])
+        data.set_weights_faces([1], [0.25])
+        self.assertEqual(data.data_verts.tolist(), [1, 0, 128, 1])
+        self.assertEqual(data.data_faces.tolist(), [0, 192])
+        self.assertEqual([(weight, indices.tolist()) for weight, indices in data.grouped_verts()], [(1.0, [0, 3]), (0.5, [2])])
+    
+    def test_match_edges(self):
+        """Look up the sharp edges in a mesh edge list, regardless of the vertex order"""
+
+        edges = np.array([[0, 1], [1, 2], [2, 0], [2, 3], [3, 0]])
+        pairs = np.array([[2, 1], [3, 0], [1, 3], [5, 6]])
+        self.assertEqual(data_p3d.match_edges(edges, pairs).tolist(), [False, True, False, False, True])
+        self.assertEqual(data_p3d.match_edges(edges, np.empty((0, 2))).tolist(), [False] * 5)
+        self.assertEqual(len(data_p3d.match_edges(np.empty((0, 2)), pairs)), 0)
+    
+    def test_extract_proxies(self):
+        """Separate a proxy triangle from a LOD, that should be left as it was before adding the proxy"""
+
+        lod = data_p3d.P3D_MLOD.read_file(self.inputs[0]).lods[0]
+        expected = lod.serialize()
+        add_proxy(lod, "proxy:\\a3\\data_f\\proxies\\dummy.001", "camo1")
+        self.assertNotEqual(lod.serialize(), expected)
+
+        proxies = lod.extract_proxies()
+        self.assertEqual(lod.serialize(), expected)
+        self.assertEqual(len(proxies), 1)
+
+        path, index, verts, faces, selections = proxies[0]
+        self.assertEqual((path, index), ("\\a3\\data_f\\proxies\\dummy", 1))
+        self.assertEqual(verts.tolist(), [[0, 0, 0], [0, 0, 2], [0, 1, 0]])
+        self.assertEqual(faces, [[0, 1, 2]])
+        self.assertEqual([(name, weights.tolist()) for name, weights in selections], [("camo1", [1, 1, 1])])
+        self.assertEqual(lod.extract_proxies(), [])
+    
+    def test_remove_faces(self):
+        """Remove faces from a LOD, together with the vertices that are not used anymore"""
+
+        lod = data_p3d.P3D_MLOD.read_file(self.inputs[0]).lods[2]
+        count_verts = len(lod.verts)
+        count_faces = len(lod.face_sides)
+        mask = np.ones(count_faces, dtype=bool)
+        mask[:2] = False
+        
+        loops = lod.verts[lod.face_verts][~np.repeat(mask, lod.face_sides)]
+        lod.remove_faces(mask)
+        self.assertEqual(len(lod.face_sides), 2)
+        self.assertLess(len(lod.verts), count_verts)
+        np.testing.assert_array_equal(lod.verts[lod.face_verts], loops)
+        self.assertTrue(np.all(np.isin(np.arange(len(lod.verts)), lod.face_verts)))
+        for tagg in lod.taggs:
+            if tagg.name == "#SharpEdges#":
+                self.assertTrue(np.all(np.array(tagg.data.edges) < len(lod.verts)))
+            elif tagg.is_selection():
+                self.assertEqual((tagg.data.count_verts, tagg.data.count_faces), (len(lod.verts), len(lod.face_sides)))
+        
+        lod.remove_faces(np.ones(len(lod.face_sides), dtype=bool))
+        self.assertEqual((len(lod.verts), len(lod.face_sides), len(lod.face_verts)), (0, 0, 0))
+    
+    def test_process_normals(self):
+        """Deduplicate the loop normals, in the order of their first occurrence"""
+
+        normals = np.array([[0, 0, 1], [1, 0, 0], [0, 0, 1], [0, 1, 0], [1, 0, 0]], dtype=np.float32)
+        unique, indices = serialize_p3d.process_normals(normals)
+        self.assertEqual(unique.tolist(), [[0, 0, 1], [1, 0, 0], [0, 1, 0]])
+        self.assertEqual(indices.tolist(), [0, 1, 0, 2, 1])
+        np.testing.assert_array_equal(unique[indices], normals)
+
+        # Signed zeros are merged, the first occurrence is written unchanged.
+        normals = np.array([[0, -0.0, 1], [0, 0, 1], [-0.0, 1, 0]], dtype=np.float32)
+        unique, indices = serialize_p3d.process_normals(normals)
+        self.assertEqual(unique.tobytes(), normals[[0, 2]].tobytes())
+        self.assertEqual(indices.tolist(), [0, 0, 1])
+
+        unique, indices = serialize_p3d.process_normals(np.empty((0, 3)))
+        self.assertEqual((unique.shape, indices.shape), ((0, 3), (0,)))
+    
+    def test_process_selections(self):
+        """Encode the vertex group assignments into selections, with the face membership"""
+
+        # 2 quads sharing an edge, and a triangle
+        face_sides = np.array([4, 4, 3], dtype=np.uint32)
+        face_verts = np.array([0, 1, 2, 3, 1, 4, 5, 2, 6, 7, 8], dtype=np.uint32)
+        group_indices = np.array([0, 0, 0, 0, 0, 1, 1, 1, 2, 2, 2], dtype=np.int32)
+        vert_indices = np.array([0, 1, 2, 3, 4, 6, 7, 8, 6, 7, 8], dtype=np.int32)
+        weights = np.array([1, 0.5, 1, 1, 1, 1, 0, 1, 0, 0, 0], dtype=np.float32)
+
+        taggs = serialize_p3d.process_taggs_selections(["a", "b", "c"], (group_indices, vert_indices, weights), 9, face_sides, face_verts, 2)
+        self.assertEqual([tagg.name for tagg in taggs], ["a", "b", "c"])
+        self.assertEqual(taggs[0].data.data_verts.tolist(), [1, 128, 1, 1, 1, 0, 0, 0, 0])
+        self.assertEqual(taggs[0].data.data_faces.tolist(), [1, 0, 0])
+
+        # Vertices assigned with 0 weight are still part of the selection.
+        self.assertEqual(taggs[1].data.data_verts.tolist(), [0, 0, 0, 0, 0, 0, 1, 0, 1])
+        self.assertEqual(taggs[1].data.data_faces.tolist(), [0, 0, 1])
+        self.assertEqual(taggs[2].data.data_verts.tolist(), [0] * 9)
+        self.assertEqual(taggs[2].data.data_faces.tolist(), [0, 0, 1])
+    
+    def test_serialize(self):
+        """Serialize the LODs in bulk, and compare the output to the original per element writer"""
+
+        for filepath in self.inputs:
+            mlod = data_p3d.P3D_MLOD.read_file(filepath)
+            for lod in mlod.lods:
+                self.assertEqual(bytes(lod.serialize()), serialize_reference(lod), str(lod.resolution.get()))
+            
+            # A written file is read and written back byte for byte.
+            output = io.BytesIO()
+            mlod.write(output)
+            reread = data_p3d.P3D_MLOD.read(io.BytesIO(output.getvalue()))
+            output_reread = io.BytesIO()
+            reread.write(output_reread)
+            self.assertEqual(output.getvalue(), output_reread.getvalue())
+
+            with open(filepath, "rb") as file:
+                self.assertEqual(len(output.getvalue()), len(file.read()))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()